@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+# bench_cdevent.py
+"""
+Serialization benchmark for the CDEvent model in cdevents_pipeline.py.
+
+Compares the previous model (plain dataclasses, to_dict via
+dataclasses.asdict, to_json with indent=2) with the slotted one: memory per
+event, time and allocated bytes per to_dict / encode / decode call. The
+encodings are checked to round-trip to the same event; the script exits
+non-zero if they do not.
+"""
+
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+from cdevents_pipeline import CDEvent, CDEventContext, CDEventSubject
+
+
+@dataclass
+class LegacyContext:
+    version: str = "0.4.1"
+    id: str = ""
+    chainId: str = ""
+    source: str = ""
+    type: str = ""
+    timestamp: str = ""
+    schemaUri: Optional[str] = None
+    links: Optional[List[Dict[str, Any]]] = None
+
+
+@dataclass
+class LegacySubject:
+    id: str
+    source: str
+    type: str
+    content: Dict[str, Any]
+
+
+class LegacyEvent:
+    """CDEvent as it was before the slotted model."""
+
+    def __init__(self, context: LegacyContext, subject: LegacySubject):
+        self.context = context
+        self.subject = subject
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"context": asdict(self.context), "subject": asdict(self.subject)}
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), indent=2)
+
+    @classmethod
+    def from_json(cls, data: str) -> "LegacyEvent":
+        data = json.loads(data)
+        return cls(LegacyContext(**data["context"]), LegacySubject(**data["subject"]))
+
+
+def fields(serial: int):
+    context = dict(
+        id=f"01HF7YAT00QGS4HZJE5EQR{serial:04d}",
+        chainId=f"chain-{serial}",
+        source="/event/source/build",
+        type="dev.cdevents.build.finished.0.2.0",
+        timestamp="2025-01-01T00:00:00.000000Z",
+    )
+    subject = dict(
+        id=f"build/{serial}",
+        source="/event/source/build",
+        type="build",
+        content={
+            "artifactId": f"pkg:oci/my-app@sha256:{serial:064x}",
+            "labels": {"team": "platform", "stage": "ci", "attempt": serial % 3},
+            "steps": [{"name": f"step-{n}", "seconds": n * 1.5} for n in range(5)],
+        },
+    )
+    return context, subject
+
+
+def make_events(count: int):
+    legacy, slotted = [], []
+    for serial in range(count):
+        context, subject = fields(serial)
+        legacy.append(LegacyEvent(LegacyContext(**context), LegacySubject(**subject)))
+        context, subject = fields(serial)
+        slotted.append(CDEvent(CDEventContext(**context), CDEventSubject(**subject)))
+    return legacy, slotted
+
+
+def held(build: Callable[[], Any]) -> int:
+    tracemalloc.start()
+    kept = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del kept
+    return current
+
+
+def allocated(call: Callable[[], Any]) -> int:
+    """Peak bytes allocated while one call runs (its result included)."""
+    tracemalloc.start()
+    call()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def bench(label: str, call: Callable[[Any], Any], items: List[Any], probe: Any = None, repeat: int = 3) -> float:
+    """
+    Best time per call() over items out of `repeat` runs; allocations are
+    measured on `probe` (default: the first item) afterwards
+    """
+    per_call = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for item in items:
+            call(item)
+        per_call = min(per_call, (time.perf_counter() - start) / len(items))
+    probe = items[0] if probe is None else probe
+    print(f"{label:<44} {per_call * 1e6:>10.2f} us/call {allocated(lambda: call(probe)):>10,} bytes allocated")
+    return per_call
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare the legacy and slotted CDEvent serialization.")
+    parser.add_argument("--events", "-n", type=int, default=20000, help="Events per measurement")
+    args = parser.parse_args()
+
+    legacy, slotted = make_events(args.events)
+    print(f"{'legacy events held':<44} {held(lambda: make_events(args.events)[0]) / args.events:>10,.0f} bytes/event")
+    print(f"{'slotted events held':<44} {held(lambda: make_events(args.events)[1]) / args.events:>10,.0f} bytes/event")
+
+    before = bench("legacy to_dict (asdict)", lambda e: e.to_dict(), legacy)
+    after = bench("slotted to_dict", lambda e: e.to_dict(), slotted)
+    print(f"{'':<44} {before / after:>10.1f}x faster")
+    before = bench("legacy to_json (indent=2)", lambda e: e.to_json(), legacy)
+
+    def encode_fresh(event: CDEvent) -> bytes:
+        # a new wrapper around the same context and subject has nothing cached yet
+        return CDEvent(event.context, event.subject).encode()
+
+    bench("slotted encode, first call", encode_fresh, slotted)
+    wire = [e.encode() for e in slotted]
+    after = bench("slotted encode, cached", lambda e: e.encode(), slotted)
+    print(f"{'':<44} {before / after:>10.1f}x faster per further hop")
+
+    legacy_wire = [e.to_json() for e in legacy]
+    before = bench("legacy from_json", LegacyEvent.from_json, legacy_wire)
+    after = bench("CDEvent.from_json", CDEvent.from_json, wire)
+    print(f"{'':<44} {before / after:>10.1f}x faster")
+    after = bench("CDEvent.from_record", CDEvent.from_record, wire)
+    print(f"{'':<44} {before / after:>10.1f}x faster")
+    before = bench(
+        "legacy from_json then to_json (relay hop)", lambda w: LegacyEvent.from_json(w).to_json(), legacy_wire
+    )
+    after = bench("CDEvent.from_record then encode (relay hop)", lambda w: CDEvent.from_record(w).encode(), wire)
+    print(f"{'':<44} {before / after:>10.1f}x faster")
+
+    failures = []
+    for old, new, encoded in zip(legacy[:1000], slotted, wire):
+        if old.to_dict() != new.to_dict() or json.loads(encoded) != old.to_dict():
+            failures.append(f"{new.context.id}: slotted encoding differs from the legacy one")
+        if CDEvent.from_json(encoded).to_dict() != new.to_dict():
+            failures.append(f"{new.context.id}: does not round-trip through from_json")
+        if CDEvent.from_record(encoded).to_dict() != new.to_dict():
+            failures.append(f"{new.context.id}: does not round-trip through from_record")
+        spaced = json.dumps(json.loads(encoded)).encode("utf-8")
+        if CDEvent.from_json(spaced).encode() != encoded:
+            failures.append(f"{new.context.id}: from_json kept non-compact input as the encoding")
+    try:
+        slotted[0].context.type = "changed"
+        failures.append("CDEventContext accepted an assignment after the event was built")
+    except AttributeError:
+        pass
+    for failure in failures[:10]:
+        print(f"FAIL: {failure}")
+    if failures:
+        sys.exit(1)
+    print("OK: slotted events encode like the legacy model and round-trip")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# bench_fanout.py
+"""
+Fan-out benchmark for InMemoryEventBroker dispatch modes.
+
+One slow subscriber (--slow-ms per event) and --fast fast subscribers all
+listen to the same type while --events events are published. Inline
+dispatch makes the publisher and every fast subscriber wait for the slow
+one; queued dispatch does not. Then checks the overflow policies and the
+awaitable Delivery; the script exits non-zero if any check fails.
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+import time
+from typing import List
+
+from cdevents_pipeline import CDEvent, CDEventContext, CDEventSubject, InMemoryEventBroker
+from event_dispatch import SubscriberOverflow
+
+EVENT_TYPE = "dev.cdevents.build.finished.0.2.0"
+
+
+def make_event(serial: int) -> CDEvent:
+    context = CDEventContext(source="/bench/fanout", type=EVENT_TYPE)
+    subject = CDEventSubject(id=f"build/{serial}", source="/bench/fanout", type="build", content={})
+    return CDEvent(context, subject)
+
+
+async def run(dispatch: str, events: int, fast: int, slow_ms: float) -> None:
+    broker = InMemoryEventBroker(dispatch=dispatch, queue_size=events)
+    fast_done = asyncio.Event()
+    handled: List[int] = [0]
+
+    async def slow_subscriber(event: CDEvent) -> None:
+        await asyncio.sleep(slow_ms / 1000)
+
+    async def fast_subscriber(event: CDEvent) -> None:
+        handled[0] += 1
+        if handled[0] == events * fast:
+            fast_done.set()
+
+    await broker.subscribe([EVENT_TYPE], slow_subscriber)
+    for _ in range(fast):
+        await broker.subscribe(["dev.cdevents.build.*"], fast_subscriber)
+
+    start = time.perf_counter()
+    for serial in range(events):
+        await broker.publish(make_event(serial))
+    published = time.perf_counter() - start
+    await fast_done.wait()
+    fast_elapsed = time.perf_counter() - start
+    await broker.drain()
+    total = time.perf_counter() - start
+    await broker.close()
+    print(
+        f"{dispatch:<8} publish {published * 1000:>9.1f} ms"
+        f"  fast subscribers done {fast_elapsed * 1000:>9.1f} ms"
+        f"  all done {total * 1000:>9.1f} ms"
+    )
+
+
+async def check_policies() -> List[str]:
+    failures = []
+    gate = asyncio.Event()
+
+    async def stuck(event: CDEvent) -> None:
+        await gate.wait()
+
+    # drop-oldest: the subscriber keeps the newest events and counts the rest as dropped
+    broker = InMemoryEventBroker(dispatch="queued", queue_size=2, overflow="drop-oldest")
+    await broker.subscribe([EVENT_TYPE], stuck)
+    for serial in range(10):
+        await broker.publish(make_event(serial))
+        await asyncio.sleep(0)
+    stats = broker.stats()[0]
+    if stats["depth"] != 2 or stats["dropped"] != 7:
+        failures.append(f"drop-oldest kept depth {stats['depth']} and dropped {stats['dropped']}, expected 2 and 7")
+    gate.set()
+    await broker.drain()
+    await broker.close()
+
+    # error: publish() raises once the queue is full
+    gate.clear()
+    broker = InMemoryEventBroker(dispatch="queued", queue_size=2, overflow="error")
+    await broker.subscribe([EVENT_TYPE], stuck)
+    raised = False
+    for serial in range(5):
+        try:
+            await broker.publish(make_event(serial))
+        except SubscriberOverflow:
+            raised = True
+        await asyncio.sleep(0)
+    if not raised:
+        failures.append("error policy did not raise SubscriberOverflow")
+    gate.set()
+    await broker.drain()
+    await broker.close()
+
+    # block: publish() waits for room, and the Delivery resolves once every subscriber has handled the event
+    broker = InMemoryEventBroker(dispatch="queued", queue_size=1, overflow="block")
+
+    async def failing(event: CDEvent) -> None:
+        raise RuntimeError("subscriber failure")
+
+    async def fine(event: CDEvent) -> None:
+        await asyncio.sleep(0.01)
+
+    await broker.subscribe([EVENT_TYPE], fine)
+    await broker.subscribe([EVENT_TYPE], failing)
+    logging.getLogger("event_dispatch").disabled = True
+    deliveries = [await broker.publish(make_event(serial)) for serial in range(5)]
+    results = await asyncio.gather(*deliveries)
+    if results != [1] * 5:
+        failures.append(f"deliveries resolved to {results}, expected one successful subscriber each")
+    delivered = await broker.publish(make_event(5), wait=True)
+    if not delivered.future.done():
+        failures.append("publish(wait=True) returned before delivery")
+    await broker.close()
+    return failures
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare inline and queued fan-out in InMemoryEventBroker.")
+    parser.add_argument("--events", "-n", type=int, default=200, help="Events to publish")
+    parser.add_argument("--fast", type=int, default=10, help="Fast subscribers")
+    parser.add_argument("--slow-ms", type=float, default=5.0, help="Time the slow subscriber spends per event")
+    args = parser.parse_args()
+    # the broker logs every publish at INFO
+    logging.getLogger("cdevents_pipeline").setLevel(logging.WARNING)
+
+    for dispatch in ("inline", "queued"):
+        asyncio.run(run(dispatch, args.events, args.fast, args.slow_ms))
+
+    failures = asyncio.run(check_policies())
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if failures:
+        sys.exit(1)
+    print("OK: overflow policies and delivery tracking behave as expected")
+
+
+if __name__ == "__main__":
+    main()
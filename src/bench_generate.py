@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+# bench_generate.py
+"""
+Micro-benchmark for synthetic event generation throughput.
+
+Reports events/sec for generate_epr_events.iter_events() and
+generate_cdevents.generate_events(); run it before and after a change to the
+generators to compare.
+"""
+
+import argparse
+import contextlib
+import os
+import time
+from typing import Callable
+
+import generate_cdevents
+import generate_epr_events
+
+
+def bench(label: str, fn: Callable[[], int], repeat: int) -> float:
+    """Run fn `repeat` times and print the best events/sec."""
+    best = 0.0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        count = fn()
+        elapsed = time.perf_counter() - start
+        best = max(best, count / elapsed)
+    print(f"{label:<40} {count:>10} events {best:>14,.0f} events/sec")
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure event generation throughput.")
+    parser.add_argument("--services", type=int, default=100, help="Services for generate_epr_events")
+    parser.add_argument("--chains-per-service", type=int, default=20, help="Chains per service")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per benchmark; the best is reported")
+    args = parser.parse_args()
+
+    def epr_events() -> int:
+        events = generate_epr_events.iter_events(
+            {}, services=args.services, chains_per_service=args.chains_per_service
+        )
+        return sum(1 for _ in events)
+
+    def cdevents() -> int:
+        # generate_cdevents echoes every event to stdout; keep that out of the terminal
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            return len(generate_cdevents.generate_events())
+
+    bench("generate_epr_events.iter_events", epr_events, args.repeat)
+    bench("generate_cdevents.generate_events", cdevents, args.repeat * 20)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# bench_history.py
+"""
+Benchmark for the broker's event history.
+
+Publishes --events events spread over --chains chains into an unbounded
+list (the old InMemoryEventBroker.events) and into event_history.EventHistory
+capped at --max-events, then compares memory held, "all events for a chain"
+lookups and time-range queries. The indexes are checked against a scan of
+the retained events; the script exits non-zero when they disagree.
+"""
+
+import argparse
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Iterator, List
+
+from cdevents_pipeline import CDEvent, CDEventContext, CDEventSubject
+from event_history import EventHistory, parse_timestamp
+
+EPOCH = datetime(2025, 1, 1, tzinfo=timezone.utc)
+TYPES = [
+    "dev.cdevents.repository.modified.0.2.0",
+    "dev.cdevents.build.finished.0.2.0",
+    "dev.cdevents.testsuiterun.finished.0.2.0",
+    "dev.cdevents.service.deployed.0.2.0",
+]
+
+
+def iso(when: datetime) -> str:
+    return when.isoformat().replace("+00:00", "Z")
+
+
+def iter_events(count: int, chains: int, seed: int) -> Iterator[CDEvent]:
+    rng = random.Random(seed)
+    chain_ids = [f"chain-{n:05d}" for n in range(chains)]
+    for serial in range(count):
+        context = CDEventContext(
+            source="/bench/history",
+            type=TYPES[serial % len(TYPES)],
+            chainId=rng.choice(chain_ids),
+            timestamp=iso(EPOCH + timedelta(milliseconds=serial * 10)),
+        )
+        subject = CDEventSubject(id=f"build/{serial % 1000}", source="/bench/history", type="build", content={})
+        yield CDEvent(context, subject)
+
+
+def held(fill: Callable[[], Any]) -> int:
+    """Bytes still allocated once fill() has published every event into its container."""
+    tracemalloc.start()
+    container = fill()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del container
+    return current
+
+
+def timed(label: str, fn: Callable[[], int], repeat: int) -> None:
+    start = time.perf_counter()
+    found = 0
+    for _ in range(repeat):
+        found += fn()
+    elapsed = (time.perf_counter() - start) / repeat
+    print(f"{label:<44} {elapsed * 1e6:>12.1f} us/query {found / repeat:>10.1f} events")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare the unbounded event list with EventHistory.")
+    parser.add_argument("--events", "-n", type=int, default=200000, help="Events to publish")
+    parser.add_argument("--chains", type=int, default=20000, help="Distinct chain ids")
+    parser.add_argument("--max-events", type=int, default=50000, help="EventHistory capacity")
+    parser.add_argument("--repeat", type=int, default=200, help="Queries per measurement")
+    parser.add_argument("--seed", type=int, default=42, help="Seed for chain assignment")
+    args = parser.parse_args()
+
+    def fill_list() -> List[CDEvent]:
+        stored = []
+        for event in iter_events(args.events, args.chains, args.seed):
+            stored.append(event)
+        return stored
+
+    def fill_history() -> EventHistory:
+        history = EventHistory(max_events=args.max_events)
+        for event in iter_events(args.events, args.chains, args.seed):
+            history.append(event)
+        return history
+
+    for label, fill in (("list", fill_list), (f"EventHistory({args.max_events})", fill_history)):
+        print(f"{label:<28} holds {held(fill) / 1e6:>8.1f} MB after {args.events} events")
+
+    events = fill_list()
+    history = EventHistory(max_events=args.max_events)
+    start = time.perf_counter()
+    for event in events:
+        history.append(event)
+    print(f"EventHistory append {args.events / (time.perf_counter() - start):>12,.0f} events/sec")
+
+    retained = events[-args.max_events :]
+    failures = []
+    for chain_id in {event.context.chainId for event in retained[:100]}:
+        if history.chain(chain_id) != [e for e in retained if e.context.chainId == chain_id]:
+            failures.append(f"chain index differs for {chain_id}")
+    if history.of_type(TYPES[1]) != [e for e in retained if e.context.type == TYPES[1]]:
+        failures.append("type index differs")
+    subject_id = retained[0].subject.id
+    if history.for_subject(subject_id) != [e for e in retained if e.subject.id == subject_id]:
+        failures.append("subject index differs")
+    if len(history.by_chain_id) != len({event.context.chainId for event in retained}):
+        failures.append("chain index keeps keys whose events were all evicted")
+    if list(history) != retained:
+        failures.append("history order differs from publish order")
+
+    chain_id = retained[-1].context.chainId
+    timed("list scan for one chain", lambda: sum(1 for e in events if e.context.chainId == chain_id), 5)
+    timed("EventHistory.chain", lambda: len(history.chain(chain_id)), args.repeat)
+
+    start_ts = retained[len(retained) // 2].context.timestamp
+    end_ts = retained[len(retained) // 2 + 100].context.timestamp
+    low, high = parse_timestamp(start_ts), parse_timestamp(end_ts)
+
+    def in_range(event: CDEvent) -> bool:
+        return low <= parse_timestamp(event.context.timestamp) < high
+
+    if list(history.between(start_ts, end_ts)) != [e for e in retained if in_range(e)]:
+        failures.append("between() differs from a scan")
+    timed("list scan for a 1 second range", lambda: sum(1 for e in events if in_range(e)), 5)
+    timed("EventHistory.between", lambda: sum(1 for _ in history.between(start_ts, end_ts)), args.repeat)
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if failures:
+        sys.exit(1)
+    print(f"OK: indexes and time ranges match a scan ({history.evicted} events evicted)")
+
+
+if __name__ == "__main__":
+    main()
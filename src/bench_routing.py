@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# bench_routing.py
+"""
+Micro-benchmark for broker subscription routing.
+
+Registers --subscriptions subscriptions (exact types, version-agnostic types
+and wildcard patterns over the CDEvents vocabulary) and reports publishes/sec
+for the old linear scan over every subscription key and for
+event_routing.SubscriptionIndex, after checking that both pick the same
+subscribers for every type.
+"""
+
+import argparse
+import random
+import time
+from typing import Any, Callable, Dict, List
+
+from event_routing import WILDCARD, SubscriptionIndex, split_type
+
+SUBJECTS = {
+    "artifact": ["packaged", "published", "signed", "deleted", "downloaded"],
+    "build": ["queued", "started", "finished"],
+    "change": ["created", "reviewed", "merged", "abandoned", "updated"],
+    "environment": ["created", "modified", "deleted"],
+    "incident": ["detected", "reported", "resolved"],
+    "pipelinerun": ["queued", "started", "finished"],
+    "repository": ["created", "modified", "deleted"],
+    "service": ["deployed", "upgraded", "rolledback", "removed", "published"],
+    "taskrun": ["started", "finished"],
+    "testcaserun": ["queued", "started", "finished", "skipped"],
+    "testsuiterun": ["queued", "started", "finished"],
+}
+VERSIONS = ["0.1.0", "0.1.1", "0.2.0", "0.3.0"]
+
+
+def event_types() -> List[str]:
+    return [
+        f"dev.cdevents.{subject}.{predicate}.{version}"
+        for subject, predicates in SUBJECTS.items()
+        for predicate in predicates
+        for version in VERSIONS
+    ]
+
+
+def random_pattern(rng: random.Random, serial: int) -> str:
+    """A subscription pattern; most are exact types, as in the pipeline services."""
+    subject = rng.choice(sorted(SUBJECTS))
+    predicate = rng.choice(SUBJECTS[subject])
+    roll = rng.random()
+    if roll < 0.6:
+        # exact types, including some nobody publishes (other tenants' custom events)
+        if rng.random() < 0.5:
+            return f"dev.cdevents.{subject}.{predicate}.{rng.choice(VERSIONS)}"
+        return f"dev.cdevents.custom{serial}.{predicate}.0.1.0"
+    if roll < 0.8:
+        return f"dev.cdevents.{subject}.{predicate}"
+    if roll < 0.9:
+        return f"dev.cdevents.{subject}.*"
+    if roll < 0.99:
+        return f"dev.cdevents.*.{predicate}.*"
+    return WILDCARD
+
+
+def pattern_matches(pattern: str, event_type: str) -> bool:
+    """Reference matcher with the same semantics as SubscriptionIndex."""
+    if pattern == WILDCARD:
+        return True
+    names, version = split_type(pattern)
+    type_names, type_version = split_type(event_type)
+    segments = names + ([version] if version else [])
+    candidates = [type_names + ([type_version] if type_version else [])]
+    if type_version:
+        candidates.append(type_names)
+    return any(
+        len(segments) == len(target) and all(p in (WILDCARD, s) for p, s in zip(segments, target))
+        for target in candidates
+    )
+
+
+class LinearRouter:
+    """Routing as the brokers did it before the index: scan every key on every publish."""
+
+    def __init__(self):
+        self.subscribers: Dict[str, List[Any]] = {}
+
+    def add(self, pattern: str, value: Any) -> None:
+        self.subscribers.setdefault(pattern, []).append(value)
+
+    def match(self, event_type: str) -> List[Any]:
+        found = []
+        for pattern, values in self.subscribers.items():
+            if pattern_matches(pattern, event_type):
+                found.extend(values)
+        return found
+
+
+def bench(label: str, match: Callable[[str], List[Any]], published: List[str]) -> float:
+    start = time.perf_counter()
+    delivered = 0
+    for event_type in published:
+        delivered += len(match(event_type))
+    elapsed = time.perf_counter() - start
+    rate = len(published) / elapsed
+    print(f"{label:<40} {rate:>14,.0f} publishes/sec {delivered / len(published):>10.1f} subscribers/publish")
+    return rate
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure broker subscription routing throughput.")
+    parser.add_argument("--subscriptions", "-s", type=int, default=5000, help="Subscriptions to register")
+    parser.add_argument("--publishes", "-n", type=int, default=20000, help="Events to route per benchmark")
+    parser.add_argument("--seed", type=int, default=42, help="Seed for the subscription mix")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    types = event_types()
+    linear = LinearRouter()
+    index = SubscriptionIndex()
+    for serial in range(args.subscriptions):
+        pattern = random_pattern(rng, serial)
+        linear.add(pattern, serial)
+        index.add(pattern, serial)
+
+    for event_type in types:
+        if sorted(linear.match(event_type)) != sorted(index.match(event_type)):
+            raise SystemExit(f"routing mismatch for {event_type}")
+    print(f"{args.subscriptions} subscriptions ({index.wildcards} wildcard), {len(types)} event types: routes agree")
+
+    published = [rng.choice(types) for _ in range(args.publishes)]
+    linear_publishes = published[: max(1, args.publishes // 20)]
+    slow = bench("linear scan", linear.match, linear_publishes)
+    fast = bench("SubscriptionIndex", index.match, published)
+    # the first publish of each type walks the trie; later ones hit the memoized route
+    uncached = SubscriptionIndex(max_cached_types=0)
+    for pattern, values in linear.subscribers.items():
+        for value in values:
+            uncached.add(pattern, value)
+    bench("SubscriptionIndex (no route cache)", uncached.match, linear_publishes)
+    print(f"speedup {fast / slow:,.0f}x")
+
+
+if __name__ == "__main__":
+    main()
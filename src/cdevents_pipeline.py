@@ -3,15 +3,22 @@ import json
 import logging
 import uuid
 from abc import ABC, abstractmethod
-from dataclasses import asdict, dataclass
+from dataclasses import dataclass
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Union
+
+from event_dispatch import Delivery, Subscription, drain, fan_out
+from event_history import EventHistory
+from event_routing import SubscriptionIndex
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# compact separators, and no indentation to walk; dumps(indent=2) is for display only
+COMPACT_JSON = json.JSONEncoder(separators=(",", ":"))
+
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class CDEventContext:
     """CDEvents context following the specification"""
 
@@ -25,15 +32,16 @@ class CDEventContext:
     links: Optional[List[Dict[str, Any]]] = None
 
     def __post_init__(self):
+        # frozen, so the defaults are filled in past the generated __setattr__
         if not self.id:
-            self.id = str(uuid.uuid4())
+            object.__setattr__(self, "id", str(uuid.uuid4()))
         if not self.chainId:
-            self.chainId = str(uuid.uuid4())
+            object.__setattr__(self, "chainId", str(uuid.uuid4()))
         if not self.timestamp:
-            self.timestamp = datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+            object.__setattr__(self, "timestamp", datetime.now(timezone.utc).isoformat().replace("+00:00", "Z"))
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class CDEventSubject:
     """CDEvent subject following the specification"""
 
@@ -44,20 +52,82 @@ class CDEventSubject:
 
 
 class CDEvent:
-    """CDEvent wrapper following the specification"""
+    """
+    CDEvent wrapper following the specification.
+
+    The context and subject are frozen, so encode() can cache the compact
+    JSON on first use and brokers, history and HTTP hops serialize an event
+    once. to_dict() shares the subject content and links with the event
+    instead of copying them; those nested values must not be modified after
+    the event is published.
+    """
+
+    __slots__ = ("context", "subject", "_encoded")
 
     def __init__(self, context: CDEventContext, subject: CDEventSubject):
         self.context = context
         self.subject = subject
+        self._encoded: Optional[bytes] = None
 
     def to_dict(self) -> Dict[str, Any]:
         """Convert to CDEvents format"""
-        return {"context": asdict(self.context), "subject": asdict(self.subject)}
+        context, subject = self.context, self.subject
+        return {
+            "context": {
+                "version": context.version,
+                "id": context.id,
+                "chainId": context.chainId,
+                "source": context.source,
+                "type": context.type,
+                "timestamp": context.timestamp,
+                "schemaUri": context.schemaUri,
+                "links": context.links,
+            },
+            "subject": {"id": subject.id, "source": subject.source, "type": subject.type, "content": subject.content},
+        }
 
     def to_json(self) -> str:
         """Convert to JSON string"""
         return json.dumps(self.to_dict(), indent=2)
 
+    def encode(self) -> bytes:
+        """Compact UTF-8 JSON, encoded once and cached"""
+        if self._encoded is None:
+            self._encoded = COMPACT_JSON.encode(self.to_dict()).encode("utf-8")
+        return self._encoded
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "CDEvent":
+        """Build an event from its CDEvents format, sharing nested values with `data`"""
+        return cls(CDEventContext(**data["context"]), CDEventSubject(**data["subject"]))
+
+    @classmethod
+    def from_json(cls, data: Union[str, bytes]) -> "CDEvent":
+        """
+        Decode an event from any JSON. When the input bytes are exactly what
+        encode() would produce they are kept as the cached encoding instead of
+        a copy; use from_record() for bytes known to come from encode()
+        """
+        if isinstance(data, str):
+            return cls.from_dict(json.loads(data))
+        raw = bytes(data)
+        event = cls.from_dict(json.loads(raw))
+        encoded = event.encode()
+        if encoded == raw:
+            event._encoded = raw
+        return event
+
+    @classmethod
+    def from_record(cls, data: bytes) -> "CDEvent":
+        """
+        Decode bytes that encode() produced, such as a log record, keeping
+        them as the cached encoding without checking them again
+        """
+        raw = bytes(data)
+        event = cls.from_dict(json.loads(raw))
+        event._encoded = raw
+        return event
+
 
 class EventBroker(ABC):
     """Abstract event broker interface"""
@@ -70,31 +140,89 @@ class EventBroker(ABC):
     async def subscribe(self, event_types: List[str], callback):
         pass
 
+    async def drain(self):
+        """Wait until subscribers have handled everything published so far; nothing to wait for by default"""
 
-class InMemoryEventBroker(EventBroker):
-    """Simple in-memory event broker for demonstration"""
+    async def close(self):
+        """Release the broker's resources; nothing to release by default"""
 
-    def __init__(self):
-        self.subscribers = {}
-        self.events = []
+    def stats(self) -> List[Dict[str, Any]]:
+        """Per-subscriber delivery counters; none by default"""
+        return []
 
-    async def publish(self, event: CDEvent):
-        """Publish event to all relevant subscribers"""
+
+class InMemoryEventBroker(EventBroker):
+    """
+    Simple in-memory event broker for demonstration.
+
+    With dispatch="inline" publish() awaits every matching callback in turn.
+    With dispatch="queued" each subscriber gets a bounded queue and a worker
+    task, publish() returns once the event is enqueued, and `overflow` picks
+    what happens when a queue is full (see event_dispatch.py).
+
+    The event history keeps the last `history_size` events (and at most
+    `history_bytes` of JSON when set), indexed by chain, type and subject.
+    """
+
+    def __init__(
+        self,
+        dispatch: str = "inline",
+        queue_size: int = 1000,
+        overflow: str = "block",
+        history_size: int = 10000,
+        history_bytes: Optional[int] = None,
+    ):
+        if dispatch not in ("inline", "queued"):
+            raise ValueError(f"dispatch must be inline or queued, not {dispatch!r}")
+        self.dispatch = dispatch
+        self.queue_size = queue_size
+        self.overflow = overflow
+        self.subscribers = SubscriptionIndex()
+        self.subscriptions: List[Subscription] = []
+        self.events = EventHistory(history_size, history_bytes)
+
+    async def publish(self, event: CDEvent, wait: bool = False) -> Optional[Delivery]:
+        """
+        Publish event to all relevant subscribers. In queued dispatch, return
+        a Delivery to await for the subscribers to finish, or wait for them
+        right away with wait=True.
+        """
         logger.info(f"Publishing event: {event.context.type}")
         self.events.append(event)
 
         # Notify subscribers
-        for event_type, callbacks in self.subscribers.items():
-            if event.context.type == event_type or event_type == "*":
-                for callback in callbacks:
-                    await callback(event)
-
-    async def subscribe(self, event_types: List[str], callback):
-        """Subscribe to specific event types"""
+        subscriptions = self.subscribers.match(event.context.type)
+        if self.dispatch == "inline":
+            for subscription in subscriptions:
+                await subscription.callback(event)
+            return None
+        delivery = await fan_out(subscriptions, event)
+        if wait:
+            await delivery
+        return delivery
+
+    async def subscribe(self, event_types: List[str], callback, overflow: Optional[str] = None):
+        """
+        Subscribe to specific event types or patterns such as
+        "dev.cdevents.build.*" (see event_routing.py)
+        """
         for event_type in event_types:
-            if event_type not in self.subscribers:
-                self.subscribers[event_type] = []
-            self.subscribers[event_type].append(callback)
+            subscription = Subscription(event_type, callback, self.queue_size, overflow or self.overflow)
+            self.subscriptions.append(subscription)
+            self.subscribers.add(event_type, subscription)
+
+    async def drain(self):
+        """Wait until queued subscribers have handled everything published so far"""
+        await drain(self.subscriptions)
+
+    async def close(self):
+        """Stop the subscriber workers"""
+        for subscription in self.subscriptions:
+            await subscription.stop()
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """Per-subscriber queue depth, lag and delivery counters"""
+        return [subscription.stats() for subscription in self.subscriptions]
 
 
 class RepositoryService:
@@ -249,8 +377,9 @@ class DeploymentService:
 class PipelineOrchestrator:
     """Main pipeline orchestrator"""
 
-    def __init__(self):
-        self.broker = InMemoryEventBroker()
+    def __init__(self, broker: Optional[EventBroker] = None):
+        # queued dispatch: a slow build does not hold up the publisher or other subscribers
+        self.broker = broker or InMemoryEventBroker(dispatch="queued")
         self.repository_service = RepositoryService(self.broker)
         self.build_service = BuildService(self.broker)
         self.security_service = SecurityScanService(self.broker)
@@ -277,10 +406,16 @@ class PipelineOrchestrator:
         # Simulate code push - this should trigger the entire pipeline
         await self.repository_service.simulate_code_push("https://git.example.com/my-org/my-app", "abc123def456")
 
-        # Wait for pipeline to complete - increased time to allow all async operations
-        await asyncio.sleep(10)
+        # Wait for pipeline to complete: every service has handled every event
+        await self.broker.drain()
+        await self.broker.close()
 
         logger.info("Pipeline simulation completed!")
+        for stats in self.broker.stats():
+            logger.info(
+                f"Subscriber {stats['subscriber']} ({stats['pattern']}): {stats['delivered']} delivered, "
+                f"{stats['max_delay_ms']} ms max queue delay"
+            )
 
         # Print event history
         print("\n--- Event History ---")
@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+# epr_standin.py
+"""
+A lightweight, dependency-free ASGI stand-in for the EPR server.
+
+It implements the REST routes the workshop tools use (/api/v1/events,
+/api/v1/receivers, /api/v1/groups and their GET-by-id routes) plus the subset
+of /api/v1/graphql/query that mcp/main.py generates, including automatic
+persisted queries, backed by indexed in-memory tables. Latency and errors
+can be injected so client throughput and retry behaviour can be benchmarked
+on one machine.
+
+In-process, with no network at all:
+
+    app = EPRStandIn(latency=0.002, error_rate=0.01)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://epr") as client:
+        ...
+
+Over a socket (requires uvicorn):
+
+    python3 epr_standin.py --port 8042 --latency 0.002 --error-rate 0.01
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import random
+import re
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+CROCKFORD = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+
+
+def new_id() -> str:
+    """Generate a ULID-shaped id (48-bit ms timestamp + 80 random bits, Crockford base32)."""
+    value = (int(time.time() * 1000) << 80) | int.from_bytes(os.urandom(10), "big")
+    chars = []
+    for _ in range(26):
+        value, rem = divmod(value, 32)
+        chars.append(CROCKFORD[rem])
+    return "".join(reversed(chars))
+
+
+def get_current_timestamp() -> str:
+    return datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+SCALARS = (str, int, float, bool)
+
+
+def require_object(data: Any, what: str) -> Dict[str, Any]:
+    if not isinstance(data, dict):
+        raise ValueError(f"{what} must be a JSON object")
+    return data
+
+
+class Table:
+    """
+    In-memory rows keyed by id with a hash index per searchable field, so
+    lookups cost O(matches) instead of a scan over every row.
+    """
+
+    def __init__(self, indexed: Iterable[str]):
+        self.rows: Dict[str, Dict[str, Any]] = {}
+        self.indexes: Dict[str, Dict[Any, Set[str]]] = {f: defaultdict(set) for f in indexed}
+
+    def insert(self, row: Dict[str, Any]) -> str:
+        self.rows[row["id"]] = row
+        for field_name, index in self.indexes.items():
+            value = row.get(field_name)
+            if isinstance(value, SCALARS):
+                index[value].add(row["id"])
+        return row["id"]
+
+    def get(self, _id: str) -> Optional[Dict[str, Any]]:
+        return self.rows.get(_id)
+
+    def find(self, criteria: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        criteria = {k: v for k, v in (criteria or {}).items() if v is not None}
+        if "id" in criteria:
+            _id = criteria.pop("id")
+            row = self.rows.get(_id) if isinstance(_id, str) else None
+            candidates = [row] if row is not None else []
+        else:
+            # only scalar values are indexed (and hashable); others are left to the filter below
+            sets = [
+                self.indexes[k].get(v, set())
+                for k, v in criteria.items()
+                if k in self.indexes and isinstance(v, SCALARS)
+            ]
+            if sets:
+                ids = set.intersection(*sorted(sets, key=len))
+                candidates = [self.rows[_id] for _id in ids]
+            else:
+                candidates = list(self.rows.values())
+        # fields without an index are filtered after the indexed narrowing
+        return [row for row in candidates if all(row.get(k) == v for k, v in criteria.items())]
+
+
+class Store:
+    """The three EPR tables."""
+
+    def __init__(self):
+        self.events = Table(
+            ["name", "version", "release", "platform_id", "package", "success", "event_receiver_id"]
+        )
+        self.receivers = Table(["name", "version", "type"])
+        self.groups = Table(["name", "version", "type"])
+
+    def create_event(self, data: Dict[str, Any]) -> str:
+        evr_id = require_object(data, "event").get("event_receiver_id")
+        if not isinstance(evr_id, str) or self.receivers.get(evr_id) is None:
+            raise ValueError(f"event receiver {evr_id} does not exist")
+        row = dict(data, id=new_id(), created_at=get_current_timestamp())
+        return self.events.insert(row)
+
+    def create_receiver(self, data: Dict[str, Any]) -> str:
+        row = dict(require_object(data, "event receiver"), id=new_id(), created_at=get_current_timestamp())
+        return self.receivers.insert(row)
+
+    def create_group(self, data: Dict[str, Any]) -> str:
+        evr_ids = require_object(data, "event receiver group").get("event_receiver_ids") or []
+        if not isinstance(evr_ids, list):
+            raise ValueError("event_receiver_ids must be a list")
+        for evr_id in evr_ids:
+            if not isinstance(evr_id, str) or self.receivers.get(evr_id) is None:
+                raise ValueError(f"event receiver {evr_id} does not exist")
+        row = dict(data, id=new_id(), created_at=get_current_timestamp(), updated_at=get_current_timestamp())
+        return self.groups.insert(row)
+
+
+GRAPHQL_RE = re.compile(r"^\s*(?P<kind>query|mutation)?\s*(?:\([^)]*\))?\s*\{(?P<body>.*)\}\s*$", re.S)
+GRAPHQL_FIELD_RE = re.compile(
+    r"(?:(?P<alias>\w+)\s*:\s*)?(?P<field>\w+)\s*(?:\((?P<args>[^)]*)\))?\s*(?:\{(?P<selection>[^}]*)\})?",
+    re.S,
+)
+GRAPHQL_ARG_RE = re.compile(r"(\w+)\s*:\s*(\$\w+|\"[^\"]*\")")
+
+
+class EPRStandIn:
+    """
+    ASGI application emulating the EPR REST and GraphQL API.
+
+    latency/jitter are seconds added to every request, error_rate is the
+    fraction of requests answered with 503 (with a Retry-After header when
+    retry_after is set).
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        retry_after: Optional[float] = None,
+        seed: Optional[int] = None,
+    ):
+        self.store = Store()
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.retry_after = retry_after
+        self.rng = random.Random(seed)
+        self.requests = 0
+        self.injected_errors = 0
+        # automatic persisted queries: sha256 -> query text
+        self.persisted: Dict[str, str] = {}
+        self.tables = {
+            "events": (self.store.events, self.store.create_event),
+            "receivers": (self.store.receivers, self.store.create_receiver),
+            "groups": (self.store.groups, self.store.create_group),
+        }
+        self.graphql_tables = {
+            "events": self.store.events,
+            "event_receivers": self.store.receivers,
+            "event_receiver_groups": self.store.groups,
+        }
+        self.graphql_mutations = {
+            "create_event": self.store.create_event,
+            "create_event_receiver": self.store.create_receiver,
+            "create_event_receiver_group": self.store.create_group,
+        }
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            while True:
+                message = await receive()
+                if message["type"] == "lifespan.startup":
+                    await send({"type": "lifespan.startup.complete"})
+                elif message["type"] == "lifespan.shutdown":
+                    await send({"type": "lifespan.shutdown.complete"})
+                    return
+        if scope["type"] != "http":
+            return
+
+        body = b""
+        more = True
+        while more:
+            message = await receive()
+            body += message.get("body", b"")
+            more = message.get("more_body", False)
+
+        self.requests += 1
+        delay = self.latency + (self.rng.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        headers: List[Tuple[bytes, bytes]] = []
+        if self.error_rate and self.rng.random() < self.error_rate:
+            self.injected_errors += 1
+            if self.retry_after is not None:
+                headers.append((b"retry-after", str(self.retry_after).encode()))
+            status, payload = 503, {"errors": ["injected failure"]}
+        else:
+            try:
+                status, payload = self.route(scope["method"], scope["path"], body)
+            except ValueError as e:
+                status, payload = 400, {"errors": [str(e)]}
+
+        data = json.dumps(payload).encode("utf-8")
+        headers += [(b"content-type", b"application/json"), (b"content-length", str(len(data)).encode())]
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": data})
+
+    def route(self, method: str, path: str, body: bytes) -> Tuple[int, Any]:
+        parts = path.strip("/").split("/")
+        if parts[:2] != ["api", "v1"] or len(parts) < 3:
+            return 404, {"errors": [f"no route for {path}"]}
+        if parts[2] == "graphql" and parts[3:] == ["query"] and method == "POST":
+            return self.graphql(json.loads(body or b"{}"))
+        if parts[2] not in self.tables:
+            return 404, {"errors": [f"no route for {path}"]}
+        table, create = self.tables[parts[2]]
+        if method == "POST" and len(parts) == 3:
+            return 201, {"data": create(json.loads(body or b"{}"))}
+        if method == "GET" and len(parts) == 4:
+            row = table.get(parts[3])
+            if row is None:
+                return 404, {"errors": [f"{parts[2]} {parts[3]} not found"]}
+            return 200, {"data": [row]}
+        return 405, {"errors": [f"{method} not allowed on {path}"]}
+
+    def persisted_query(self, request: Dict[str, Any]) -> Optional[str]:
+        """Resolve or register an automatic persisted query (APQ); None if the hash is unknown."""
+        query = request.get("query")
+        if query is not None and not isinstance(query, str):
+            raise ValueError("query must be a string")
+        persisted = require_object(request.get("extensions") or {}, "extensions").get("persistedQuery")
+        if not persisted:
+            return query or ""
+        digest = require_object(persisted, "persistedQuery").get("sha256Hash", "")
+        if not isinstance(digest, str):
+            raise ValueError("sha256Hash must be a string")
+        if query is None:
+            return self.persisted.get(digest)
+        if hashlib.sha256(query.encode("utf-8")).hexdigest() != digest:
+            raise ValueError("provided sha does not match query")
+        self.persisted[digest] = query
+        return query
+
+    def graphql(self, request: Any) -> Tuple[int, Any]:
+        """
+        Answer a GraphQL request. Malformed requests and arguments get a
+        GraphQL {"errors": [{"message": ...}]} response rather than a 500.
+        """
+        try:
+            require_object(request, "GraphQL request")
+            query = self.persisted_query(request)
+            variables = require_object(request.get("variables") or {}, "variables")
+        except ValueError as e:
+            return 400, {"errors": [{"message": str(e)}]}
+        if query is None:
+            error = {"message": "PersistedQueryNotFound", "extensions": {"code": "PERSISTED_QUERY_NOT_FOUND"}}
+            return 200, {"errors": [error]}
+        match = GRAPHQL_RE.match(query)
+        fields = list(GRAPHQL_FIELD_RE.finditer(match.group("body"))) if match is not None else []
+        if not fields:
+            return 422, {"errors": [{"message": "query not supported by the EPR stand-in"}]}
+        data = {}
+        for field in fields:
+            args = {}
+            for name, value in GRAPHQL_ARG_RE.findall(field.group("args") or ""):
+                args[name] = variables.get(value[1:]) if value.startswith("$") else value.strip('"')
+            root = field.group("field")
+            selection = [f for f in re.split(r"[\s,]+", field.group("selection") or "") if f]
+            try:
+                result = self.graphql_field(match.group("kind"), root, args, selection)
+            except KeyError:
+                return 422, {"errors": [{"message": f"unknown operation {root}"}]}
+            except ValueError as e:
+                return 200, {"errors": [{"message": str(e), "path": [field.group("alias") or root]}]}
+            data[field.group("alias") or root] = result
+        return 200, {"data": data}
+
+    def graphql_field(self, kind: Optional[str], root: str, args: Dict[str, Any], selection: List[str]) -> Any:
+        """Resolve one (possibly aliased) root field of a query or mutation."""
+        if kind == "mutation":
+            obj = next(iter(args.values()), None) or {}
+            return self.graphql_mutations[root](obj)
+        if root.endswith("_by_id"):
+            rows = self.graphql_tables[root[: -len("_by_id")]].find({"id": args.get("id")})
+        else:
+            criteria = next(iter(args.values()), None)
+            if criteria is not None:
+                require_object(criteria, f"{root} argument")
+            rows = self.graphql_tables[root].find(criteria)
+        if selection:
+            rows = [{f: row.get(f) for f in selection} for row in rows]
+        return rows
+
+
+def main() -> None:
+    """
+    Serve the EPR stand-in over HTTP.
+    """
+    parser = argparse.ArgumentParser(description="Run an in-memory EPR stand-in server for offline benchmarking.")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to bind")
+    parser.add_argument("--port", "-p", type=int, default=8042, help="Port to bind")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds of latency added to every request")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Extra random latency, up to this many seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 503")
+    parser.add_argument("--retry-after", type=float, default=None, help="Retry-After seconds sent with injected 503s")
+    parser.add_argument("--seed", type=int, default=None, help="Seed for latency jitter and error injection")
+    args = parser.parse_args()
+
+    try:
+        import uvicorn
+    except ImportError:
+        raise SystemExit("uvicorn is required to serve over a socket; use httpx.ASGITransport for in-process use")
+
+    app = EPRStandIn(
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        retry_after=args.retry_after,
+        seed=args.seed,
+    )
+    logger.info(f"EPR stand-in listening on http://{args.host}:{args.port}")
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+# event_dispatch.py
+"""
+Queued fan-out for the in-memory brokers.
+
+In queued dispatch every subscription owns a bounded asyncio.Queue drained
+by its own worker task, so publish() only enqueues and a slow subscriber
+delays nobody but itself. When a queue is full the subscription's overflow
+policy decides what happens:
+
+    block        publish() waits for room (backpressure on the publisher)
+    drop-oldest  the oldest queued event is discarded for that subscriber
+    error        publish() raises SubscriberOverflow
+
+publish() returns a Delivery that can be awaited when the publisher needs
+to know its event was handled; it resolves to the number of subscribers
+that processed the event without raising. A subscriber must not await the
+delivery of an event routed to itself, since its own worker is the one
+running it.
+
+Stopping a subscription drops whatever is still queued for it, and anything
+published to it afterwards: those deliveries resolve without counting it.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+OVERFLOW_POLICIES = ("block", "drop-oldest", "error")
+
+
+class SubscriberOverflow(Exception):
+    """Raised by publish() when a subscriber with the "error" policy has a full queue."""
+
+
+class Delivery:
+    """Tracks one published event until every matched subscriber is done with it."""
+
+    __slots__ = ("pending", "handled", "future")
+
+    def __init__(self, pending: int):
+        self.pending = pending
+        self.handled = 0
+        self.future = asyncio.get_running_loop().create_future()
+        if not pending:
+            self.future.set_result(0)
+
+    def done(self, handled: bool) -> None:
+        self.handled += handled
+        self.pending -= 1
+        if not self.pending and not self.future.done():
+            self.future.set_result(self.handled)
+
+    def __await__(self):
+        return self.future.__await__()
+
+
+class Subscription:
+    """
+    One subscriber: its pattern and callback, plus the queue and worker task
+    used in queued dispatch.
+    """
+
+    def __init__(
+        self,
+        pattern: str,
+        callback: Callable[[Any], Awaitable[Any]],
+        maxsize: int = 1000,
+        overflow: str = "block",
+    ):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"overflow must be one of {', '.join(OVERFLOW_POLICIES)}, not {overflow!r}")
+        self.pattern = pattern
+        self.callback = callback
+        self.name = getattr(callback, "__qualname__", repr(callback))
+        self.overflow = overflow
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize)
+        self.worker: Optional[asyncio.Task] = None
+        self.closed = False
+        self.enqueued = 0
+        self.delivered = 0
+        self.dropped = 0
+        self.failed = 0
+        self.last_delay = 0.0
+        self.max_delay = 0.0
+
+    def start(self) -> None:
+        if not self.closed and (self.worker is None or self.worker.done()):
+            self.worker = asyncio.get_running_loop().create_task(self._run(), name=f"subscriber {self.name}")
+
+    async def put(self, event: Any, delivery: Delivery) -> None:
+        item = (time.monotonic(), event, delivery)
+        if self.closed:
+            self.dropped += 1
+            delivery.done(False)
+            return
+        if self.queue.full():
+            if self.overflow == "error":
+                delivery.done(False)
+                raise SubscriberOverflow(f"queue for {self.name} on {self.pattern!r} is full ({self.queue.maxsize})")
+            if self.overflow == "drop-oldest":
+                _, _, dropped = self.queue.get_nowait()
+                self.queue.task_done()
+                self.dropped += 1
+                dropped.done(False)
+        self.enqueued += 1
+        await self.queue.put(item)
+        if self.closed:
+            # stopped while this publisher waited for room: nobody will handle it
+            self._discard_queued()
+
+    async def _run(self) -> None:
+        while True:
+            enqueued_at, event, delivery = await self.queue.get()
+            self.last_delay = time.monotonic() - enqueued_at
+            self.max_delay = max(self.max_delay, self.last_delay)
+            handled = False
+            try:
+                await self.callback(event)
+                handled = True
+            except Exception:
+                self.failed += 1
+                logger.exception(f"Subscriber {self.name} failed handling an event for {self.pattern!r}")
+            finally:
+                self.delivered += 1
+                delivery.done(handled)
+                self.queue.task_done()
+
+    @property
+    def lag(self) -> int:
+        """Events accepted but not finished yet, including the one being handled."""
+        return self.enqueued - self.delivered - self.dropped
+
+    async def stop(self) -> None:
+        """Cancel the worker and resolve the deliveries of events it will never handle."""
+        self.closed = True
+        if self.worker is not None:
+            self.worker.cancel()
+            try:
+                await self.worker
+            except asyncio.CancelledError:
+                pass
+            self.worker = None
+        self._discard_queued()
+
+    def _discard_queued(self) -> None:
+        while not self.queue.empty():
+            _, _, delivery = self.queue.get_nowait()
+            self.queue.task_done()
+            self.dropped += 1
+            delivery.done(False)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pattern": self.pattern,
+            "subscriber": self.name,
+            "overflow": self.overflow,
+            "depth": self.queue.qsize(),
+            "lag": self.lag,
+            "last_delay_ms": round(self.last_delay * 1000, 3),
+            "max_delay_ms": round(self.max_delay * 1000, 3),
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+            "failed": self.failed,
+        }
+
+
+async def fan_out(subscriptions: List[Subscription], event: Any) -> Delivery:
+    """Enqueue `event` for every subscription and return its Delivery."""
+    delivery = Delivery(len(subscriptions))
+    for reached, subscription in enumerate(subscriptions):
+        subscription.start()
+        try:
+            await subscription.put(event, delivery)
+        except SubscriberOverflow:
+            # the rest never see the event, so the delivery must not wait for them
+            for _ in subscriptions[reached + 1 :]:
+                delivery.done(False)
+            raise
+    return delivery
+
+
+async def drain(subscriptions: List[Subscription]) -> None:
+    """
+    Wait until every queue is empty and idle. Handlers may publish follow-up
+    events while we wait, so keep going until a pass finds nothing left.
+    """
+    while any(s.lag for s in subscriptions):
+        await asyncio.gather(*(s.queue.join() for s in subscriptions))
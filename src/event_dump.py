@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# event_dump.py
+"""
+Compact bulk storage for generated events: one newline-delimited JSON (NDJSON)
+file, optionally gzip- or zstd-compressed, written with buffered I/O and read
+back lazily.
+
+zstd support needs the optional `zstandard` package.
+"""
+
+import gzip
+import io
+import json
+import mmap
+import os
+from typing import Any, Dict, Iterator, List, Optional
+
+COMPRESSIONS = ("none", "gzip", "zstd")
+SUFFIXES = {"none": "", "gzip": ".gz", "zstd": ".zst"}
+
+
+def detect_compression(path: str) -> str:
+    """Guess the compression of a dump from its file suffix."""
+    if path.endswith(".gz"):
+        return "gzip"
+    if path.endswith(".zst"):
+        return "zstd"
+    return "none"
+
+
+def _zstandard():
+    try:
+        import zstandard
+    except ImportError:
+        raise SystemExit("zstd compression requires the zstandard package: pip install zstandard")
+    return zstandard
+
+
+class NDJSONWriter:
+    """
+    Buffered NDJSON writer. Events are encoded compactly, collected in memory
+    and handed to the (possibly compressing) file in large chunks.
+    """
+
+    def __init__(self, path: str, compression: Optional[str] = None, buffer_size: int = 1 << 20):
+        self.path = path
+        self.compression = compression or detect_compression(path)
+        if self.compression not in COMPRESSIONS:
+            raise ValueError(f"unsupported compression {self.compression}, expected one of {COMPRESSIONS}")
+        self.buffer_size = buffer_size
+        self.count = 0
+        self._raw = open(path, "wb")
+        if self.compression == "gzip":
+            # no name or mtime in the header, so identical events give identical files
+            self._fh = gzip.GzipFile(filename="", fileobj=self._raw, mode="wb", compresslevel=6, mtime=0)
+        elif self.compression == "zstd":
+            self._fh = _zstandard().ZstdCompressor().stream_writer(self._raw, closefd=False)
+        else:
+            self._fh = self._raw
+        self._chunks: List[bytes] = []
+        self._buffered = 0
+
+    def write(self, event: Dict[str, Any]) -> None:
+        line = json.dumps(event, separators=(",", ":"), ensure_ascii=False).encode("utf-8") + b"\n"
+        self._chunks.append(line)
+        self._buffered += len(line)
+        self.count += 1
+        if self._buffered >= self.buffer_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if self._chunks:
+            self._fh.write(b"".join(self._chunks))
+            self._chunks = []
+            self._buffered = 0
+
+    def close(self) -> None:
+        self.flush()
+        if self._fh is not self._raw:
+            self._fh.close()
+        self._raw.close()
+
+    def __enter__(self) -> "NDJSONWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def iter_ndjson(path: str, compression: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Lazily yield the events of an NDJSON dump. Uncompressed files are memory
+    mapped so only the pages being parsed are resident.
+    """
+    compression = compression or detect_compression(path)
+    if compression == "none":
+        if os.path.getsize(path) == 0:
+            return
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for line in iter(mm.readline, b""):
+                if line.strip():
+                    yield json.loads(line)
+        return
+    if compression == "gzip":
+        stream = gzip.open(path, "rb")
+    elif compression == "zstd":
+        raw = open(path, "rb")
+        stream = io.BufferedReader(_zstandard().ZstdDecompressor().stream_reader(raw, closefd=True))
+    else:
+        raise ValueError(f"unsupported compression {compression}, expected one of {COMPRESSIONS}")
+    with stream:
+        for line in stream:
+            if line.strip():
+                yield json.loads(line)
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# event_history.py
+"""
+Bounded, indexed event history for InMemoryEventBroker.
+
+Events live in a fixed-size ring buffer capped at `max_events` and,
+optionally, `max_bytes` of compact JSON. When the buffer is full the oldest
+events are evicted. Every event gets a sequence number that also names its
+ring slot, and the secondary indexes on context.chainId, context.type and
+subject.id are lists of those numbers in publish order, so "all events for
+this chain" costs O(result). Evicted numbers are trimmed from the front of a
+list once they make up half of it, and a key is dropped when its last event
+is evicted.
+"""
+
+from bisect import bisect_left
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+
+def event_size(event: Any) -> int:
+    """Bytes of the event's compact JSON encoding, which CDEvent caches."""
+    return len(event.encode())
+
+
+def parse_timestamp(ts: str) -> Optional[float]:
+    """Convert a CDEvents ISO-8601 timestamp to epoch seconds, or None when it does not parse."""
+    try:
+        return datetime.fromisoformat(ts.replace("Z", "+00:00")).timestamp()
+    except (AttributeError, ValueError):
+        return None
+
+
+class EventHistory:
+    """
+    Ring buffer of published events, oldest first. Iterating it, or a
+    between() range, walks the buffer in place rather than copying it.
+    """
+
+    def __init__(
+        self,
+        max_events: int = 10000,
+        max_bytes: Optional[int] = None,
+        sizeof: Callable[[Any], int] = event_size,
+    ):
+        if max_events < 1:
+            raise ValueError("max_events must be at least 1")
+        self.max_events = max_events
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        # slot -> (time, size, event); time is context.timestamp clamped to be non-decreasing
+        self._ring: List[Optional[tuple]] = [None] * max_events
+        self._head = 0
+        self._count = 0
+        # sequence number of the next event; event `seq` lives in slot seq % max_events
+        self._seq = 0
+        self.bytes = 0
+        self.evicted = 0
+        self.by_chain_id: Dict[str, List[int]] = {}
+        self.by_type: Dict[str, List[int]] = {}
+        self.by_subject_id: Dict[str, List[int]] = {}
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __iter__(self) -> Iterator[Any]:
+        for position in range(self._count):
+            yield self._slot(position)[2]
+
+    def _slot(self, position: int) -> tuple:
+        return self._ring[(self._head + position) % self.max_events]
+
+    def _keys(self, event: Any):
+        return (
+            (self.by_chain_id, event.context.chainId),
+            (self.by_type, event.context.type),
+            (self.by_subject_id, event.subject.id),
+        )
+
+    def append(self, event: Any) -> None:
+        size = self.sizeof(event) if self.max_bytes is not None else 0
+        newest = self._slot(self._count - 1)[0] if self._count else float("-inf")
+        when = parse_timestamp(event.context.timestamp)
+        when = newest if when is None or when < newest else when
+        if self._count == self.max_events:
+            self._evict()
+        if self.max_bytes is not None:
+            while self._count and self.bytes + size > self.max_bytes:
+                self._evict()
+        seq = self._seq
+        self._ring[seq % self.max_events] = (when, size, event)
+        self._seq += 1
+        self._count += 1
+        self.bytes += size
+        for index, key in self._keys(event):
+            seqs = index.get(key)
+            if seqs is None:
+                index[key] = [seq]
+            else:
+                seqs.append(seq)
+
+    def _evict(self) -> None:
+        seq = self._seq - self._count
+        _, size, event = self._ring[self._head]
+        self._ring[self._head] = None
+        self._head = (self._head + 1) % self.max_events
+        self._count -= 1
+        self.bytes -= size
+        self.evicted += 1
+        # everything before the evicted event in its index entries was evicted earlier
+        for index, key in self._keys(event):
+            seqs = index[key]
+            if seqs[-1] == seq:
+                del index[key]
+                continue
+            dead = bisect_left(seqs, seq) + 1
+            if dead * 2 >= len(seqs):
+                del seqs[:dead]
+
+    def _lookup(self, index: Dict[str, List[int]], key: str) -> List[Any]:
+        seqs = index.get(key)
+        if seqs is None:
+            return []
+        ring, size = self._ring, self.max_events
+        return [ring[seq % size][2] for seq in seqs[bisect_left(seqs, self._seq - self._count) :]]
+
+    def chain(self, chain_id: str) -> List[Any]:
+        """Events with this context.chainId, oldest first."""
+        return self._lookup(self.by_chain_id, chain_id)
+
+    def of_type(self, event_type: str) -> List[Any]:
+        """Events with this context.type, oldest first."""
+        return self._lookup(self.by_type, event_type)
+
+    def for_subject(self, subject_id: str) -> List[Any]:
+        """Events with this subject.id, oldest first."""
+        return self._lookup(self.by_subject_id, subject_id)
+
+    def between(self, start: Optional[str] = None, end: Optional[str] = None) -> Iterator[Any]:
+        """
+        Events with start <= context.timestamp < end (ISO-8601; either bound
+        may be omitted), found by binary search. An event published with a
+        timestamp older than its predecessor's is filed at its predecessor's.
+        """
+        low = 0 if start is None else self._bisect(parse_timestamp(start))
+        high = self._count if end is None else self._bisect(parse_timestamp(end))
+        for position in range(low, high):
+            yield self._slot(position)[2]
+
+    def _bisect(self, when: Optional[float]) -> int:
+        if when is None:
+            raise ValueError("time range bounds must be ISO-8601 timestamps")
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            if self._slot(middle)[0] < when:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "events": self._count,
+            "max_events": self.max_events,
+            "bytes": self.bytes if self.max_bytes is not None else None,
+            "max_bytes": self.max_bytes,
+            "evicted": self.evicted,
+            "chains": len(self.by_chain_id),
+            "types": len(self.by_type),
+        }
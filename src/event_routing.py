@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# event_routing.py
+"""
+Subscription routing index for the in-memory brokers.
+
+A CDEvents type such as `dev.cdevents.build.finished.0.2.0` is split into its
+dotted name segments plus the version as one final segment. A subscription
+pattern matches a type when its segments match all of the type's segments,
+or all of them but the version:
+
+    dev.cdevents.build.finished.0.2.0   exactly that type and version
+    dev.cdevents.build.finished         build.finished, any version
+    dev.cdevents.build.*                every build event, any version
+    dev.cdevents.*.finished.*           every finished event, any version
+    *                                   every event
+
+`*` stands for exactly one segment. Patterns without a wildcard live in a
+hash map, wildcard patterns in a segment trie, and the matches for a type
+are memoized until the subscriptions change, so a publish costs one dict
+lookup once a type has been seen and O(depth) the first time.
+"""
+
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+WILDCARD = "*"
+VERSION_RE = re.compile(r"^(.*)\.(\d+\.\d+\.\d+(?:[-+][0-9A-Za-z.-]+)?)$")
+
+
+def split_type(event_type: str) -> Tuple[List[str], Optional[str]]:
+    """Split a dotted type or pattern into its name segments and version (None when it has none)."""
+    if event_type == WILDCARD:
+        return [], None
+    match = VERSION_RE.match(event_type)
+    if match:
+        return match.group(1).split("."), match.group(2)
+    return event_type.split("."), None
+
+
+class _Node:
+    __slots__ = ("children", "entries")
+
+    def __init__(self):
+        self.children: Dict[str, "_Node"] = {}
+        self.entries: List[Tuple[int, Any]] = []
+
+
+class SubscriptionIndex:
+    """
+    Maps subscription patterns to values (callbacks or subscriptions) and
+    returns the values whose pattern matches an event type, in the order
+    they were added.
+    """
+
+    def __init__(self, max_cached_types: int = 4096):
+        self.exact: Dict[str, List[Tuple[int, Any]]] = {}
+        self.everything: List[Tuple[int, Any]] = []
+        self.trie = _Node()
+        self.wildcards = 0
+        self.max_cached_types = max_cached_types
+        self._routes: Dict[str, List[Any]] = {}
+        self._seq = 0
+
+    def __len__(self) -> int:
+        return self._seq
+
+    def add(self, pattern: str, value: Any) -> None:
+        entry = (self._seq, value)
+        self._seq += 1
+        self._routes.clear()
+        if pattern == WILDCARD:
+            self.everything.append(entry)
+            return
+        names, version = split_type(pattern)
+        segments = names + ([version] if version else [])
+        if WILDCARD not in segments:
+            self.exact.setdefault(pattern, []).append(entry)
+            return
+        node = self.trie
+        for segment in segments:
+            node = node.children.setdefault(segment, _Node())
+        node.entries.append(entry)
+        self.wildcards += 1
+
+    def match(self, event_type: str) -> List[Any]:
+        """Values subscribed to `event_type`, directly or through a pattern."""
+        route = self._routes.get(event_type)
+        if route is None:
+            route = self._resolve(event_type)
+            if self.max_cached_types > 0:
+                if len(self._routes) >= self.max_cached_types:
+                    self._routes.clear()
+                self._routes[event_type] = route
+        return route
+
+    def _resolve(self, event_type: str) -> List[Any]:
+        names, version = split_type(event_type)
+        found = list(self.everything)
+        found += self.exact.get(event_type, ())
+        if version:
+            # version-agnostic subscriptions are keyed by the type without its version
+            found += self.exact.get(".".join(names), ())
+        if self.wildcards:
+            nodes = [self.trie]
+            for segment in names:
+                nodes = [
+                    child
+                    for node in nodes
+                    for child in (node.children.get(segment), node.children.get(WILDCARD))
+                    if child is not None
+                ]
+                if not nodes:
+                    break
+            for node in nodes:
+                found += node.entries
+                if version:
+                    for child in (node.children.get(version), node.children.get(WILDCARD)):
+                        if child is not None:
+                            found += child.entries
+        found.sort(key=lambda entry: entry[0])
+        return [value for _, value in found]
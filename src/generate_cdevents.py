@@ -4,7 +4,7 @@ import argparse
 import json
 import shlex
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 import httpx
 import ulid
@@ -29,6 +29,118 @@ def gen_sha(seed: str) -> str:
     return h.hexdigest()
 
 
+# Subject templates: one builder per event type, looked up once per run instead
+# of substring-matching the type for every event. Each builder receives the
+# per-service values (computed once per service) and only fills in what varies.
+# The CDViz workshop (10.5-epr-cdviz) copies this script on its own into a work
+# directory, so it keeps its own table instead of importing generate_epr_events.
+def pipeline_run_subject(c: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": c["subject_base_id"],
+        "type": "pipelineRun",
+        "content": {"pipelineName": c["pipeline_name"], "url": c["pipeline_url"]},
+    }
+
+
+def pipeline_run_finished_subject(c: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": c["subject_base_id"],
+        "type": "pipelineRun",
+        "content": {"pipelineName": c["pipeline_name"], "url": c["pipeline_url"], "outcome": "pass"},
+    }
+
+
+def artifact_packaged_subject(c: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": c["subject_base_id"],
+        "type": "artifact",
+        "content": {
+            "change": {"id": c["artifact_id"], "source": c["git_url"]},
+            "sbom": {"uri": c["sbom_uri"]},
+        },
+    }
+
+
+def artifact_published_subject(c: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": c["subject_base_id"],
+        "type": "artifact",
+        "content": {"sbom": {"uri": c["sbom_uri"]}, "user": "robot"},
+    }
+
+
+def build_subject(c: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": c["subject_base_id"],
+        "type": "build",
+        "content": {"artifactId": c["artifact_id"]},
+    }
+
+
+def test_suite_run_subject(c: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": c["subject_base_id"],
+        "type": "testSuiteRun",
+        "content": {
+            "environment": {"id": c["env_id"], "source": c["source"]},
+            "outcome": c["outcome"],
+            "testSuite": {"id": generate_ulid(), "version": "1.0", "name": c["test_suite_name"]},
+        },
+    }
+
+
+def environment_subject(c: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": c["env_id"],
+        "type": "environment",
+        "content": {"name": c["env_name"], "url": c["env_url"]},
+    }
+
+
+def service_subject(c: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": c["subject_base_id"],
+        "type": "service",
+        "content": {"environment": {"id": c["env_id"], "source": c["source"]}, "artifactId": c["artifact_id"]},
+    }
+
+
+SUBJECT_TEMPLATES: Dict[str, Callable[[Dict[str, Any]], Dict[str, Any]]] = {
+    "dev.cdevents.pipelinerun.started.0.2.0": pipeline_run_subject,
+    "dev.cdevents.pipelinerun.queued.0.2.0": pipeline_run_subject,
+    "dev.cdevents.artifact.packaged.0.2.0": artifact_packaged_subject,
+    "dev.cdevents.artifact.published.0.2.0": artifact_published_subject,
+    "dev.cdevents.build.finished.0.2.0": build_subject,
+    "dev.cdevents.testsuiterun.finished.0.2.0": test_suite_run_subject,
+    "dev.cdevents.environment.created.0.2.0": environment_subject,
+    "dev.cdevents.service.deployed.0.2.0": service_subject,
+    "dev.cdevents.pipelinerun.finished.0.2.0": pipeline_run_finished_subject,
+}
+
+
+def service_values(idx: int, name: str) -> Dict[str, Any]:
+    """Compute the values shared by every event of one service."""
+    chain_id = generate_ulid()
+    env_id = f"cluster/0{idx}"
+    sha = gen_sha(f"{name}-{env_id}")
+    subject_base_id = f"{name}-{generate_ulid()[:8]}"
+    return dict(
+        chain_id=chain_id,
+        env_id=env_id,
+        artifact_id=f"pkg:oci/{name}@sha256:{sha}",
+        subject_base_id=subject_base_id,
+        source=f"urn:generator:{name}",
+        sbom_uri=f"https://sbom.repo/{name}/{generate_ulid()}.spdx",
+        git_url=f"https://git.example/{name}.git",
+        pipeline_name=f"pipeline-{subject_base_id}",
+        pipeline_url=f"https://pipelines.example/run/{subject_base_id}",
+        env_name=f"{name}-env-0{idx}",
+        env_url=f"https://{name}-env-0{idx}.example.com",
+        outcome="pass" if idx % 2 == 1 else "fail",
+        test_suite_name=f"{name} integration tests",
+    )
+
+
 # Generate a series of CDEvents for different services and event types
 def generate_events() -> List[Dict[str, Any]]:
     """
@@ -38,133 +150,19 @@ def generate_events() -> List[Dict[str, Any]]:
     """
     events: List[Dict[str, Any]] = []
     names = ["foo", "bar", "baz", "qux"]
-    types = [
-        "dev.cdevents.pipelinerun.started.0.2.0",
-        "dev.cdevents.pipelinerun.queued.0.2.0",
-        "dev.cdevents.artifact.packaged.0.2.0",
-        "dev.cdevents.artifact.published.0.2.0",
-        "dev.cdevents.build.finished.0.2.0",
-        "dev.cdevents.testsuiterun.finished.0.2.0",
-        "dev.cdevents.environment.created.0.2.0",
-        "dev.cdevents.service.deployed.0.2.0",
-        "dev.cdevents.pipelinerun.finished.0.2.0",
-    ]
 
     for idx, name in enumerate(names, start=1):
-        chain_id = generate_ulid()
-        env_id = f"cluster/0{idx}"
-        sha = gen_sha(f"{name}-{env_id}")
-        artifact_id = f"pkg:oci/{name}@sha256:{sha}"
-        subject_base_id = f"{name}-{generate_ulid()[:8]}"
-        source = f"urn:generator:{name}"
-        sbom_uri = f"https://sbom.repo/{name}/{generate_ulid()}.spdx"
-        for event_type in types:
-            ev_id = generate_ulid()
-            ts = get_current_timestamp()
-            subject_type = event_type.split(".")[2].strip()
-            if subject_type == "testsuiterun":
-                subject_type = "testSuiteRun"
-
+        c = service_values(idx, name)
+        for event_type, template in SUBJECT_TEMPLATES.items():
             context = {
                 "version": "0.4.1",
-                "id": ev_id,
-                "chainId": chain_id,
-                "source": source,
+                "id": generate_ulid(),
+                "chainId": c["chain_id"],
+                "source": c["source"],
                 "type": event_type,
-                "timestamp": ts,
+                "timestamp": get_current_timestamp(),
             }
-
-            # Build subject content by event/subject type
-            if "pipelinerun.started" in event_type or "pipelinerun.queued" in event_type:
-                subject = {
-                    "id": subject_base_id,
-                    "type": "pipelineRun",
-                    "content": {
-                        "pipelineName": f"pipeline-{subject_base_id}",
-                        "url": f"https://pipelines.example/run/{subject_base_id}",
-                    },
-                }
-            elif "pipelinerun.finished" in event_type:
-                subject = {
-                    "id": subject_base_id,
-                    "type": "pipelineRun",
-                    "content": {
-                        "pipelineName": f"pipeline-{subject_base_id}",
-                        "url": f"https://pipelines.example/run/{subject_base_id}",
-                        "outcome": "pass",
-                    },
-                }
-            elif "artifact.packaged" in event_type:
-                # artifact events (packaged / published)
-                subject = {
-                    "id": subject_base_id,
-                    "type": "artifact",
-                    "content": {
-                        "change": {
-                            "id": artifact_id,
-                            "source": f"https://git.example/{name}.git",
-                        },
-                        "sbom": {
-                            "uri": sbom_uri,
-                        },
-                    },
-                }
-            elif "artifact.published" in event_type:
-                # artifact events (packaged / published)
-                subject = {
-                    "id": subject_base_id,
-                    "type": "artifact",
-                    "content": {
-                        "sbom": {
-                            "uri": sbom_uri,
-                        },
-                        "user": "robot",
-                    },
-                }
-            elif "build" in event_type:
-                subject = {
-                    "id": subject_base_id,
-                    "type": "build",
-                    "content": {
-                        "artifactId": artifact_id,
-                    },
-                }
-            elif "testsuiterun" in event_type:
-                subject = {
-                    "id": subject_base_id,
-                    "type": "testSuiteRun",
-                    "content": {
-                        "environment": {"id": env_id, "source": source},
-                        "outcome": "pass" if idx % 2 == 1 else "fail",
-                        "testSuite": {
-                            "id": generate_ulid(),
-                            "version": "1.0",
-                            "name": f"{name} integration tests",
-                        },
-                    },
-                }
-            elif "service" in event_type:
-                subject = {
-                    "id": subject_base_id,
-                    "type": "service",
-                    "content": {
-                        "environment": {"id": env_id, "source": source},
-                        "artifactId": artifact_id,
-                    },
-                }
-            elif "environment" in event_type:
-                subject = {
-                    "id": env_id,
-                    "type": "environment",
-                    "content": {
-                        "name": f"{name}-env-0{idx}",
-                        "url": f"https://{name}-env-0{idx}.example.com",
-                    },
-                }
-            else:
-                subject = {"id": subject_base_id, "type": subject_type, "content": {}}
-
-            event_template: Dict[str, Any] = {"context": context, "subject": subject}
+            event_template: Dict[str, Any] = {"context": context, "subject": template(c)}
 
             # debug output to stdout for visibility when running interactively
             print(json.dumps(event_template, indent=2))
@@ -1,18 +1,27 @@
 #!/usr/bin/env python3
 
 import argparse
+import asyncio
+import itertools
 import json
 import re
 import shlex
 import logging
+import math
 import sys
 import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional, Tuple
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 
 import httpx
 import ulid
 
+from event_dump import COMPRESSIONS, SUFFIXES, NDJSONWriter
+
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -57,20 +66,7 @@ def generate_event_receivers() -> List[Dict[str, Any]]:
     Generate a list of event receivers for each supported event type.
     """
     event_receivers: List[Dict[str, Any]] = []
-    types = [
-        "dev.cdevents.pipelinerun.started.0.2.0",
-        "dev.cdevents.pipelinerun.queued.0.2.0",
-        "dev.cdevents.artifact.packaged.0.2.0",
-        "dev.cdevents.artifact.published.0.2.0",
-        "dev.cdevents.build.started.0.2.0",
-        "dev.cdevents.build.finished.0.2.0",
-        "dev.cdevents.testcaserun.finished.0.2.0",
-        "dev.cdevents.testsuiterun.finished.0.2.0",
-        "dev.cdevents.environment.created.0.2.0",
-        "dev.cdevents.service.deployed.0.2.0",
-        "dev.cdevents.pipelinerun.finished.0.2.0",
-    ]
-    for event_type in types:
+    for event_type in SUBJECT_TEMPLATES:
         name = "-".join(event_type.split(".")[:-3])
         version = ".".join(event_type.split(".")[-3:])
         description = " ".join(event_type.split(".")[:-3]).title()
@@ -79,180 +75,451 @@ def generate_event_receivers() -> List[Dict[str, Any]]:
     return event_receivers
 
 
-# Generate a series of CDEvents for different services and event types
-def generate_events(evrs: Dict[str, Dict[str, Any]]) -> List[Dict[str, Any]]:
+def iter_fleet(services: int = 4, chains_per_service: int = 1) -> Iterator[Tuple[int, str, int]]:
     """
-    Generate a CDEvent of each supported type for each service name.
+    Yield (idx, name, chain) for every chain of every simulated service.
+    The first four services are the classic foo/bar/baz/qux; larger fleets
+    cycle those names with a numeric suffix.
+    """
+    names = ["foo", "bar", "baz", "qux"]
+    for n in range(services):
+        name = names[n % len(names)]
+        if n >= len(names):
+            name = f"{name}{n // len(names)}"
+        for chain in range(chains_per_service):
+            yield n + 1, name, chain
+
+
+class SeededClock:
+    """
+    Deterministic replacement for generate_ulid() and get_current_timestamp().
+    Ids and timestamps derive only from (seed, shard), so a shard of a
+    dataset can be regenerated byte for byte.
+    """
+
+    def __init__(self, seed: int, shard: int = 0, epoch_ms: int = 1_700_000_000_000):
+        self.rng = random.Random(f"{seed}:{shard}")
+        self.epoch_ms = epoch_ms
+        self.ms = epoch_ms
+
+    def ulid(self) -> str:
+        # the ulid package's Crockford base32 encoder: 10 characters of milliseconds, 16 of randomness
+        return ulid.encode_time(self.ms, 10) + ulid.encode_time(self.rng.getrandbits(80), 16)
+
+    def timestamp(self) -> str:
+        # every event is one millisecond after the previous one
+        self.ms += 1
+        ts = datetime.fromtimestamp(self.ms / 1000, timezone.utc)
+        return ts.isoformat(timespec="microseconds").replace("+00:00", "Z")
+
+    def release(self) -> str:
+        ts = datetime.fromtimestamp(self.epoch_ms / 1000, timezone.utc)
+        return f"{ts:%Y.%m}.{self.epoch_ms // 1000}"
+
+
+# Subject templates: one builder per event type, looked up once per run instead
+# of substring-matching the type for every event. Each builder receives the
+# per-chain values (computed once per chain) and only fills in what varies.
+def pipeline_run_subject(c: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": c["subject_base_id"],
+        "type": "pipelineRun",
+        "content": {"pipelineName": c["pipeline_name"], "url": c["pipeline_url"]},
+    }
+
+
+def pipeline_run_finished_subject(c: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": c["subject_base_id"],
+        "type": "pipelineRun",
+        "content": {"pipelineName": c["pipeline_name"], "url": c["pipeline_url"], "outcome": "pass"},
+    }
+
+
+def artifact_packaged_subject(c: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": c["subject_base_id"],
+        "type": "artifact",
+        "content": {
+            "change": {"id": c["artifact_id"], "source": c["git_url"]},
+            "sbom": {"uri": c["sbom_uri"]},
+        },
+    }
+
+
+def artifact_published_subject(c: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": c["subject_base_id"],
+        "type": "artifact",
+        "content": {"sbom": {"uri": c["sbom_uri"]}, "user": "robot"},
+    }
+
+
+def build_subject(c: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": c["subject_base_id"],
+        "type": "build",
+        "source": c["git_url"],
+        "content": {"artifactId": c["artifact_id"]},
+    }
+
+
+def test_case_run_subject(c: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": "myTestCaseRun123",
+        "source": c["git_url"],
+        "type": "testCaseRun",
+        "content": {
+            "outcome": "pass",
+            "environment": {"id": c["env_id"], "source": c["source"]},
+            "testCase": {
+                "id": c["new_id"](),
+                "version": "1.0",
+                "name": c["test_case_name"],
+                "type": "integration",
+            },
+        },
+    }
+
+
+def test_suite_run_subject(c: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": c["subject_base_id"],
+        "type": "testSuiteRun",
+        "content": {
+            "environment": {"id": c["env_id"], "source": c["source"]},
+            "outcome": c["outcome"],
+            "testSuite": {"id": c["new_id"](), "version": "1.0", "name": c["test_suite_name"]},
+        },
+    }
+
+
+def environment_subject(c: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": c["env_id"],
+        "type": "environment",
+        "content": {"name": c["env_name"], "url": c["env_url"]},
+    }
+
+
+def service_subject(c: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": c["subject_base_id"],
+        "type": "service",
+        "content": {"environment": {"id": c["env_id"], "source": c["source"]}, "artifactId": c["artifact_id"]},
+    }
+
+
+SUBJECT_TEMPLATES: Dict[str, Callable[[Dict[str, Any]], Dict[str, Any]]] = {
+    "dev.cdevents.pipelinerun.started.0.2.0": pipeline_run_subject,
+    "dev.cdevents.pipelinerun.queued.0.2.0": pipeline_run_subject,
+    "dev.cdevents.artifact.packaged.0.2.0": artifact_packaged_subject,
+    "dev.cdevents.artifact.published.0.2.0": artifact_published_subject,
+    "dev.cdevents.build.started.0.2.0": build_subject,
+    "dev.cdevents.build.finished.0.2.0": build_subject,
+    "dev.cdevents.testcaserun.finished.0.2.0": test_case_run_subject,
+    "dev.cdevents.testsuiterun.finished.0.2.0": test_suite_run_subject,
+    "dev.cdevents.environment.created.0.2.0": environment_subject,
+    "dev.cdevents.service.deployed.0.2.0": service_subject,
+    "dev.cdevents.pipelinerun.finished.0.2.0": pipeline_run_finished_subject,
+}
+
+
+def chain_values(idx: int, name: str, chain: int, new_id: Callable[[], str] = generate_ulid) -> Dict[str, Any]:
+    """Compute the values shared by every event of one service chain."""
+    chain_id = new_id()
+    env_id = f"cluster/0{idx}"
+    sha = gen_sha(f"{name}-{env_id}" if chain == 0 else f"{name}-{env_id}-{chain}")
+    subject_base_id = f"{name}-{new_id()[:8]}"
+    return dict(
+        new_id=new_id,
+        name=name,
+        chain_id=chain_id,
+        env_id=env_id,
+        artifact_id=f"pkg:oci/{name}@sha256:{sha}",
+        subject_base_id=subject_base_id,
+        source=f"urn:generator:{name}",
+        sbom_uri=f"https://sbom.repo/{name}/{new_id()}.spdx",
+        git_url=f"https://git.example/{name}.git",
+        pipeline_name=f"pipeline-{subject_base_id}",
+        pipeline_url=f"https://pipelines.example/run/{subject_base_id}",
+        env_name=f"{name}-env-0{idx}",
+        env_url=f"https://{name}-env-0{idx}.example.com",
+        outcome="pass" if idx % 2 == 1 else "fail",
+        test_case_name=f"{name} integration test case",
+        test_suite_name=f"{name} integration tests",
+    )
+
+
+# Generate a stream of CDEvents for different services and event types
+def iter_events(
+    evrs: Dict[str, Dict[str, Any]],
+    services: int = 4,
+    chains_per_service: int = 1,
+    clock: Optional["SeededClock"] = None,
+    shard: int = 0,
+    shards: int = 1,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Lazily yield a CDEvent of each supported type for every chain of every
+    service, so arbitrarily large datasets are produced in constant memory.
     Ensures each generated event has unique ids/timestamps and includes
     fields commonly required by the included schemas.
+
+    With shards > 1 only every shards-th chain, starting at `shard`, is
+    generated. A SeededClock replaces the wall clock and random ULIDs so the
+    output is reproducible.
     """
-    events: List[Dict[str, Any]] = []
-    event_receivers: List[Dict[str, Any]] = []
-    names = ["foo", "bar", "baz", "qux"]
-    types = [
-        "dev.cdevents.pipelinerun.started.0.2.0",
-        "dev.cdevents.pipelinerun.queued.0.2.0",
-        "dev.cdevents.artifact.packaged.0.2.0",
-        "dev.cdevents.artifact.published.0.2.0",
-        "dev.cdevents.build.started.0.2.0",
-        "dev.cdevents.build.finished.0.2.0",
-        "dev.cdevents.testcaserun.finished.0.2.0",
-        "dev.cdevents.testsuiterun.finished.0.2.0",
-        "dev.cdevents.environment.created.0.2.0",
-        "dev.cdevents.service.deployed.0.2.0",
-        "dev.cdevents.pipelinerun.finished.0.2.0",
+    if clock is not None:
+        new_id, now, release = clock.ulid, clock.timestamp, clock.release()
+    else:
+        new_id, now = generate_ulid, get_current_timestamp
+        release = datetime.now(timezone.utc).strftime("%Y.%m.%s")
+    plan = [
+        (event_type, template, evrs.get(event_type, {}).get("data", "<replace_with_evr_id>"))
+        for event_type, template in SUBJECT_TEMPLATES.items()
     ]
-    release = datetime.now(timezone.utc).strftime("%Y.%m.%s")
-    for idx, name in enumerate(names, start=1):
-        chain_id = generate_ulid()
-        env_id = f"cluster/0{idx}"
-        sha = gen_sha(f"{name}-{env_id}")
-        artifact_id = f"pkg:oci/{name}@sha256:{sha}"
-        subject_base_id = f"{name}-{generate_ulid()[:8]}"
-        source = f"urn:generator:{name}"
-        sbom_uri = f"https://sbom.repo/{name}/{generate_ulid()}.spdx"
-        for event_type in types:
-            ev_id = generate_ulid()
-            ts = get_current_timestamp()
-            subject_type = event_type.split(".")[2].strip()
-            event_receiver_id = evrs.get(event_type, {}).get("data", "<replace_with_evr_id>")
-            if subject_type == "testsuiterun":
-                subject_type = "testSuiteRun"
-            elif subject_type == "testcaserun":
-                subject_type = "testCaseRun"
-
+    debug_enabled = logger.isEnabledFor(logging.DEBUG)
+    fleet = itertools.islice(iter_fleet(services, chains_per_service), shard, None, shards)
+    for idx, name, chain in fleet:
+        c = chain_values(idx, name, chain, new_id=new_id)
+        for event_type, template, event_receiver_id in plan:
             context = {
                 "version": "0.4.1",
-                "id": ev_id,
-                "chainId": chain_id,
-                "source": source,
+                "id": new_id(),
+                "chainId": c["chain_id"],
+                "source": c["source"],
                 "type": event_type,
-                "timestamp": ts,
+                "timestamp": now(),
             }
+            ev = {
+                "name": name,
+                "version": "1.0.0",
+                "release": release,
+                "platform_id": "x64-linux-oci-2",
+                "package": "oci",
+                "description": f"{name} {event_type}",
+                "payload": {"context": context, "subject": template(c)},
+                "success": True,
+                "event_receiver_id": event_receiver_id,
+            }
+            # debug output to stdout for visibility when running interactively
+            if debug_enabled:
+                logger.debug(json.dumps(ev, indent=2))
+            yield ev
 
-            # Build subject content by event/subject type
-            if "pipelinerun.started" in event_type or "pipelinerun.queued" in event_type:
-                subject = {
-                    "id": subject_base_id,
-                    "type": "pipelineRun",
-                    "content": {
-                        "pipelineName": f"pipeline-{subject_base_id}",
-                        "url": f"https://pipelines.example/run/{subject_base_id}",
-                    },
-                }
-            elif "pipelinerun.finished" in event_type:
-                subject = {
-                    "id": subject_base_id,
-                    "type": "pipelineRun",
-                    "content": {
-                        "pipelineName": f"pipeline-{subject_base_id}",
-                        "url": f"https://pipelines.example/run/{subject_base_id}",
-                        "outcome": "pass",
-                    },
-                }
-            elif "artifact.packaged" in event_type:
-                # artifact events (packaged / published)
-                subject = {
-                    "id": subject_base_id,
-                    "type": "artifact",
-                    "content": {
-                        "change": {
-                            "id": artifact_id,
-                            "source": f"https://git.example/{name}.git",
-                        },
-                        "sbom": {
-                            "uri": sbom_uri,
-                        },
-                    },
-                }
-            elif "artifact.published" in event_type:
-                # artifact events (packaged / published)
-                subject = {
-                    "id": subject_base_id,
-                    "type": "artifact",
-                    "content": {
-                        "sbom": {
-                            "uri": sbom_uri,
-                        },
-                        "user": "robot",
-                    },
-                }
-            elif "build" in event_type:
-                subject = {
-                    "id": subject_base_id,
-                    "type": "build",
-                    "source":  f"https://git.example/{name}.git",
-                    "content": {
-                        "artifactId": artifact_id,
-                    },
-                }
-                if "finished" in event_type:
-                    subject["content"]["artifactId"] = artifact_id
-            elif "testcaserun" in event_type:
-                subject = {
-                            "id": "myTestCaseRun123",
-                            "source":  f"https://git.example/{name}.git",
-                            "type": "testCaseRun",
-                            "content": {
-                                "outcome": "pass",
-                            "environment": {"id": env_id, "source": source},
-                            "testCase": {
-                                "id": generate_ulid(),
-                                "version": "1.0",
-                                "name": f"{name} integration test case",
-                                "type": "integration"
-                            }
-                            }
-                        }
-            elif "testsuiterun" in event_type:
-                subject = {
-                    "id": subject_base_id,
-                    "type": "testSuiteRun",
-                    "content": {
-                        "environment": {"id": env_id, "source": source},
-                        "outcome": "pass" if idx % 2 == 1 else "fail",
-                        "testSuite": {
-                            "id": generate_ulid(),
-                            "version": "1.0",
-                            "name": f"{name} integration tests",
-                        },
-                    },
-                }
-            elif "service" in event_type:
-                subject = {
-                    "id": subject_base_id,
-                    "type": "service",
-                    "content": {
-                        "environment": {"id": env_id, "source": source},
-                        "artifactId": artifact_id,
-                    },
-                }
-            elif "environment" in event_type:
-                subject = {
-                    "id": env_id,
-                    "type": "environment",
-                    "content": {
-                        "name": f"{name}-env-0{idx}",
-                        "url": f"https://{name}-env-0{idx}.example.com",
-                    },
-                }
-            else:
-                subject = {"id": subject_base_id, "type": subject_type, "content": {}}
 
-            event_template: Dict[str, Any] = {"context": context, "subject": subject}
-            ev = dict(name=name, version="1.0.0", release=release, platform_id="x64-linux-oci-2", package="oci", description=f"{name} {event_type}", payload=event_template, success=True, event_receiver_id=event_receiver_id)
-            # debug output to stdout for visibility when running interactively
-            logger.debug(json.dumps(ev, indent=2))
-            events.append(ev)
+def write_shard(
+    shard: int,
+    shards: int,
+    seed: int,
+    output_dir: str = "epr_reports",
+    services: int = 4,
+    chains_per_service: int = 1,
+    compression: str = "none",
+) -> Tuple[str, int]:
+    """
+    Generate one shard of a seeded dataset into its own NDJSON file.
+    Runs in a worker process; returns the file path and event count.
+    """
+    path = os.path.join(output_dir, f"events-{shard:04d}-of-{shards:04d}.ndjson{SUFFIXES[compression]}")
+    events = iter_events(
+        {},
+        services=services,
+        chains_per_service=chains_per_service,
+        clock=SeededClock(seed, shard),
+        shard=shard,
+        shards=shards,
+    )
+    with NDJSONWriter(path, compression=compression) as writer:
+        for event in events:
+            writer.write(event)
+    return path, writer.count
 
-    return events
 
-def post(url, data, headers=None, timeout=10.0):
+def generate_dataset(
+    seed: int,
+    workers: int,
+    shards: Optional[int] = None,
+    output_dir: str = "epr_reports",
+    services: int = 4,
+    chains_per_service: int = 1,
+    compression: str = "none",
+) -> List[Tuple[str, int]]:
+    """
+    Generate a seeded dataset across a process pool, one NDJSON file per
+    shard. The (service, chain) space is dealt round-robin to the shards.
+    """
+    shards = shards or workers
+    os.makedirs(output_dir, exist_ok=True)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(write_shard, shard, shards, seed, output_dir, services, chains_per_service, compression)
+            for shard in range(shards)
+        ]
+        return [future.result() for future in futures]
+
+
+def generate_events(
+    evrs: Dict[str, Dict[str, Any]],
+    services: int = 4,
+    chains_per_service: int = 1,
+) -> List[Dict[str, Any]]:
+    """
+    Generate a CDEvent of each supported type for each service name.
+    List form of iter_events() for callers that need every event at once.
+    """
+    return list(iter_events(evrs, services=services, chains_per_service=chains_per_service))
+
+class RetryPolicy:
+    """
+    Exponential backoff with full jitter for transient failures (connection
+    failures and 429/503), honouring Retry-After when the server sends one.
+    The policy also counts what it did so the run summary can report it.
+    """
+
+    # a 502/504 from a gateway may follow a POST that EPR already processed,
+    # so retrying them can duplicate events and is opt-in (--retry-gateway-errors)
+    gateway_statuses = (502, 504)
+
+    # raised before the request was written, so resending cannot create a duplicate;
+    # read/write timeouts and dropped connections may follow a POST the server already took
+    unsent_errors = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+    def __init__(
+        self,
+        retries: int = 3,
+        backoff: float = 0.2,
+        max_backoff: float = 10.0,
+        statuses: Iterable[int] = (429, 503),
+    ):
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.statuses = frozenset(statuses)
+        self.attempts = 0
+        self.retried = 0
+        self.exhausted = 0
+        self.backoff_seconds = 0.0
+
+    def should_retry(self, response: Optional[httpx.Response], error: Optional[Exception]) -> bool:
+        if error is not None:
+            return isinstance(error, self.unsent_errors)
+        return response is not None and response.status_code in self.statuses
+
+    def delay(self, attempt: int, response: Optional[httpx.Response] = None) -> float:
+        """Seconds to wait before retry number `attempt` (0-based)."""
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after:
+            try:
+                return max(0.0, float(retry_after))
+            except ValueError:
+                try:
+                    when = parsedate_to_datetime(retry_after)
+                    return max(0.0, when.timestamp() - time.time())
+                except (TypeError, ValueError):
+                    pass
+        return random.uniform(0, min(self.max_backoff, self.backoff * (2**attempt)))
+
+    def record_retry(self, delay: float) -> None:
+        self.retried += 1
+        self.backoff_seconds += delay
+
+    def summary(self) -> str:
+        return (
+            f"Retries: {self.retried} over {self.attempts} attempts, "
+            f"{self.backoff_seconds:.2f}s backing off, {self.exhausted} gave up"
+        )
+
+
+class AdaptiveLimiter:
+    """
+    AIMD concurrency controller. Each healthy response grows the in-flight
+    limit by 1/limit (about +1 per round trip); a 429/5xx, a transport error,
+    or a window p99 above latency_tolerance x the best p99 seen multiplies it
+    by `decrease`, at most once per window of in-flight requests.
+    """
+
+    def __init__(
+        self,
+        initial: int = 10,
+        minimum: int = 1,
+        maximum: int = 100,
+        decrease: float = 0.5,
+        latency_tolerance: float = 2.0,
+        window: int = 100,
+    ):
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.limit = float(min(max(initial, self.minimum), self.maximum))
+        self.decrease = decrease
+        self.latency_tolerance = latency_tolerance
+        self.window = window
+        self.in_flight = 0
+        self.increases = 0
+        self.decreases = 0
+        self.low = self.limit
+        self.high = self.limit
+        self.best_p99: Optional[float] = None
+        self._latencies: List[float] = []
+        self._since_decrease = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._cond: Optional[asyncio.Condition] = None
+
+    def _condition(self) -> asyncio.Condition:
+        # main() drives receivers and events through separate asyncio.run() loops
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop, self._cond = loop, asyncio.Condition()
+        return self._cond
+
+    async def acquire(self) -> None:
+        cond = self._condition()
+        async with cond:
+            while self.in_flight >= int(self.limit):
+                await cond.wait()
+            self.in_flight += 1
+
+    async def release(self, latency: float, overloaded: bool) -> None:
+        cond = self._condition()
+        async with cond:
+            self.in_flight -= 1
+            self._since_decrease += 1
+            self._latencies.append(latency)
+            slow = False
+            if len(self._latencies) >= self.window:
+                ordered = sorted(self._latencies)
+                p99 = ordered[int(0.99 * (len(ordered) - 1))]
+                self._latencies = []
+                if self.best_p99 is None or p99 < self.best_p99:
+                    self.best_p99 = p99
+                slow = p99 > self.best_p99 * self.latency_tolerance
+            if overloaded or slow:
+                if self._since_decrease >= self.limit:
+                    self.limit = max(self.minimum, self.limit * self.decrease)
+                    self.decreases += 1
+                    self._since_decrease = 0
+            elif self.limit < self.maximum:
+                self.limit = min(self.maximum, self.limit + 1.0 / self.limit)
+                self.increases += 1
+            self.low = min(self.low, self.limit)
+            self.high = max(self.high, self.limit)
+            cond.notify_all()
+
+    def summary(self) -> str:
+        return (
+            f"Concurrency: limit {int(self.limit)} (range {int(self.low)}-{int(self.high)}, "
+            f"max {self.maximum}), {self.increases} increases, {self.decreases} decreases"
+        )
+
+
+def _check_response(response: Optional[httpx.Response], error: Optional[Exception]) -> httpx.Response:
+    """Return a successful response, or print the failure and raise it."""
     try:
-        with httpx.Client(timeout=timeout) as client:
-            response = client.post(url, json=data, headers=headers)
-            response.raise_for_status()
-            return response
+        if error is not None:
+            raise error
+        response.raise_for_status()
+        return response
     except httpx.HTTPStatusError as e:
         print(f"HTTP error {e.response.status_code}: {e.response.text}")
         raise
@@ -260,9 +527,33 @@ def post(url, data, headers=None, timeout=10.0):
         print(f"Request failed: {e}")
         raise
 
+
+def post(url, data, headers=None, timeout=10.0, retry: Optional[RetryPolicy] = None):
+    attempt = 0
+    while True:
+        response, error = None, None
+        try:
+            with httpx.Client(timeout=timeout) as client:
+                response = client.post(url, json=data, headers=headers)
+        except Exception as e:
+            error = e
+        if retry is not None:
+            retry.attempts += 1
+            if retry.should_retry(response, error):
+                if attempt < retry.retries:
+                    delay = retry.delay(attempt, response)
+                    retry.record_retry(delay)
+                    time.sleep(delay)
+                    attempt += 1
+                    continue
+                retry.exhausted += 1
+        return _check_response(response, error)
+
+
 def post_event_receiver(evr: Dict[str, Any],
     url: str = "http://localhost:8042",
     timeout: float = 10.0,
+    retry: Optional[RetryPolicy] = None,
 ) -> httpx.Response:
     """
     Post a single JSON event receiver to the given webhook URL using httpx.
@@ -270,13 +561,14 @@ def post_event_receiver(evr: Dict[str, Any],
     """
     headers = {"Content-Type": "application/json"}
     endpoint = f"{url}/api/v1/receivers"
-    resp = post(endpoint, data=evr, headers=headers, timeout=timeout)
+    resp = post(endpoint, data=evr, headers=headers, timeout=timeout, retry=retry)
     return resp
 
 def post_event(
     event: Dict[str, Any],
     url: str = "http://localhost:8042",
     timeout: float = 10.0,
+    retry: Optional[RetryPolicy] = None,
 ) -> httpx.Response:
     """
     Post a single JSON event to the given webhook URL using httpx.
@@ -284,50 +576,738 @@ def post_event(
     """
     headers = {"Content-Type": "application/json"}
     endpoint = f"{url}/api/v1/events"
-    resp = post(endpoint, data=event, headers=headers, timeout=timeout)
+    resp = post(endpoint, data=event, headers=headers, timeout=timeout, retry=retry)
     return resp
 
+class ReceiverCache:
+    """
+    Persistent (name, version, type) -> event receiver id map, kept per EPR
+    url in a JSON file so warm runs can skip receiver creation entirely.
+    """
+
+    def __init__(self, path: str, url: str):
+        self.path = os.path.expanduser(path)
+        self.url = url.rstrip("/")
+        self.hits = 0
+        self.misses = 0
+        self.invalidated = 0
+        self._all: Dict[str, Dict[str, str]] = {}
+        if os.path.exists(self.path):
+            try:
+                with open(self.path) as f:
+                    self._all = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring unreadable receiver cache {self.path}: {e}")
+        self.entries = self._all.setdefault(self.url, {})
+
+    @staticmethod
+    def key(evr: Dict[str, Any]) -> str:
+        return f"{evr['name']}|{evr['version']}|{evr['type']}"
+
+    def get(self, evr: Dict[str, Any]) -> Optional[str]:
+        _id = self.entries.get(self.key(evr))
+        if _id is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return _id
+
+    def put(self, evr: Dict[str, Any], _id: str) -> None:
+        self.entries[self.key(evr)] = _id
+
+    def invalidate(self, key: str) -> None:
+        if self.entries.pop(key, None) is not None:
+            self.invalidated += 1
+
+    def verify(self, timeout: float = 10.0) -> None:
+        """GET every cached receiver and drop the ones the server answers 404 for."""
+        with httpx.Client(timeout=timeout) as client:
+            for key, _id in list(self.entries.items()):
+                if client.get(f"{self.url}/api/v1/receivers/{_id}").status_code == 404:
+                    self.invalidate(key)
+
+    def save(self) -> None:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(self._all, f, indent=2)
+        os.replace(tmp, self.path)
+
+    def summary(self) -> str:
+        return f"Receiver cache: {self.hits} hits, {self.misses} misses, {self.invalidated} invalidated ({self.path})"
+
+
+def _lookup_request(evrs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """One aliased GraphQL query that finds every receiver in evrs by name, version and type."""
+    declarations, selections, variables = [], [], {}
+    for i, evr in enumerate(evrs):
+        declarations.append(f"$r{i}: FindEventReceiverInput!")
+        selections.append(f"r{i}: event_receivers(event_receiver: $r{i}) {{ id }}")
+        variables[f"r{i}"] = dict(name=evr["name"], version=evr["version"], type=evr["type"])
+    return dict(query=f"query ({', '.join(declarations)}) {{ {' '.join(selections)} }}", variables=variables)
+
+
+def _lookup_found(evrs: List[Dict[str, Any]], resp: httpx.Response) -> Dict[str, str]:
+    data = resp.json().get("data") or {}
+    found = {}
+    for i, evr in enumerate(evrs):
+        rows = data.get(f"r{i}") or []
+        if rows:
+            found[ReceiverCache.key(evr)] = rows[0]["id"]
+    return found
+
+
+def lookup_event_receivers(
+    evrs: List[Dict[str, Any]],
+    url: str = "http://localhost:8042",
+    timeout: float = 10.0,
+) -> Dict[str, str]:
+    """
+    Find existing receivers for evrs with one aliased GraphQL query.
+    Returns {ReceiverCache.key(evr): id} for the ones the server already has.
+    """
+    if not evrs:
+        return {}
+    headers = {"Content-Type": "application/json"}
+    resp = post(f"{url}/api/v1/graphql/query", data=_lookup_request(evrs), headers=headers, timeout=timeout)
+    return _lookup_found(evrs, resp)
+
+
+async def alookup_event_receivers(
+    client: httpx.AsyncClient,
+    evrs: List[Dict[str, Any]],
+    url: str = "http://localhost:8042",
+) -> Dict[str, str]:
+    """Async counterpart of lookup_event_receivers() on a shared client."""
+    if not evrs:
+        return {}
+    headers = {"Content-Type": "application/json"}
+    resp = await apost(client, f"{url}/api/v1/graphql/query", data=_lookup_request(evrs), headers=headers)
+    return _lookup_found(evrs, resp)
+
+
+def _cache_hits(
+    evrs: List[Dict[str, Any]], cache: ReceiverCache
+) -> Tuple[Dict[str, Dict[str, Any]], List[Dict[str, Any]]]:
+    results: Dict[str, Dict[str, Any]] = {}
+    misses = []
+    for evr in evrs:
+        _id = cache.get(evr)
+        if _id is not None:
+            results[evr["type"]] = dict(status=200, data=_id, cached=True)
+        else:
+            misses.append(evr)
+    return results, misses
+
+
+def _cache_found(
+    misses: List[Dict[str, Any]],
+    found: Dict[str, str],
+    cache: ReceiverCache,
+    results: Dict[str, Dict[str, Any]],
+) -> List[Dict[str, Any]]:
+    """Record looked-up ids in results and the cache; return the receivers still missing."""
+    missing = []
+    for evr in misses:
+        _id = found.get(ReceiverCache.key(evr))
+        if _id is not None:
+            cache.put(evr, _id)
+            results[evr["type"]] = dict(status=200, data=_id)
+        else:
+            missing.append(evr)
+    if found:
+        cache.save()
+    return missing
+
+
+def resolve_cached_receivers(
+    evrs: List[Dict[str, Any]],
+    cache: Optional[ReceiverCache],
+    url: str = "http://localhost:8042",
+    timeout: float = 10.0,
+) -> Tuple[Dict[str, Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Answer receivers from the cache, then from one batched GraphQL lookup.
+    Returns results in post_event_receivers() form and the receivers that
+    still have to be created.
+    """
+    if cache is None:
+        return {}, list(evrs)
+    results, misses = _cache_hits(evrs, cache)
+    try:
+        found = lookup_event_receivers(misses, url=url, timeout=timeout)
+    except Exception as e:
+        logger.warning(f"Event receiver lookup failed, creating them instead: {e}")
+        found = {}
+    return results, _cache_found(misses, found, cache, results)
+
+
+async def aresolve_cached_receivers(
+    client: httpx.AsyncClient,
+    evrs: List[Dict[str, Any]],
+    cache: Optional[ReceiverCache],
+    url: str = "http://localhost:8042",
+) -> Tuple[Dict[str, Dict[str, Any]], List[Dict[str, Any]]]:
+    """Async counterpart of resolve_cached_receivers() on a shared client."""
+    if cache is None:
+        return {}, list(evrs)
+    results, misses = _cache_hits(evrs, cache)
+    try:
+        found = await alookup_event_receivers(client, misses, url=url)
+    except Exception as e:
+        logger.warning(f"Event receiver lookup failed, creating them instead: {e}")
+        found = {}
+    return results, _cache_found(misses, found, cache, results)
+
+
+def cache_created_receivers(
+    evrs: List[Dict[str, Any]],
+    results: Dict[str, Dict[str, Any]],
+    cache: Optional[ReceiverCache],
+) -> None:
+    if cache is None:
+        return
+    for evr in evrs:
+        result = results.get(evr["type"], {})
+        if result.get("status") and isinstance(result.get("data"), str):
+            cache.put(evr, result["data"])
+    cache.save()
+
+
+class ReceiverRepair:
+    """
+    Replaces cached event receiver ids that EPR no longer knows. When an
+    event posted with a cached receiver id is rejected, the receiver is
+    fetched; on a 404 its cache entry is dropped, it is looked up or created
+    again, and the event is re-sent with the new id. Later events with the
+    stale id are rewritten before they are sent.
+    """
+
+    # statuses EPR answers an event for an unknown event_receiver_id with
+    rejected = (400, 404, 422)
+
+    def __init__(
+        self,
+        evrs: List[Dict[str, Any]],
+        results: Dict[str, Dict[str, Any]],
+        cache: ReceiverCache,
+        url: str = "http://localhost:8042",
+        timeout: float = 10.0,
+        retry: Optional[RetryPolicy] = None,
+    ):
+        self.cache = cache
+        self.url = url
+        self.timeout = timeout
+        self.retry = retry
+        # only ids answered from the cache can be stale; looked-up and created ones are current
+        self.by_id = {
+            results[evr["type"]]["data"]: evr for evr in evrs if results.get(evr["type"], {}).get("cached")
+        }
+        self.replaced: Dict[str, Optional[str]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock: Optional[asyncio.Lock] = None
+
+    def current(self, event: Dict[str, Any]) -> Dict[str, Any]:
+        """The event with its receiver id replaced if that id was found stale earlier."""
+        _id = self.replaced.get(event.get("event_receiver_id"))
+        return dict(event, event_receiver_id=_id) if _id else event
+
+    def stale(self, event: Dict[str, Any], error: Exception) -> bool:
+        return (
+            isinstance(error, httpx.HTTPStatusError)
+            and error.response.status_code in self.rejected
+            and event.get("event_receiver_id") in self.by_id
+            and event.get("event_receiver_id") not in self.replaced
+        )
+
+    def _replace(self, stale_id: str, results: Dict[str, Dict[str, Any]]) -> Optional[str]:
+        evr = self.by_id[stale_id]
+        result = results.get(evr["type"], {})
+        _id = result.get("data") if result.get("status") and isinstance(result.get("data"), str) else None
+        self.replaced[stale_id] = _id
+        if _id is not None:
+            self.cache.put(evr, _id)
+            self.cache.save()
+            logger.warning(f"Event receiver {stale_id} no longer exists; replaced it with {_id}")
+        return _id
+
+    def repair(self, event: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Re-resolve the event's receiver; returns the event to re-send, or None if the receiver exists."""
+        stale_id = event["event_receiver_id"]
+        with httpx.Client(timeout=self.timeout) as client:
+            if client.get(f"{self.url}/api/v1/receivers/{stale_id}").status_code != 404:
+                self.replaced[stale_id] = None
+                return None
+        evr = self.by_id[stale_id]
+        self.cache.invalidate(ReceiverCache.key(evr))
+        results = post_event_receivers([evr], url=self.url, timeout=self.timeout, retry=self.retry, cache=self.cache)
+        return self.current(event) if self._replace(stale_id, results) else None
+
+    def _guard(self) -> asyncio.Lock:
+        # main() drives receivers and events through separate asyncio.run() loops
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop, self._lock = loop, asyncio.Lock()
+        return self._lock
+
+    async def arepair(self, client: httpx.AsyncClient, event: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Async counterpart of repair(); concurrent rejections for one receiver repair it once."""
+        stale_id = event["event_receiver_id"]
+        async with self._guard():
+            if stale_id not in self.replaced:
+                if (await client.get(f"{self.url}/api/v1/receivers/{stale_id}")).status_code != 404:
+                    self.replaced[stale_id] = None
+                else:
+                    evr = self.by_id[stale_id]
+                    self.cache.invalidate(ReceiverCache.key(evr))
+                    results, missing = await aresolve_cached_receivers(client, [evr], self.cache, url=self.url)
+                    for evr in missing:
+                        results[evr["type"]] = await _receiver_sender(self.url, self.retry)(client, evr)
+                    self._replace(stale_id, results)
+        return self.current(event) if self.replaced.get(stale_id) else None
+
+    def summary(self) -> str:
+        repaired = sum(1 for _id in self.replaced.values() if _id)
+        return f"Stale event receivers: {repaired} replaced"
+
+
 def post_event_receivers(
     evrs: List[Dict[str, Any]],
     url: str = "http://localhost:8042",
     timeout: float = 10.0,
+    retry: Optional[RetryPolicy] = None,
+    cache: Optional[ReceiverCache] = None,
 ) -> Dict[str, Dict[str, Any]]:
     """
     Post a list of event receivers sequentially. Returns a list of (evr_id, status_code, response_text).
+    With a cache, known receivers are answered locally and only unknown ones are created.
     """
-    results: Dict[str, Dict[str, Any]] = {}
-    for evr in evrs:
+    results, missing = resolve_cached_receivers(evrs, cache, url=url, timeout=timeout)
+    for evr in missing:
         try:
-            resp = post_event_receiver(evr, url=url, timeout=timeout)
+            resp = post_event_receiver(evr, url=url, timeout=timeout, retry=retry)
             data=json.loads(resp.text)
             _id = data.get("data", "<no_id_returned>")
             results[evr["type"]] = dict(status=resp.status_code, data=_id)
         except Exception as e:
             results[evr["type"]] = dict(status=None, data=dict(error=str(e)))
+    cache_created_receivers(missing, results, cache)
     return results
 
 
+class PostSummary:
+    """Running totals of posted events, so a long run counts results as they arrive instead of keeping them."""
+
+    def __init__(self):
+        self.posted = 0
+        self.succeeded = 0
+
+    def record(self, result: Tuple[Optional[str], Optional[int], str]) -> None:
+        _, status, _ = result
+        self.posted += 1
+        if status and 200 <= status < 300:
+            self.succeeded += 1
+
+
 def post_events(
-    events: List[Dict[str, Any]],
+    events: Iterable[Dict[str, Any]],
     url: str = "http://localhost:8042",
     timeout: float = 10.0,
+    retry: Optional[RetryPolicy] = None,
+    repair: Optional[ReceiverRepair] = None,
+    on_result: Optional[Callable[[Tuple[Optional[str], Optional[int], str]], None]] = None,
 ) -> List[Tuple[Optional[str], Optional[int], str]]:
     """
-    Post a list of events sequentially. Returns a list of (event_id, status_code, response_text).
+    Post events sequentially. Returns a list of (event_id, status_code, response_text),
+    or hands each of them to on_result as it completes and returns an empty list.
+    With a ReceiverRepair, events rejected for a stale cached receiver id are re-sent with a current one.
     """
     results: List[Tuple[Optional[str], Optional[int], str]] = []
+    append = on_result or results.append
     for ev in events:
         try:
-            resp = post_event(ev, url=url, timeout=timeout)
+            if repair is not None:
+                ev = repair.current(ev)
+            try:
+                resp = post_event(ev, url=url, timeout=timeout, retry=retry)
+            except httpx.HTTPStatusError as e:
+                repaired = repair.repair(ev) if repair is not None and repair.stale(ev, e) else None
+                if repaired is None:
+                    raise
+                resp = post_event(repaired, url=url, timeout=timeout, retry=retry)
             ev_id = resp.json().get("data")
-            results.append((ev_id, resp.status_code, resp.text))
+            append((ev_id, resp.status_code, resp.text))
         except Exception as e:
             nvrpp = ev.get("description", "<no_description>")
             logger.error(f"Failed to post event {nvrpp}: {e}")
-            results.append((None, None, str(e)))
+            append((None, None, str(e)))
+    return results
+
+
+async def apost(
+    client: httpx.AsyncClient,
+    url,
+    data,
+    headers=None,
+    retry: Optional[RetryPolicy] = None,
+    limiter: Optional[AdaptiveLimiter] = None,
+):
+    """
+    Async counterpart of post() that sends on a shared, pooled client
+    instead of opening a new connection per request. Each attempt holds a
+    limiter slot, so throttling and latency feed the concurrency controller.
+    """
+    attempt = 0
+    while True:
+        response, error = None, None
+        if limiter is not None:
+            await limiter.acquire()
+        sent = time.perf_counter()
+        try:
+            response = await client.post(url, json=data, headers=headers)
+        except Exception as e:
+            error = e
+        finally:
+            if limiter is not None:
+                overloaded = response is None or response.status_code == 429 or response.status_code >= 500
+                await limiter.release(time.perf_counter() - sent, overloaded)
+        if retry is not None:
+            retry.attempts += 1
+            if retry.should_retry(response, error):
+                if attempt < retry.retries:
+                    delay = retry.delay(attempt, response)
+                    retry.record_retry(delay)
+                    await asyncio.sleep(delay)
+                    attempt += 1
+                    continue
+                retry.exhausted += 1
+        return _check_response(response, error)
+
+
+def make_async_client(
+    timeout: float = 10.0,
+    concurrency: int = 10,
+    transport: Optional[httpx.AsyncBaseTransport] = None,
+) -> httpx.AsyncClient:
+    """
+    Build an httpx.AsyncClient whose connection pool is sized to the
+    concurrency limit so every worker can keep its connection alive.
+    Pass a transport (e.g. httpx.ASGITransport) to talk to an in-process server.
+    """
+    limits = httpx.Limits(
+        max_connections=concurrency,
+        max_keepalive_connections=concurrency,
+        keepalive_expiry=30.0,
+    )
+    return httpx.AsyncClient(timeout=timeout, limits=limits, transport=transport)
+
+
+async def apost_bulk(
+    items: Iterable[Dict[str, Any]],
+    send: Callable[[httpx.AsyncClient, Dict[str, Any]], Awaitable[Any]],
+    timeout: float = 10.0,
+    concurrency: int = 10,
+    transport: Optional[httpx.AsyncBaseTransport] = None,
+    limiter: Optional[AdaptiveLimiter] = None,
+    client: Optional[httpx.AsyncClient] = None,
+    on_result: Optional[Callable[[Any], None]] = None,
+) -> List[Any]:
+    """
+    Run send(client, item) for every item with at most `concurrency` requests
+    in flight on one shared client. Results are returned in input order, or
+    with on_result each one is handed to it as it completes (in completion
+    order) and none are kept, so memory does not grow with the item count.
+    With a limiter, enough workers for its maximum are started and the
+    limiter decides how many of them may be sending at once. Pass a client
+    to reuse one the caller already has open.
+    """
+    concurrency = max(1, limiter.maximum if limiter is not None else concurrency)
+    results: Dict[int, Any] = {}
+    pending = enumerate(items)
+
+    async def worker(client: httpx.AsyncClient) -> None:
+        # workers share one iterator, so each item is taken exactly once
+        for idx, item in pending:
+            result = await send(client, item)
+            if on_result is not None:
+                on_result(result)
+            else:
+                results[idx] = result
+
+    if client is not None:
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+    else:
+        async with make_async_client(timeout=timeout, concurrency=concurrency, transport=transport) as client:
+            await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+    return [results[idx] for idx in range(len(results))]
+
+
+async def apost_event_receivers(
+    evrs: List[Dict[str, Any]],
+    url: str = "http://localhost:8042",
+    timeout: float = 10.0,
+    concurrency: int = 10,
+    transport: Optional[httpx.AsyncBaseTransport] = None,
+    retry: Optional[RetryPolicy] = None,
+    limiter: Optional[AdaptiveLimiter] = None,
+    cache: Optional[ReceiverCache] = None,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Post a list of event receivers concurrently over a pooled async client.
+    Returns the same mapping as post_event_receivers().
+    """
+    concurrency = max(1, limiter.maximum if limiter is not None else concurrency)
+    async with make_async_client(timeout=timeout, concurrency=concurrency, transport=transport) as client:
+        results, missing = await aresolve_cached_receivers(client, evrs, cache, url=url)
+        if not missing:
+            return results
+        sent = await apost_bulk(
+            missing, _receiver_sender(url, retry, limiter), concurrency=concurrency, limiter=limiter, client=client
+        )
+    results.update({evr["type"]: result for evr, result in zip(missing, sent)})
+    cache_created_receivers(missing, results, cache)
     return results
 
 
+def _receiver_sender(
+    url: str, retry: Optional[RetryPolicy] = None, limiter: Optional[AdaptiveLimiter] = None
+) -> Callable[[httpx.AsyncClient, Dict[str, Any]], Awaitable[Dict[str, Any]]]:
+    """send() for apost_bulk() that creates one event receiver and returns its post_event_receivers() result."""
+    headers = {"Content-Type": "application/json"}
+    endpoint = f"{url}/api/v1/receivers"
+
+    async def send(client: httpx.AsyncClient, evr: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            resp = await apost(client, endpoint, data=evr, headers=headers, retry=retry, limiter=limiter)
+            _id = resp.json().get("data", "<no_id_returned>")
+            return dict(status=resp.status_code, data=_id)
+        except Exception as e:
+            return dict(status=None, data=dict(error=str(e)))
+
+    return send
+
+
+async def apost_events(
+    events: Iterable[Dict[str, Any]],
+    url: str = "http://localhost:8042",
+    timeout: float = 10.0,
+    concurrency: int = 10,
+    transport: Optional[httpx.AsyncBaseTransport] = None,
+    retry: Optional[RetryPolicy] = None,
+    limiter: Optional[AdaptiveLimiter] = None,
+    repair: Optional[ReceiverRepair] = None,
+    on_result: Optional[Callable[[Tuple[Optional[str], Optional[int], str]], None]] = None,
+) -> List[Tuple[Optional[str], Optional[int], str]]:
+    """
+    Post events concurrently over a pooled async client.
+    Returns a list of (event_id, status_code, response_text) in input order,
+    or hands each of them to on_result as it completes and returns an empty list.
+    With a ReceiverRepair, events rejected for a stale cached receiver id are re-sent with a current one.
+    """
+    headers = {"Content-Type": "application/json"}
+    endpoint = f"{url}/api/v1/events"
+
+    async def send(client: httpx.AsyncClient, ev: Dict[str, Any]) -> Tuple[Optional[str], Optional[int], str]:
+        try:
+            if repair is not None:
+                ev = repair.current(ev)
+            try:
+                resp = await apost(client, endpoint, data=ev, headers=headers, retry=retry, limiter=limiter)
+            except httpx.HTTPStatusError as e:
+                repaired = await repair.arepair(client, ev) if repair is not None and repair.stale(ev, e) else None
+                if repaired is None:
+                    raise
+                resp = await apost(client, endpoint, data=repaired, headers=headers, retry=retry, limiter=limiter)
+            ev_id = resp.json().get("data")
+            return (ev_id, resp.status_code, resp.text)
+        except Exception as e:
+            nvrpp = ev.get("description", "<no_description>")
+            logger.error(f"Failed to post event {nvrpp}: {e}")
+            return (None, None, str(e))
+
+    return await apost_bulk(
+        events,
+        send,
+        timeout=timeout,
+        concurrency=concurrency,
+        transport=transport,
+        limiter=limiter,
+        on_result=on_result,
+    )
+
+
+class LatencyStats:
+    """
+    Latency, error and histogram bookkeeping for one benchmarked endpoint.
+    """
+
+    # upper bounds (ms) of the latency histogram buckets; the last bucket is open-ended
+    buckets_ms = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000]
+
+    def __init__(self, endpoint: str):
+        self.endpoint = endpoint
+        self.latencies: List[float] = []
+        self.errors = 0
+        self.elapsed = 0.0
+
+    def record(self, seconds: float, ok: bool) -> None:
+        self.latencies.append(seconds)
+        if not ok:
+            self.errors += 1
+
+    def percentile(self, pct: float) -> float:
+        """Return the pct-th percentile latency in milliseconds (nearest rank)."""
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        rank = max(0, min(len(ordered) - 1, math.ceil(pct / 100.0 * len(ordered)) - 1))
+        return ordered[rank] * 1000.0
+
+    def histogram(self) -> Dict[str, int]:
+        counts = {f"le_{le}ms": 0 for le in self.buckets_ms}
+        counts["gt_5000ms"] = 0
+        for seconds in self.latencies:
+            ms = seconds * 1000.0
+            for le in self.buckets_ms:
+                if ms <= le:
+                    counts[f"le_{le}ms"] += 1
+                    break
+            else:
+                counts["gt_5000ms"] += 1
+        return counts
+
+    def summary(self) -> Dict[str, Any]:
+        requests = len(self.latencies)
+        return dict(
+            endpoint=self.endpoint,
+            requests=requests,
+            errors=self.errors,
+            error_rate=self.errors / requests if requests else 0.0,
+            elapsed_s=self.elapsed,
+            throughput_rps=requests / self.elapsed if self.elapsed else 0.0,
+            p50_ms=self.percentile(50),
+            p90_ms=self.percentile(90),
+            p99_ms=self.percentile(99),
+            max_ms=max(self.latencies) * 1000.0 if self.latencies else 0.0,
+            histogram=self.histogram(),
+        )
+
+
+def repeat_payloads(factory: Callable[[], Iterable[Dict[str, Any]]]) -> Iterator[Dict[str, Any]]:
+    """Yield payloads from factory() forever, calling it again whenever it runs dry."""
+    while True:
+        yield from factory()
+
+
+async def bench_endpoint(
+    client: httpx.AsyncClient,
+    endpoint: str,
+    payloads: Iterator[Dict[str, Any]],
+    concurrency: int = 10,
+    duration: Optional[float] = None,
+    count: Optional[int] = None,
+    on_success: Optional[Callable[[Dict[str, Any], httpx.Response], None]] = None,
+) -> LatencyStats:
+    """
+    Post payloads to endpoint with `concurrency` workers until `count`
+    requests have been sent or `duration` seconds have elapsed.
+    """
+    stats = LatencyStats(endpoint)
+    headers = {"Content-Type": "application/json"}
+    if count is not None:
+        payloads = itertools.islice(payloads, count)
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    deadline = start + duration if duration is not None else None
+
+    async def worker() -> None:
+        for payload in payloads:
+            if deadline is not None and loop.time() >= deadline:
+                return
+            sent = time.perf_counter()
+            try:
+                resp = await client.post(endpoint, json=payload, headers=headers)
+                ok = resp.is_success
+            except Exception as e:
+                logger.debug(f"Benchmark request to {endpoint} failed: {e}")
+                resp, ok = None, False
+            stats.record(time.perf_counter() - sent, ok)
+            if ok and on_success is not None:
+                on_success(payload, resp)
+
+    await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+    stats.elapsed = loop.time() - start
+    return stats
+
+
+async def run_benchmark(
+    url: str = "http://localhost:8042",
+    timeout: float = 10.0,
+    concurrency: int = 10,
+    duration: Optional[float] = None,
+    count: Optional[int] = None,
+    services: int = 4,
+    chains_per_service: int = 1,
+    transport: Optional[httpx.AsyncBaseTransport] = None,
+) -> Dict[str, Any]:
+    """
+    Benchmark /api/v1/receivers and then /api/v1/events using the same
+    payload builders as a normal run. Receiver IDs created by the first phase
+    are filled into the events of the second.
+    """
+    evrs: Dict[str, Dict[str, Any]] = {}
+
+    def remember_receiver(evr: Dict[str, Any], resp: httpx.Response) -> None:
+        evrs[evr["type"]] = dict(status=resp.status_code, data=resp.json().get("data"))
+
+    report: Dict[str, Any] = dict(
+        url=url,
+        started=get_current_timestamp(),
+        concurrency=concurrency,
+        duration_s=duration,
+        count=count,
+        endpoints={},
+    )
+    async with make_async_client(timeout=timeout, concurrency=concurrency, transport=transport) as client:
+        phases = [
+            ("/api/v1/receivers", lambda: repeat_payloads(generate_event_receivers), remember_receiver),
+            (
+                "/api/v1/events",
+                lambda: repeat_payloads(
+                    lambda: iter_events(evrs, services=services, chains_per_service=chains_per_service)
+                ),
+                None,
+            ),
+        ]
+        for path, payloads, on_success in phases:
+            print(f"Benchmarking {url}{path} ...")
+            stats = await bench_endpoint(
+                client,
+                f"{url}{path}",
+                payloads(),
+                concurrency=concurrency,
+                duration=duration,
+                count=count,
+                on_success=on_success,
+            )
+            report["endpoints"][path] = stats.summary()
+    return report
+
+
+def format_benchmark_table(report: Dict[str, Any]) -> str:
+    """Render a benchmark report as a fixed-width text table."""
+    header = f"{'endpoint':<20}{'requests':>10}{'errors':>8}{'err%':>8}{'req/s':>10}"
+    header += f"{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'max ms':>10}"
+    rows = [header, "-" * len(header)]
+    for path, s in report["endpoints"].items():
+        row = f"{path:<20}{s['requests']:>10}{s['errors']:>8}{s['error_rate'] * 100:>8.2f}{s['throughput_rps']:>10.1f}"
+        row += f"{s['p50_ms']:>10.2f}{s['p90_ms']:>10.2f}{s['p99_ms']:>10.2f}{s['max_ms']:>10.2f}"
+        rows.append(row)
+    return "\n".join(rows)
+
+
 def make_curl_command(event: Dict[str, Any], url: str) -> str:
     """
     Build a curl command that posts the given event to url.
@@ -340,6 +1320,46 @@ def make_curl_command(event: Dict[str, Any], url: str) -> str:
     return f"curl -sS -X POST -H 'Content-Type: application/json' -d {quoted_payload} {quoted_url}"
 
 
+def write_events_to_disk(events: Iterable[Dict[str, Any]], url: str) -> Iterator[Dict[str, Any]]:
+    """
+    Write each event to epr_reports/events/ and its curl command to
+    epr_reports/curl_commands_events.txt, then yield it unchanged so the
+    stream can still be dry-run or posted in the same pass.
+    """
+    os.makedirs("epr_reports/events", exist_ok=True)
+    count = 0
+    with open("epr_reports/curl_commands_events.txt", "w") as curl_file:
+        for idx, event in enumerate(events, start=1):
+            filename = f"epr_reports/events/event_{idx:03d}_{event['name']}_{event['version']}.json"
+            with open(filename, "w") as f:
+                json.dump(event, f, indent=2)
+            print(f"Wrote event {event['payload']['context']['id']} to {filename}")
+            curl_file.write(make_curl_command(event, f"{url}/api/v1/events") + "\n")
+            count = idx
+            yield event
+    print(f"Wrote {count} events to disk in the 'epr_reports/events' directory")
+    print("Wrote curl commands to epr_reports/curl_commands_event_receivers.txt and epr_reports/curl_commands_events.txt")
+
+
+def write_events_ndjson(
+    events: Iterable[Dict[str, Any]],
+    path: str = "epr_reports/events.ndjson",
+    compression: str = "none",
+) -> Iterator[Dict[str, Any]]:
+    """
+    Stream events into a single (optionally compressed) NDJSON file, yielding
+    each one unchanged so the stream can still be dry-run or posted.
+    """
+    output_dir = os.path.dirname(path)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    with NDJSONWriter(path, compression=compression) as writer:
+        for event in events:
+            writer.write(event)
+            yield event
+    print(f"Wrote {writer.count} events to {path}")
+
+
 def main() -> None:
     """
     Generate event_receivers and events and either post them, show curl commands in a dry-run, or write to disk.
@@ -364,16 +1384,239 @@ def main() -> None:
         action="store_true",
         help="Write events to disk as JSON files and skip posting",
     )
+    parser.add_argument(
+        "--output-format",
+        choices=["files", "ndjson"],
+        default="files",
+        help="--write-to-disk layout: one pretty JSON file (and curl line) per event, or a single NDJSON stream",
+    )
+    parser.add_argument(
+        "--compress",
+        choices=COMPRESSIONS,
+        default="none",
+        help="Compression for --output-format ndjson (zstd requires the zstandard package)",
+    )
+    parser.add_argument(
+        "--output",
+        "-o",
+        default=None,
+        help="NDJSON output path (default epr_reports/events.ndjson plus a compression suffix)",
+    )
+    parser.add_argument(
+        "--concurrency",
+        "-c",
+        type=int,
+        default=None,
+        help="Post with a shared pooled async client, keeping at most N requests in flight",
+    )
+    parser.add_argument(
+        "--services",
+        type=int,
+        default=4,
+        help="Number of simulated services to generate events for",
+    )
+    parser.add_argument(
+        "--chains-per-service",
+        type=int,
+        default=1,
+        help="Number of event chains (one event per type) to generate for each service",
+    )
+    parser.add_argument(
+        "--retries",
+        type=int,
+        default=3,
+        help="Retries for connection failures and 429/503 responses (0 disables)",
+    )
+    parser.add_argument(
+        "--retry-gateway-errors",
+        action="store_true",
+        help="Also retry 502/504, which can duplicate events EPR already stored behind the gateway",
+    )
+    parser.add_argument(
+        "--backoff",
+        type=float,
+        default=0.2,
+        help="Base seconds for exponential backoff with jitter; Retry-After takes precedence",
+    )
+    parser.add_argument(
+        "--adaptive",
+        action="store_true",
+        help="Adapt in-flight requests (AIMD) starting at --concurrency; implies async posting",
+    )
+    parser.add_argument(
+        "--max-concurrency",
+        type=int,
+        default=None,
+        help="Upper bound for --adaptive (default 4x --concurrency)",
+    )
+    parser.add_argument(
+        "--receiver-cache",
+        default=os.environ.get("EPR_RECEIVER_CACHE", "~/.cache/epr-workshop/receivers.json"),
+        help="File caching event receiver ids per EPR url (env EPR_RECEIVER_CACHE)",
+    )
+    parser.add_argument(
+        "--no-receiver-cache",
+        action="store_true",
+        help="Always create event receivers instead of reusing cached or existing ones",
+    )
+    parser.add_argument(
+        "--verify-receiver-cache",
+        action="store_true",
+        help="GET each cached event receiver up front and drop entries that come back 404 "
+        "(stale entries are otherwise replaced when EPR rejects an event that uses them)",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=None,
+        help="Make generated ids and timestamps deterministic for this seed",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Generate a dataset with this many processes, one NDJSON shard per worker, and exit",
+    )
+    parser.add_argument(
+        "--shards",
+        type=int,
+        default=None,
+        help="Number of dataset shards for --workers (default one per worker)",
+    )
+    parser.add_argument(
+        "--dataset-dir",
+        default="epr_reports",
+        help="Directory for --workers dataset shards",
+    )
+    parser.add_argument(
+        "--benchmark",
+        action="store_true",
+        help="Load test /api/v1/receivers and /api/v1/events and report throughput and latency",
+    )
+    parser.add_argument(
+        "--duration",
+        type=float,
+        default=None,
+        help="Benchmark duration per endpoint in seconds (default 10 unless --count is given)",
+    )
+    parser.add_argument(
+        "--count",
+        type=int,
+        default=None,
+        help="Number of benchmark requests per endpoint",
+    )
+    parser.add_argument(
+        "--benchmark-output",
+        default="epr_reports/benchmark.json",
+        help="Where to write the machine-readable benchmark results",
+    )
+    parser.add_argument(
+        "--standin",
+        action="store_true",
+        help="Send to an in-process EPR stand-in (epr_standin.py) instead of the network; implies async posting",
+    )
+    parser.add_argument(
+        "--standin-latency",
+        type=float,
+        default=0.0,
+        help="Seconds of latency the in-process stand-in adds to every request",
+    )
+    parser.add_argument(
+        "--standin-error-rate",
+        type=float,
+        default=0.0,
+        help="Fraction of requests the in-process stand-in answers with 503",
+    )
     args = parser.parse_args()
 
     url = args.url
     timeout = args.timeout
+    concurrency = args.concurrency
+    transport = None
+    if args.standin:
+        from epr_standin import EPRStandIn
+
+        standin = EPRStandIn(latency=args.standin_latency, error_rate=args.standin_error_rate)
+        transport = httpx.ASGITransport(app=standin)
+        concurrency = concurrency or 10
+    # the in-process stand-in starts empty every run, so cached ids would never exist there
+    cache = None
+    if not (args.no_receiver_cache or args.standin or args.dry_run):
+        cache = ReceiverCache(args.receiver_cache, url)
+        if args.verify_receiver_cache:
+            cache.verify(timeout=timeout)
+    statuses = (429, 503) + (RetryPolicy.gateway_statuses if args.retry_gateway_errors else ())
+    retry = RetryPolicy(retries=args.retries, backoff=args.backoff, statuses=statuses) if args.retries > 0 else None
+    limiter = None
+    if args.adaptive:
+        concurrency = concurrency or 10
+        limiter = AdaptiveLimiter(initial=concurrency, maximum=args.max_concurrency or concurrency * 4)
+
+    if args.workers:
+        seed = args.seed if args.seed is not None else random.randrange(2**32)
+        started = time.perf_counter()
+        written = generate_dataset(
+            seed=seed,
+            workers=args.workers,
+            shards=args.shards,
+            output_dir=args.dataset_dir,
+            services=args.services,
+            chains_per_service=args.chains_per_service,
+            compression=args.compress,
+        )
+        for path, count in written:
+            print(f"Wrote {count} events to {path}")
+        total = sum(count for _, count in written)
+        elapsed = time.perf_counter() - started
+        print(f"Generated {total} events in {elapsed:.1f}s with seed {seed} ({total / elapsed:,.0f} events/sec)")
+        return
+
+    if args.benchmark:
+        duration = args.duration
+        if duration is None and args.count is None:
+            duration = 10.0
+        report = asyncio.run(
+            run_benchmark(
+                url=url,
+                timeout=timeout,
+                concurrency=concurrency or 10,
+                duration=duration,
+                count=args.count,
+                services=args.services,
+                chains_per_service=args.chains_per_service,
+                transport=transport,
+            )
+        )
+        print(format_benchmark_table(report))
+        output_dir = os.path.dirname(args.benchmark_output)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+        with open(args.benchmark_output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote benchmark results to {args.benchmark_output}")
+        return
 
     event_receivers = generate_event_receivers()
     evr_results = {}
     if not args.dry_run:
         print(f"Posting {len(event_receivers)} event receivers to {url}/api/v1/receivers")
-        evr_results = post_event_receivers(event_receivers, url=url, timeout=timeout)
+        if concurrency:
+            evr_results = asyncio.run(
+                apost_event_receivers(
+                    event_receivers,
+                    url=url,
+                    timeout=timeout,
+                    concurrency=concurrency,
+                    transport=transport,
+                    retry=retry,
+                    limiter=limiter,
+                    cache=cache,
+                )
+            )
+        else:
+            evr_results = post_event_receivers(event_receivers, url=url, timeout=timeout, retry=retry, cache=cache)
+        if cache is not None:
+            print(cache.summary())
     else:
         print("Dry run: curl commands for event receivers:")
         for evr in event_receivers:
@@ -384,8 +1627,16 @@ def main() -> None:
         for evr_type, result in evr_results.items():
             status = result.get("status")
             status_str = str(status) if status is not None else "ERROR" 
+            if result.get("cached"):
+                status_str = "cached"
             print(f"{evr_type}: {status_str}")
-    events = generate_events(evrs=evr_results)
+    repair = None
+    if cache is not None:
+        repair = ReceiverRepair(event_receivers, evr_results, cache, url=url, timeout=timeout, retry=retry)
+    clock = SeededClock(args.seed) if args.seed is not None else None
+    events = iter_events(
+        evrs=evr_results, services=args.services, chains_per_service=args.chains_per_service, clock=clock
+    )
     if args.write_to_disk:
         os.makedirs("epr_reports/event_receivers", exist_ok=True)
         for evr in event_receivers:
@@ -394,37 +1645,53 @@ def main() -> None:
             with open(filename, "w") as f:
                 json.dump(evr, f, indent=2)
             print(f"Wrote event receiver {evr_type} to {filename}")
-        os.makedirs("epr_reports/events", exist_ok=True)
-        for idx, event in enumerate(events, start=1):
-            filename = f"epr_reports/events/event_{idx:03d}_{event['name']}_{event['version']}.json"
-            with open(filename, "w") as f:
-                json.dump(event, f, indent=2)
-            print(f"Wrote event {event['payload']['context']['id']} to {filename}")
-        print(f"Wrote {len(events)} events to disk in the 'epr_reports/events' directory")
         # Write curl commands
         with open("epr_reports/curl_commands_event_receivers.txt", "w") as f:
             for evr in event_receivers:
                 curl = make_curl_command(evr, f"{url}/api/v1/receivers")
                 f.write(curl + "\n")
-        with open("epr_reports/curl_commands_events.txt", "w") as f:
-            for event in events:
-                curl = make_curl_command(event, f"{url}/api/v1/events")
-                f.write(curl + "\n")
-        print("Wrote curl commands to epr_reports/curl_commands_event_receivers.txt and epr_reports/curl_commands_events.txt")
+        # Events are written as they stream past on their way to the dry-run or post path
+        if args.output_format == "ndjson":
+            path = args.output or f"epr_reports/events.ndjson{SUFFIXES[args.compress]}"
+            events = write_events_ndjson(events, path=path, compression=args.compress)
+        else:
+            events = write_events_to_disk(events, url=url)
     if args.dry_run:
         print("Dry run: curl commands for events:")
         for event in events:
             curl = make_curl_command(event, f"{url}/api/v1/events")
             print(curl)
     else:
-        results = post_events(events, url=url, timeout=timeout)
-        success = 0
-        for ev_id, status, resp_text in results:
-            status_str = str(status) if status is not None else "ERROR"
-            print(f"{ev_id}: {status_str}")
-            if status and 200 <= status < 300:
-                success += 1
-        print(f"Posted {success}/{len(results)} events successfully")
+        summary = PostSummary()
+
+        def report(result: Tuple[Optional[str], Optional[int], str]) -> None:
+            ev_id, status, _ = result
+            print(f"{ev_id}: {status if status is not None else 'ERROR'}")
+            summary.record(result)
+
+        if concurrency:
+            asyncio.run(
+                apost_events(
+                    events,
+                    url=url,
+                    timeout=timeout,
+                    concurrency=concurrency,
+                    transport=transport,
+                    retry=retry,
+                    limiter=limiter,
+                    repair=repair,
+                    on_result=report,
+                )
+            )
+        else:
+            post_events(events, url=url, timeout=timeout, retry=retry, repair=repair, on_result=report)
+        print(f"Posted {summary.succeeded}/{summary.posted} events successfully")
+        if repair is not None and repair.replaced:
+            print(repair.summary())
+        if retry is not None:
+            print(retry.summary())
+        if limiter is not None:
+            print(limiter.summary())
 
 
 if __name__ == "__main__":
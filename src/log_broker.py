@@ -0,0 +1,718 @@
+#!/usr/bin/env python3
+# log_broker.py
+"""
+Durable, file-backed EventBroker: a local, dependency-free stand-in for the
+Redpanda topic used in the workshop.
+
+Events are appended to a segmented log on disk, one `<base offset>.log` file
+per segment, each with a sparse `<base offset>.index` of (offset, position)
+entries every `index_interval` bytes. Records carry a CRC, so a torn write
+at the tail is truncated when the log is reopened. Appends go to the page
+cache and a background task fsyncs them in batches every `fsync_interval`
+seconds; `publish(event, sync=True)` waits for the batch that covers its
+event. Reads go through read-only memory maps of the segment files.
+
+A subscriber given a name is a durable consumer with a committed offset,
+stored in `consumer-offsets.json`, so after a restart it resumes where it
+left off, or replays from any offset. Delivery is at least once: the
+committed offset never moves past an event whose callback raised, so that
+event and the ones after it are delivered again after a restart. Sealed
+segments can be deleted by size or age (retention) and rewritten to keep
+only the newest event per subject (compaction, in a worker thread), as a
+compacted Kafka topic would.
+"""
+
+import argparse
+import asyncio
+import bisect
+import json
+import logging
+import mmap
+import os
+import re
+import struct
+import threading
+import time
+import zlib
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from cdevents_pipeline import CDEvent, EventBroker, PipelineOrchestrator
+from event_routing import SubscriptionIndex
+
+logger = logging.getLogger(__name__)
+
+# crc32, offset, timestamp (ms), key length, value length; the crc covers everything after itself
+HEADER = struct.Struct(">IQqHI")
+# offset relative to the segment's base offset, byte position in the segment
+INDEX_ENTRY = struct.Struct(">II")
+
+Record = Tuple[int, int, bytes, bytes]  # offset, timestamp (ms), key, value
+
+
+def encode_record(offset: int, timestamp: int, key: bytes, value: bytes) -> bytes:
+    body = HEADER.pack(0, offset, timestamp, len(key), len(value))[4:] + key + value
+    return struct.pack(">I", zlib.crc32(body)) + body
+
+
+def read_records(path: str, size: int) -> List[Record]:
+    """The first `size` bytes of a segment file as records, read through a handle of its own."""
+    with open(path, "rb") as f:
+        data = f.read(size)
+    records: List[Record] = []
+    position = 0
+    while position + HEADER.size <= len(data):
+        _, offset, timestamp, key_length, value_length = HEADER.unpack_from(data, position)
+        start = position + HEADER.size
+        position = start + key_length + value_length
+        records.append((offset, timestamp, data[start : start + key_length], data[start + key_length : position]))
+    return records
+
+
+class Segment:
+    """One log file and its sparse index."""
+
+    def __init__(self, directory: str, base_offset: int, index_interval: int):
+        self.base_offset = base_offset
+        self.path = os.path.join(directory, f"{base_offset:020d}.log")
+        self.index_path = os.path.join(directory, f"{base_offset:020d}.index")
+        self.index_interval = index_interval
+        self.index_offsets: List[int] = []
+        self.index_positions: List[int] = []
+        self.size = 0
+        self.next_offset = base_offset
+        self.max_timestamp = 0
+        self._indexed_at = 0
+        self._log: Optional[Any] = None
+        self._index: Optional[Any] = None
+        self._reader: Optional[Any] = None
+        self._map: Optional[mmap.mmap] = None
+
+    def load(self) -> None:
+        """Read the index and validate the tail of the log, truncating a torn last record."""
+        if not os.path.exists(self.path):
+            open(self.path, "ab").close()
+        size = os.path.getsize(self.path)
+        data = b""
+        if os.path.exists(self.index_path):
+            with open(self.index_path, "rb") as f:
+                data = f.read()
+        for relative, position in INDEX_ENTRY.iter_unpack(data[: len(data) - len(data) % INDEX_ENTRY.size]):
+            # the index may be ahead of a truncated log
+            if position < size and (not self.index_positions or position > self.index_positions[-1]):
+                self.index_offsets.append(self.base_offset + relative)
+                self.index_positions.append(position)
+        while True:
+            start = self.index_positions[-1] if self.index_positions else 0
+            valid, records = self._scan(start, size)
+            if records or not self.index_positions:
+                break
+            # the indexed record itself is torn: fall back to the previous entry
+            self.index_offsets.pop()
+            self.index_positions.pop()
+        if valid < size:
+            logger.warning(f"Truncating {self.path} from {size} to {valid} bytes: incomplete or corrupt record")
+            with open(self.path, "r+b") as f:
+                f.truncate(valid)
+                os.fsync(f.fileno())
+        self.size = valid
+        self._indexed_at = self.index_positions[-1] if self.index_positions else 0
+        # index the scanned tail too, which rebuilds a lost index
+        position = start
+        for offset, timestamp, length in records:
+            if position - self._indexed_at >= self.index_interval:
+                self.index_offsets.append(offset)
+                self.index_positions.append(position)
+                self._indexed_at = position
+            position += length
+            self.next_offset = offset + 1
+            self.max_timestamp = timestamp
+        with open(self.index_path, "wb") as f:
+            f.write(
+                b"".join(
+                    INDEX_ENTRY.pack(o - self.base_offset, p) for o, p in zip(self.index_offsets, self.index_positions)
+                )
+            )
+
+    def _scan(self, start: int, size: int) -> Tuple[int, List[Tuple[int, int, int]]]:
+        """Return the end of the last valid record after `start` and each record's (offset, timestamp, length)."""
+        with open(self.path, "rb") as f:
+            f.seek(start)
+            data = f.read(size - start)
+        records = []
+        position = 0
+        while position + HEADER.size <= len(data):
+            crc, offset, timestamp, key_length, value_length = HEADER.unpack_from(data, position)
+            end = position + HEADER.size + key_length + value_length
+            if end > len(data) or zlib.crc32(data[position + 4 : end]) != crc:
+                break
+            records.append((offset, timestamp, end - position))
+            position = end
+        return start + position, records
+
+    def open_for_append(self) -> None:
+        self._log = open(self.path, "ab")
+        self._index = open(self.index_path, "ab")
+
+    def append(self, offset: int, timestamp: int, key: bytes, value: bytes) -> None:
+        if self.size - self._indexed_at >= self.index_interval:
+            self._index.write(INDEX_ENTRY.pack(offset - self.base_offset, self.size))
+            self.index_offsets.append(offset)
+            self.index_positions.append(self.size)
+            self._indexed_at = self.size
+        record = encode_record(offset, timestamp, key, value)
+        self._log.write(record)
+        self.size += len(record)
+        self.next_offset = offset + 1
+        self.max_timestamp = timestamp
+
+    def flush(self) -> None:
+        if self._log is not None:
+            self._log.flush()
+            self._index.flush()
+
+    def file_descriptors(self) -> List[int]:
+        return [self._log.fileno(), self._index.fileno()] if self._log is not None else []
+
+    def seal(self) -> None:
+        """Flush, fsync and close the append handles; the segment is read-only from now on."""
+        if self._log is not None:
+            self.flush()
+            os.fsync(self._log.fileno())
+            os.fsync(self._index.fileno())
+            self._log.close()
+            self._index.close()
+            self._log = self._index = None
+
+    def _view(self) -> Optional[mmap.mmap]:
+        """A read-only map covering at least `size` bytes, remapped when the segment has grown."""
+        if self.size == 0:
+            return None
+        if self._map is None or len(self._map) < self.size:
+            if self._map is not None:
+                self._map.close()
+            if self._reader is None:
+                self._reader = open(self.path, "rb")
+            self._map = mmap.mmap(self._reader.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._map
+
+    def read(self, from_offset: int, max_records: int) -> List[Record]:
+        view = self._view()
+        if view is None:
+            return []
+        i = bisect.bisect_right(self.index_offsets, from_offset) - 1
+        position = self.index_positions[i] if i >= 0 else 0
+        records = []
+        while position < self.size and len(records) < max_records:
+            _, offset, timestamp, key_length, value_length = HEADER.unpack_from(view, position)
+            start = position + HEADER.size
+            position = start + key_length + value_length
+            if offset >= from_offset:
+                key_end = start + key_length
+                records.append((offset, timestamp, view[start:key_end], view[key_end:position]))
+        return records
+
+    def release(self) -> None:
+        """Drop the map and read handle, e.g. before the file is replaced or deleted."""
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._reader is not None:
+            self._reader.close()
+            self._reader = None
+
+    def close(self) -> None:
+        self.seal()
+        self.release()
+
+    def delete(self) -> None:
+        self.close()
+        for path in (self.path, self.index_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+class SegmentLog:
+    """
+    Append-only log of (key, value) records with consecutive offsets, split
+    into segments of about `segment_bytes`. Appends are written but not
+    fsynced; call sync() to make everything appended so far durable.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        segment_bytes: int = 64 * 1024 * 1024,
+        index_interval: int = 4096,
+        retention_bytes: Optional[int] = None,
+        retention_ms: Optional[int] = None,
+        compact: bool = False,
+    ):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.index_interval = index_interval
+        self.retention_bytes = retention_bytes
+        self.retention_ms = retention_ms
+        self.compact_on_roll = compact
+        # append/roll run on the event loop while sync() may fsync from a worker thread
+        self.lock = threading.Lock()
+        self.segments: List[Segment] = []
+        for name in sorted(os.listdir(directory)):
+            if name.endswith(".compacting"):
+                # left over from a compaction that did not finish; the original segment is intact
+                os.remove(os.path.join(directory, name))
+            elif name.endswith(".log"):
+                segment = Segment(directory, int(name[:-4]), index_interval)
+                segment.load()
+                self.segments.append(segment)
+        if not self.segments:
+            segment = Segment(directory, 0, index_interval)
+            segment.load()
+            self.segments.append(segment)
+        self.active.open_for_append()
+        self.next_offset = self.active.next_offset
+        self.synced_offset = self.next_offset
+        self.unsynced = 0
+        self.syncs = 0
+        self.compaction_due = False
+        self._flushed = True
+
+    @property
+    def active(self) -> Segment:
+        return self.segments[-1]
+
+    @property
+    def start_offset(self) -> int:
+        return self.segments[0].base_offset
+
+    @property
+    def size(self) -> int:
+        return sum(segment.size for segment in self.segments)
+
+    def append(self, value: bytes, key: bytes = b"", timestamp: Optional[int] = None) -> int:
+        with self.lock:
+            if self.active.size >= self.segment_bytes:
+                self._roll()
+            offset = self.next_offset
+            self.active.append(offset, int(time.time() * 1000) if timestamp is None else timestamp, key, value)
+            self.next_offset += 1
+            self.unsynced += 1
+            self._flushed = False
+        return offset
+
+    def flush(self) -> None:
+        """Hand buffered appends to the OS so readers (and other processes) see them."""
+        if not self._flushed:
+            with self.lock:
+                self.active.flush()
+                self._flushed = True
+
+    def sync(self) -> int:
+        """fsync everything appended so far and return the offset it is durable up to."""
+        with self.lock:
+            self.active.flush()
+            self._flushed = True
+            target = self.next_offset
+            # duplicated descriptors stay valid even if the segment rolls while we fsync
+            fds = [os.dup(fd) for fd in self.active.file_descriptors()]
+            self.unsynced = 0
+        try:
+            for fd in fds:
+                os.fsync(fd)
+        finally:
+            for fd in fds:
+                os.close(fd)
+        self.synced_offset = max(self.synced_offset, target)
+        self.syncs += 1
+        return target
+
+    def _roll(self) -> None:
+        self.active.seal()
+        segment = Segment(self.directory, self.next_offset, self.index_interval)
+        segment.load()
+        segment.open_for_append()
+        self.segments.append(segment)
+        # compaction rewrites whole segments; LogEventBroker runs it in a worker thread, not in append()
+        self.compaction_due = self.compact_on_roll
+        self.enforce_retention()
+
+    def read(self, from_offset: int, max_records: int = 1000) -> List[Record]:
+        """Records with offset >= from_offset, oldest first, copied out of the mapped segments."""
+        self.flush()
+        i = max(0, bisect.bisect_right([s.base_offset for s in self.segments], from_offset) - 1)
+        records: List[Record] = []
+        for segment in self.segments[i:]:
+            records += segment.read(from_offset, max_records - len(records))
+            if len(records) >= max_records:
+                break
+        return records
+
+    def enforce_retention(self) -> int:
+        """Delete the oldest sealed segments beyond retention_bytes or older than retention_ms."""
+        removed = 0
+        cutoff = time.time() * 1000 - self.retention_ms if self.retention_ms is not None else None
+        while len(self.segments) > 1:
+            oldest = self.segments[0]
+            too_big = self.retention_bytes is not None and self.size > self.retention_bytes
+            too_old = cutoff is not None and oldest.max_timestamp < cutoff
+            if not (too_big or too_old):
+                break
+            oldest.delete()
+            self.segments.pop(0)
+            removed += 1
+        return removed
+
+    def compact(self) -> int:
+        """
+        Rewrite sealed segments keeping only the newest record for each key
+        (records without a key are kept). Offsets do not change, so the
+        compacted log simply has gaps. Returns the records removed.
+        """
+        return self.install_compaction(self.prepare_compaction())
+
+    def prepare_compaction(self) -> List[Tuple[Segment, Segment, int]]:
+        """
+        The slow half of compact(), safe to run in a worker thread while the
+        log is appended to and read: reads the segment files through handles
+        of its own and writes each compacted segment to `.compacting` files.
+        Returns (segment, replacement, records removed) for install_compaction().
+        """
+        with self.lock:
+            self.active.flush()
+            self._flushed = True
+            sealed = self.segments[:-1]
+            active_path, active_size = self.active.path, self.active.size
+        latest: Dict[bytes, int] = {}
+        contents = []
+        for segment in sealed:
+            try:
+                records = read_records(segment.path, segment.size)
+            except FileNotFoundError:
+                # deleted by retention meanwhile
+                continue
+            contents.append((segment, records))
+            for offset, _, key, _ in records:
+                if key:
+                    latest[key] = offset
+        for offset, _, key, _ in read_records(active_path, active_size):
+            if key:
+                latest[key] = offset
+        plans = []
+        for segment, records in contents:
+            kept = [record for record in records if not record[2] or latest[record[2]] == record[0]]
+            if len(kept) == len(records):
+                continue
+            compacted = Segment(self.directory, segment.base_offset, self.index_interval)
+            compacted.path += ".compacting"
+            compacted.index_path += ".compacting"
+            with open(compacted.path, "wb") as f:
+                f.write(b"".join(encode_record(*record) for record in kept))
+                f.flush()
+                os.fsync(f.fileno())
+            compacted.load()
+            # a compacted segment may have lost its last records, not its place in the offset sequence
+            compacted.next_offset = segment.next_offset
+            compacted.max_timestamp = max(compacted.max_timestamp, segment.max_timestamp)
+            plans.append((segment, compacted, len(records) - len(kept)))
+        return plans
+
+    def install_compaction(self, plans: List[Tuple[Segment, Segment, int]]) -> int:
+        """
+        Swap prepared segments in; call it from the thread that reads the log
+        (LogEventBroker: the event loop), since the old maps are closed here.
+        """
+        removed = 0
+        with self.lock:
+            for segment, compacted, count in plans:
+                if segment not in self.segments:
+                    for path in (compacted.path, compacted.index_path):
+                        os.remove(path)
+                    continue
+                segment.release()
+                os.replace(compacted.path, segment.path)
+                os.replace(compacted.index_path, segment.index_path)
+                compacted.path, compacted.index_path = segment.path, segment.index_path
+                self.segments[self.segments.index(segment)] = compacted
+                removed += count
+        return removed
+
+    def close(self) -> None:
+        with self.lock:
+            for segment in self.segments:
+                segment.close()
+        self.synced_offset = self.next_offset
+
+
+def event_to_record(event: CDEvent) -> Tuple[bytes, bytes]:
+    """Value and key of the log record for an event; the key (subject id) is what compaction keeps one of."""
+    return event.encode(), event.subject.id.encode("utf-8")
+
+
+def event_from_record(value: bytes) -> CDEvent:
+    return CDEvent.from_record(value)
+
+
+# encode() writes the context first with "type" after version, id, chainId and source,
+# and a quote inside a string value is escaped, so the first match is context.type
+RECORD_TYPE_RE = re.compile(rb',"type":("(?:[^"\\]|\\.)*")')
+
+
+def record_type(value: bytes) -> str:
+    """context.type of a log record, read without decoding the event"""
+    match = RECORD_TYPE_RE.search(value)
+    return json.loads(match.group(1)) if match else ""
+
+
+class Consumer:
+    """A named subscriber reading the log from its own position."""
+
+    def __init__(self, name: str, event_types: List[str], callback, position: int, durable: bool = True):
+        self.name = name
+        self.durable = durable
+        self.patterns = SubscriptionIndex()
+        for event_type in event_types:
+            self.patterns.add(event_type, event_type)
+        self.event_types = event_types
+        self.callback = callback
+        self.position = position
+        self.wakeup = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+        self.delivered = 0
+        self.failed = 0
+        # offset of the first event the callback failed on; nothing at or after it is committed
+        self.held: Optional[int] = None
+        self.max_delay = 0.0
+
+
+class LogEventBroker(EventBroker):
+    """
+    EventBroker over a SegmentLog in `directory`. A subscriber passes a
+    name to be a durable consumer, so a restarted service picks up its
+    committed offset; without a committed offset it starts at `start`
+    ("latest" or "earliest"), or at an explicit `from_offset` to replay.
+    Unnamed subscribers are not committed and start the same way each time.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        fsync_interval: float = 0.05,
+        segment_bytes: int = 64 * 1024 * 1024,
+        index_interval: int = 4096,
+        retention_bytes: Optional[int] = None,
+        retention_ms: Optional[int] = None,
+        compact: bool = False,
+        start: str = "latest",
+        batch_size: int = 500,
+    ):
+        if start not in ("latest", "earliest"):
+            raise ValueError(f"start must be latest or earliest, not {start!r}")
+        self.log = SegmentLog(directory, segment_bytes, index_interval, retention_bytes, retention_ms, compact)
+        self.fsync_interval = fsync_interval
+        self.start = start
+        self.batch_size = batch_size
+        self.offsets_path = os.path.join(directory, "consumer-offsets.json")
+        self.committed: Dict[str, int] = {}
+        if os.path.exists(self.offsets_path):
+            with open(self.offsets_path) as f:
+                self.committed = json.load(f)
+        self.consumers: List[Consumer] = []
+        self._committed_dirty = False
+        self._sync_waiters: List[Tuple[int, asyncio.Future]] = []
+        self._flusher: Optional[asyncio.Task] = None
+        self._compactor: Optional[asyncio.Task] = None
+        self._anonymous = 0
+
+    async def publish(self, event: CDEvent, sync: bool = False) -> int:
+        """Append event to the log and return its offset; with sync=True, return once it is fsynced."""
+        logger.info(f"Publishing event: {event.context.type}")
+        value, key = event_to_record(event)
+        offset = self.log.append(value, key)
+        for consumer in self.consumers:
+            consumer.wakeup.set()
+        self._start_flusher()
+        if self.log.compaction_due and (self._compactor is None or self._compactor.done()):
+            self.log.compaction_due = False
+            self._compactor = asyncio.get_running_loop().create_task(self._compact(), name="log compactor")
+        if sync and offset >= self.log.synced_offset:
+            waiter = asyncio.get_running_loop().create_future()
+            self._sync_waiters.append((offset, waiter))
+            await waiter
+        return offset
+
+    async def subscribe(self, event_types: List[str], callback, name: Optional[str] = None, from_offset=None):
+        """
+        Start a consumer for these event types or patterns (see event_routing.py).
+        Only a named consumer commits its offset; a name must be unique in the broker.
+        """
+        durable = name is not None
+        if durable:
+            if any(c.name == name for c in self.consumers):
+                raise ValueError(f"a consumer named {name!r} is already subscribed")
+        else:
+            # callbacks of different instances share a qualified name, so number anonymous consumers
+            self._anonymous += 1
+            name = f"{getattr(callback, '__qualname__', repr(callback))}#{self._anonymous}"
+        if from_offset is not None:
+            position = from_offset
+        elif durable and name in self.committed:
+            position = self.committed[name] + 1
+        else:
+            position = self.log.next_offset if self.start == "latest" else self.log.start_offset
+        consumer = Consumer(name, event_types, callback, position, durable)
+        self.consumers.append(consumer)
+        consumer.task = asyncio.get_running_loop().create_task(self._consume(consumer), name=f"consumer {name}")
+        self._start_flusher()
+
+    async def _consume(self, consumer: Consumer) -> None:
+        while True:
+            records = self.log.read(consumer.position, self.batch_size)
+            if not records:
+                consumer.wakeup.clear()
+                await consumer.wakeup.wait()
+                continue
+            for offset, timestamp, _, value in records:
+                if consumer.patterns.match(record_type(value)):
+                    event = event_from_record(value)
+                    consumer.max_delay = max(consumer.max_delay, time.time() - timestamp / 1000)
+                    try:
+                        await consumer.callback(event)
+                    except Exception:
+                        consumer.failed += 1
+                        if consumer.held is None:
+                            consumer.held = offset
+                        logger.exception(
+                            f"Consumer {consumer.name} failed handling offset {offset}; "
+                            f"its committed offset stays before {consumer.held}"
+                        )
+                    consumer.delivered += 1
+                consumer.position = offset + 1
+                if consumer.durable and consumer.held is None:
+                    self.committed[consumer.name] = offset
+                    self._committed_dirty = True
+
+    def _start_flusher(self) -> None:
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.get_running_loop().create_task(self._flush_periodically(), name="log flusher")
+
+    async def _flush_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.fsync_interval)
+            await self.sync()
+
+    async def sync(self) -> None:
+        """fsync the log and the committed offsets now, and release publishers waiting on it."""
+        if self.log.unsynced:
+            durable = await asyncio.to_thread(self.log.sync)
+            waiting, self._sync_waiters = self._sync_waiters, []
+            for offset, waiter in waiting:
+                if offset < durable:
+                    if not waiter.done():
+                        waiter.set_result(offset)
+                else:
+                    self._sync_waiters.append((offset, waiter))
+        if self._committed_dirty:
+            self._committed_dirty = False
+            await asyncio.to_thread(self._write_offsets, dict(self.committed))
+
+    async def _compact(self) -> None:
+        try:
+            plans = await asyncio.to_thread(self.log.prepare_compaction)
+        except OSError:
+            logger.exception(f"Compacting {self.log.directory} failed")
+            return
+        # installed on the event loop, where consumers read the segments being replaced
+        removed = self.log.install_compaction(plans)
+        logger.info(f"Compacted {self.log.directory}: {removed} superseded records removed")
+
+    def _write_offsets(self, committed: Dict[str, int]) -> None:
+        tmp = self.offsets_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(committed, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.offsets_path)
+
+    async def drain(self) -> None:
+        """
+        Wait until every consumer has read to the end of the log, including
+        events published meanwhile. A consumer whose task has stopped never
+        catches up, so its exception is raised instead of waiting forever.
+        """
+        while True:
+            behind = [c for c in self.consumers if c.position < self.log.next_offset]
+            if not behind:
+                return
+            for consumer in behind:
+                if consumer.task is not None and consumer.task.done():
+                    if not consumer.task.cancelled() and consumer.task.exception() is not None:
+                        raise consumer.task.exception()
+                    raise RuntimeError(f"consumer {consumer.name} stopped at offset {consumer.position}")
+            await asyncio.sleep(0.01)
+
+    async def close(self) -> None:
+        """Stop consumers, fsync and close the log"""
+        for consumer in self.consumers:
+            if consumer.task is not None:
+                consumer.task.cancel()
+        await asyncio.gather(*(c.task for c in self.consumers if c.task is not None), return_exceptions=True)
+        if self._flusher is not None:
+            self._flusher.cancel()
+            await asyncio.gather(self._flusher, return_exceptions=True)
+        if self._compactor is not None:
+            await asyncio.gather(self._compactor, return_exceptions=True)
+        await self.sync()
+        self.log.close()
+
+    def replay(self, from_offset: int = 0) -> Iterator[Tuple[int, CDEvent]]:
+        """(offset, event) for every retained event from `from_offset` on"""
+        position = from_offset
+        while True:
+            records = self.log.read(position, self.batch_size)
+            if not records:
+                return
+            for offset, _, _, value in records:
+                yield offset, event_from_record(value)
+            position = records[-1][0] + 1
+
+    @property
+    def events(self) -> Iterator[CDEvent]:
+        """Retained events, oldest first, like InMemoryEventBroker.events"""
+        return (event for _, event in self.replay(self.log.start_offset))
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """Per-consumer position, committed offset and lag"""
+        return [
+            {
+                "pattern": ", ".join(c.event_types),
+                "subscriber": c.name,
+                "position": c.position,
+                "committed": self.committed.get(c.name) if c.durable else None,
+                "held_at": c.held,
+                "lag": self.log.next_offset - c.position,
+                "delivered": c.delivered,
+                "failed": c.failed,
+                "max_delay_ms": round(c.max_delay * 1000, 3),
+            }
+            for c in self.consumers
+        ]
+
+
+async def run(directory: str) -> None:
+    """Run the pipeline simulation over the durable broker"""
+    orchestrator = PipelineOrchestrator(broker=LogEventBroker(directory))
+    await orchestrator.run_pipeline()
+    log = SegmentLog(directory)
+    print(f"Log {directory}: offsets {log.start_offset}..{log.next_offset - 1}, {len(log.segments)} segment(s)")
+    log.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run the CDEvents pipeline over a durable segment-log broker.")
+    parser.add_argument("--data-dir", default="event_log", help="Directory for log segments and consumer offsets")
+    args = parser.parse_args()
+    asyncio.run(run(args.data_dir))
+
+
+if __name__ == "__main__":
+    main()
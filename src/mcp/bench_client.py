@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# bench_client.py
+"""
+Tool-call latency benchmark for the MCP server's EPR client.
+
+Compares the old pattern (a fresh httpx.AsyncClient, and so a fresh
+connection, per tool call) with the shared pooled client used by main.py.
+By default it runs against a local keep-alive stub server; pass --url to
+measure a real EPR instance, where the TLS handshake saved is larger still.
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Awaitable, Callable, List, Tuple
+
+import httpx
+
+import main as epr_mcp
+
+EVENT_ID = "01HF7YAT00QGS4HZJE5EQRQFDF"
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Answers every GET with a canned event and every POST with an empty search result."""
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def _reply(self, payload: dict) -> None:
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        self._reply({"data": [{"id": self.path.rsplit("/", 1)[-1], "name": "foo", "version": "1.0.0"}]})
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self._reply({"data": {"events": []}})
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub() -> Tuple[ThreadingHTTPServer, str]:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+async def fetch_event_per_call(id: str) -> str:
+    """fetch_event as it was before the shared client: one client per call."""
+    async with httpx.AsyncClient() as client:
+        response = await client.get(f"{epr_mcp.cfg.url}/api/v1/events/{id}")
+        return response.text
+
+
+async def measure(call: Callable[[str], Awaitable[str]], count: int, concurrency: int) -> Tuple[List[float], float]:
+    """
+    Issue `count` tool calls, `concurrency` at a time; return per-call
+    latencies and wall time. Every call asks for a different id, so
+    concurrent calls are not coalesced into one request.
+    """
+    latencies: List[float] = []
+    pending = iter(range(count))
+
+    async def worker() -> None:
+        for n in pending:
+            start = time.perf_counter()
+            await call(f"{EVENT_ID[:-6]}{n:06d}")
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, time.perf_counter() - start
+
+
+def report(label: str, latencies: List[float], elapsed: float) -> None:
+    ordered = sorted(latencies)
+    p95 = ordered[int(len(ordered) * 0.95) - 1]
+    print(
+        f"{label:<28} {len(ordered) / elapsed:>10,.0f} calls/sec"
+        f" {statistics.mean(ordered) * 1000:>8.2f} ms mean"
+        f" {statistics.median(ordered) * 1000:>8.2f} ms p50"
+        f" {p95 * 1000:>8.2f} ms p95"
+    )
+
+
+async def run(count: int, concurrency: int) -> None:
+    # time the HTTP client, not the response cache
+    epr_mcp.response_cache = None
+    for c in sorted({1, concurrency}):
+        # warm up once so neither side pays interpreter/import costs
+        await measure(fetch_event_per_call, 10, 1)
+        report(f"per-call client (c={c})", *await measure(fetch_event_per_call, count, c))
+        await measure(epr_mcp.fetch_event, 10, 1)
+        report(f"shared pooled client (c={c})", *await measure(epr_mcp.fetch_event, count, c))
+    await epr_mcp.close_client()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare per-call and pooled EPR clients for MCP tool calls.")
+    parser.add_argument("--url", default=None, help="EPR URL to benchmark (default: a local stub server)")
+    parser.add_argument("--count", "-n", type=int, default=1000, help="Tool calls per run")
+    parser.add_argument("--concurrency", "-c", type=int, default=10, help="Concurrent tool calls for the second run")
+    args = parser.parse_args()
+
+    server = None
+    if args.url is None:
+        server, args.url = start_stub()
+    epr_mcp.cfg.url = args.url
+    print(f"Benchmarking fetch_event against {args.url}")
+    try:
+        asyncio.run(run(args.count, args.concurrency))
+    finally:
+        if server is not None:
+            server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# bench_singleflight.py
+"""
+Concurrency check for request coalescing in the MCP server.
+
+Fires bursts of concurrent identical fetch_* and search_* tool calls at the
+in-process EPR stand-in (../epr_standin.py) and verifies that each burst
+reached the server once. The response cache is switched off so every call
+would otherwise go upstream. Exits non-zero if coalescing did not happen.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+import httpx
+
+import main as epr_mcp
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from epr_standin import EPRStandIn  # noqa: E402
+
+
+async def burst(app: EPRStandIn, label: str, calls: int, expected: int, make_call) -> bool:
+    """Run `calls` tool calls at once and compare the upstream requests with `expected`."""
+    before = app.requests
+    start = time.perf_counter()
+    results = await asyncio.gather(*(make_call(i) for i in range(calls)))
+    elapsed = time.perf_counter() - start
+    upstream = app.requests - before
+    ok = upstream == expected and all(r == results[i % expected] for i, r in enumerate(results))
+    status = "ok" if ok else "FAIL"
+    print(f"{label:<28} {calls:>5} calls {upstream:>5} upstream requests {elapsed * 1000:>8.1f} ms  {status}")
+    return ok
+
+
+async def run(calls: int, latency: float) -> bool:
+    app = EPRStandIn(latency=latency)
+    epr_mcp.cfg.url = "http://epr"
+    epr_mcp.response_cache = None
+    epr_mcp.http_client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app))
+
+    receiver = app.store.create_receiver({"name": "foo", "version": "1.0.0", "type": "dev.cdevents.build.finished"})
+    ids = [
+        app.store.create_event({"name": "foo", "version": "1.0.0", "package": "oci", "event_receiver_id": receiver})
+        for _ in range(4)
+    ]
+
+    results = [
+        await burst(app, "fetch_event, one id", calls, 1, lambda i: epr_mcp.fetch_event(ids[0])),
+        await burst(app, "fetch_event, four ids", calls, 4, lambda i: epr_mcp.fetch_event(ids[i % 4])),
+        await burst(app, "fetch_receiver, one id", calls, 1, lambda i: epr_mcp.fetch_receiver(receiver)),
+        await burst(app, "search_events, one query", calls, 1, lambda i: epr_mcp.search_events({"package": "oci"})),
+        await burst(
+            app,
+            "search_events, two pages",
+            calls,
+            2,
+            lambda i: epr_mcp.search_events({"package": "oci"}, limit=2, cursor=str(i % 2 * 2)),
+        ),
+    ]
+    print(f"single_flight counters: {epr_mcp.single_flight.stats()}")
+    await epr_mcp.close_client()
+    return all(results)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Check that concurrent identical MCP lookups are coalesced.")
+    parser.add_argument("--calls", "-n", type=int, default=200, help="Concurrent tool calls per burst")
+    parser.add_argument("--latency", type=float, default=0.05, help="Stand-in latency per request in seconds")
+    args = parser.parse_args()
+    if not asyncio.run(run(args.calls, args.latency)):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
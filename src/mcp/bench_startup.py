@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# bench_startup.py
+"""
+Cold start benchmark for the MCP server.
+
+Spawns `main.py` over stdio the way an MCP client does and times three
+stages: importing the module, the answer to `initialize`, and the answer
+to the first tool call (time-to-first-tool-response). The median over
+--runs is compared with --budget; the script exits non-zero when the budget
+is exceeded, so it can guard against cold start regressions.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Tuple
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+MAIN = os.path.join(HERE, "main.py")
+
+
+def send(proc: subprocess.Popen, message: Dict[str, Any]) -> None:
+    proc.stdin.write((json.dumps(message) + "\n").encode("utf-8"))
+    proc.stdin.flush()
+
+
+def wait_for(proc: subprocess.Popen, id: int) -> Dict[str, Any]:
+    """Read JSON-RPC messages from the server until the response to `id` arrives."""
+    for line in proc.stdout:
+        message = json.loads(line)
+        if message.get("id") == id:
+            return message
+    raise RuntimeError(f"server exited before answering request {id}")
+
+
+def time_import(python: str) -> float:
+    start = time.perf_counter()
+    subprocess.run([python, "-c", "import main"], cwd=HERE, check=True)
+    return time.perf_counter() - start
+
+
+def time_first_tool_call(python: str, tool: str) -> Tuple[float, float]:
+    """Return seconds until the initialize response and until the first tool response."""
+    env = dict(os.environ, EPR_METRICS_FILE="")
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [python, MAIN], cwd=HERE, env=env, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+    )
+    try:
+        send(
+            proc,
+            {
+                "jsonrpc": "2.0",
+                "id": 1,
+                "method": "initialize",
+                "params": {
+                    "protocolVersion": "2025-06-18",
+                    "capabilities": {},
+                    "clientInfo": {"name": "bench_startup", "version": "0.1.0"},
+                },
+            },
+        )
+        wait_for(proc, 1)
+        initialized = time.perf_counter() - start
+        send(proc, {"jsonrpc": "2.0", "method": "notifications/initialized"})
+        send(proc, {"jsonrpc": "2.0", "id": 2, "method": "tools/call", "params": {"name": tool, "arguments": {}}})
+        response = wait_for(proc, 2)
+        first_tool = time.perf_counter() - start
+        if "error" in response or response.get("result", {}).get("isError"):
+            raise RuntimeError(f"tool call failed: {response}")
+        return initialized, first_tool
+    finally:
+        proc.stdin.close()
+        proc.terminate()
+        proc.wait()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure MCP server time-to-first-tool-response.")
+    parser.add_argument("--runs", "-n", type=int, default=5, help="Cold starts to measure; the median is reported")
+    parser.add_argument(
+        "--budget", type=float, default=2.0, help="Maximum median time-to-first-tool-response in seconds"
+    )
+    parser.add_argument("--tool", default="cache_stats", help="Tool to call; it must take no arguments")
+    parser.add_argument("--python", default=sys.executable, help="Interpreter to start the server with")
+    args = parser.parse_args()
+
+    imports: List[float] = []
+    initialized: List[float] = []
+    first_tool: List[float] = []
+    for _ in range(args.runs):
+        imports.append(time_import(args.python))
+        ready, answered = time_first_tool_call(args.python, args.tool)
+        initialized.append(ready)
+        first_tool.append(answered)
+
+    for label, samples in (
+        ("import main", imports),
+        ("initialize response", initialized),
+        ("first tool response", first_tool),
+    ):
+        print(f"{label:<24} median {statistics.median(samples) * 1000:>8.1f} ms  max {max(samples) * 1000:>8.1f} ms")
+
+    median = statistics.median(first_tool)
+    if median > args.budget:
+        print(f"FAIL: time-to-first-tool-response {median:.3f}s exceeds the {args.budget:.3f}s budget")
+        sys.exit(1)
+    print(f"OK: time-to-first-tool-response {median:.3f}s is within the {args.budget:.3f}s budget")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# check_replica.py
+"""
+Check that the event replica ingests the messages EPR actually publishes.
+
+Feeds EventReplica.apply() the message shape the watcher receives from the
+epr.dev.events topic (06-epr-watcher/01-watcher.md): {"data": {"events":
+[...]}} with the full event records, then a message that does not parse.
+Exits non-zero when events are missing, the unparsable message is not
+counted, or the stored offset stops at it. Needs no Kafka.
+"""
+
+import json
+import sys
+import time
+from collections import namedtuple
+from typing import List
+
+from replica import EventReplica
+
+Record = namedtuple("Record", "partition offset value")
+
+RECEIVER = {
+    "id": "01HFFJ69HHJ506SRDYQMFF1H5A",
+    "name": "watcher-workshop",
+    "type": "foo.bar",
+    "version": "1.0.0",
+    "description": "The event receiver of Brixton",
+    "schema": {"type": "object", "properties": {"name": {"type": "string"}}},
+    "fingerprint": "b183c34c7ba56b17f89dfe0c0b22c0a340889cae88d8e87a3f16bc5bdc8f7acb",
+    "created_at": "16:15:04.000626147",
+}
+
+
+def event(id: str, name: str) -> dict:
+    return {
+        "id": id,
+        "name": name,
+        "version": "7.0.1",
+        "release": "2023.11.16",
+        "platform_id": "linux",
+        "package": "docker",
+        "description": "blah",
+        "payload": {"name": "joe"},
+        "success": True,
+        "created_at": "16:18:30.000879894",
+        "event_receiver_id": RECEIVER["id"],
+        "EventReceiver": RECEIVER,
+    }
+
+
+def message(*events: dict) -> bytes:
+    """A topic message as EPR publishes it (see the watcher output in 06-epr-watcher/01-watcher.md)."""
+    return json.dumps(
+        {
+            "success": True,
+            "id": events[0]["id"],
+            "specversion": "1.0",
+            "type": "foo.bar",
+            "source": "",
+            "api_version": "v1",
+            "name": events[0]["name"],
+            "version": "7.0.1",
+            "release": "2023.11.16",
+            "platform_id": "linux",
+            "package": "docker",
+            "data": {"events": list(events), "event_receivers": [RECEIVER], "event_receiver_groups": None},
+        }
+    ).encode("utf-8")
+
+
+def main() -> None:
+    failures: List[str] = []
+    replica = EventReplica(":memory:", topic="epr.dev.events")
+    replica.synced_at = time.time()
+
+    replica.apply(
+        [
+            Record(0, 0, message(event("01HFFJCJYZN02RR1JSCE9DDAS4", "magnificent"))),
+            Record(
+                0,
+                1,
+                message(event("01HFFJCJYZN02RR1JSCE9DDAS5", "splendid"), event("01HFFJCJYZN02RR1JSCE9DDAS6", "grand")),
+            ),
+        ]
+    )
+    found = replica.search({"name": "magnificent"}, ["id", "name", "success", "payload"], 0, 10)
+    if not found or found[0] != [
+        {"id": "01HFFJCJYZN02RR1JSCE9DDAS4", "name": "magnificent", "success": True, "payload": {"name": "joe"}}
+    ]:
+        failures.append(f"search for the watcher's event returned {found}")
+    if replica.stats()["events"] != 3:
+        failures.append(f"replica holds {replica.stats()['events']} events, expected 3 from two messages")
+    if replica.offsets() != {0: 1}:
+        failures.append(f"stored offsets {replica.offsets()}, expected {{0: 1}}")
+
+    # an unparsable message is counted and skipped, so a restart does not read from it again
+    replica.apply(
+        [
+            Record(0, 2, b'{"data": {"events": "not a list"}}'),
+            Record(0, 3, message(event("01HFFJCJYZN02RR1JSCE9DDAS7", "late"))),
+        ]
+    )
+    replica.apply([Record(0, 4, message(event("01HFFJCJYZN02RR1JSCE9DDAS8", "later")))])
+    if replica.unparsed != 1:
+        failures.append(f"counted {replica.unparsed} unparsable messages, expected 1")
+    if replica.offsets() != {0: 4}:
+        failures.append(f"stored offsets {replica.offsets()} stopped at the unparsable message, expected {{0: 4}}")
+    if replica.stats()["events"] != 5:
+        failures.append(f"replica holds {replica.stats()['events']} events, expected 5")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if failures:
+        sys.exit(1)
+    print("OK: the replica ingests EPR topic messages and skips unparsable ones")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,15 +2,30 @@
 # SPDX-FileCopyrightText: © 2025 Brett Smith <xbcsmith@gmail.com>
 # SPDX-License-Identifier: Apache-2.0
 
+import asyncio
+import bisect
+import contextvars
+import functools
+import hashlib
+import json
 import logging
 import os
+import re
 import sys
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
 from dataclasses import asdict, dataclass, field
-from typing import Any, Dict, List, Optional
+from typing import TYPE_CHECKING, Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+from urllib.parse import quote
 
-import httpx
+# httpx and the MCP SDK are imported on first use, not at import time: MCP
+# clients spawn this server per session and wait for it to start.
+if TYPE_CHECKING:
+    import httpx
 
-from mcp.server.fastmcp import FastMCP
+    from mcp.server.fastmcp import FastMCP
+    from replica import EventReplica
 
 
 def debug_except_hook(type, value, tb):
@@ -24,13 +39,23 @@ def debug_except_hook(type, value, tb):
 
 
 debug = bool(os.environ.get("EPR_DEBUG", False))
-level = logging.INFO
-if debug:
-    sys.excepthook = debug_except_hook
-    level = logging.DEBUG
+metrics_enabled = os.environ.get("EPR_METRICS", "true").lower() not in ("0", "false", "no")
 log_format = "%(asctime)s %(name)s:[%(levelname)s] %(message)s"
-logging.basicConfig(stream=sys.stderr, level=level, format=log_format)
 logger = logging.getLogger(__name__)
+_logging_configured = False
+
+
+def configure_logging() -> None:
+    """Set up logging and the EPR_DEBUG excepthook once, on whichever path starts the server."""
+    global _logging_configured
+    if _logging_configured:
+        return
+    _logging_configured = True
+    level = logging.INFO
+    if debug:
+        sys.excepthook = debug_except_hook
+        level = logging.DEBUG
+    logging.basicConfig(stream=sys.stderr, level=level, format=log_format)
 
 
 @dataclass
@@ -40,6 +65,31 @@ class Config:
     url: str
     token: str
     debug: bool = False
+    timeout: float = 10.0
+    connect_timeout: float = 5.0
+    max_connections: int = 20
+    max_keepalive: int = 10
+    keepalive_expiry: float = 30.0
+    http2: bool = False
+    cache: bool = True
+    cache_max_entries: int = 10000
+    cache_max_bytes: int = 64 * 1024 * 1024
+    cache_ttl_receivers: float = 60.0
+    cache_ttl_groups: float = 60.0
+    cache_dir: Optional[str] = None
+    batch_concurrency: int = 10
+    search_max_limit: int = 1000
+    search_stream: bool = True
+    persisted_queries: bool = True
+    metrics: bool = True
+    metrics_file: Optional[str] = None
+    metrics_interval: float = 15.0
+    replica: bool = False
+    replica_db: str = "~/.cache/epr-workshop/replica.db"
+    replica_max_staleness: float = 5.0
+    lineage_max_events: int = 100000
+    brokers: str = "localhost:9092"
+    topic: str = "epr.dev.events"
 
     def as_dict(self):
         """Get a dictionary containing object properties"""
@@ -65,171 +115,1213 @@ class GraphQLQuery(Model):
     variables: Dict[str, Any] = field(default_factory=dict)
 
 
+OPERATION_MAP = {
+    "search": {
+        "events": "FindEventInput!",
+        "event_receivers": "FindEventReceiverInput!",
+        "event_receiver_groups": "FindEventReceiverGroupInput!",
+    },
+    "mutation": {
+        "create_event": "CreateEventInput!",
+        "create_event_receiver": "CreateEventReceiverInput!",
+        "create_event_receiver_group": "CreateEventReceiverGroupInput!",
+    },
+    "operation": {
+        "events": "event",
+        "event_receivers": "event_receiver",
+        "event_receiver_groups": "event_receiver_group",
+    },
+    "create": {
+        "create_event": "event",
+        "create_event_receiver": "event_receiver",
+        "create_event_receiver_group": "event_receiver_group",
+    },
+}
+
+
 def get_operation(name: str, operation: str) -> str:
-    operation_map = {
-        "search": {
-            "events": "FindEventInput!",
-            "event_receivers": "FindEventReceiverInput!",
-            "event_receiver_groups": "FindEventReceiverGroupInput!",
-        },
-        "mutation": {
-            "create_event": "CreateEventInput!",
-            "create_event_receiver": "CreateEventReceiverInput!",
-            "create_event_receiver_group": "CreateEventReceiverGroupInput!",
-        },
-        "operation": {
-            "events": "event",
-            "event_receivers": "event_receiver",
-            "event_receiver_groups": "event_receiver_group",
-        },
-        "create": {
-            "create_event": "event",
-            "create_event_receiver": "event_receiver",
-            "create_event_receiver_group": "event_receiver_group",
-        },
-    }
-    return operation_map[name][operation]
+    return OPERATION_MAP[name][operation]
 
 
-def get_search_query(operation: str, params: Optional[dict] = None, fields: Optional[list] = None) -> GraphQLQuery:
-    """Convert a query dictionary to a GraphQL query string."""
-    variables = dict(obj=params)
+# Fields returned by the search tools when the caller does not pick any.
+SEARCH_FIELDS = {
+    "events": [
+        "id",
+        "name",
+        "version",
+        "release",
+        "platform_id",
+        "package",
+        "description",
+        "success",
+        "event_receiver_id",
+    ],
+    "event_receivers": ["id", "name", "type", "version", "description"],
+    "event_receiver_groups": ["id", "name", "type", "version", "description"],
+}
+
+PAGING_HELP = (
+    "Returns at most `limit` records; pass the returned next_cursor back as `cursor` for the next page "
+    "and list `fields` to choose which fields are returned."
+)
+
+FIELD_RE = re.compile(r"^[A-Za-z_]\w*$")
+
+
+@functools.lru_cache(maxsize=512)
+def compile_search_query(operation: str, fields: Tuple[str, ...] = ()) -> str:
+    """Build the GraphQL document for one (operation, field set) once; later calls hit the cache."""
     method = get_operation("search", operation)
     op = get_operation("operation", operation)
-    _fields = ",".join(fields) if fields is not None else "id"
-    query = f"""query ($obj: {method}){{{operation}({op}: $obj) {{ {_fields} }}}}"""
-    return GraphQLQuery(query=query, variables=variables)
+    invalid = [f for f in fields if not FIELD_RE.match(str(f))]
+    if invalid:
+        raise ValueError(f"invalid field names {invalid}")
+    _fields = ",".join(fields) if fields else "id"
+    return f"""query ($obj: {method}){{{operation}({op}: $obj) {{ {_fields} }}}}"""
 
 
-def get_mutation_query(operation: str, params: Optional[dict] = None) -> GraphQLQuery:
-    """Convert a mutation dictionary to a GraphQL mutation string."""
-    variables = dict(obj=params)
+@functools.lru_cache(maxsize=None)
+def compile_mutation_query(operation: str) -> str:
     method = get_operation("mutation", operation)
     op = get_operation("create", operation)
-    query = f"""mutation ($obj: {method}){{{operation}({op}: $obj)}}"""
-    return GraphQLQuery(query=query, variables=variables)
+    return f"""mutation ($obj: {method}){{{operation}({op}: $obj)}}"""
+
+
+@functools.lru_cache(maxsize=512)
+def query_hash(query: str) -> str:
+    """sha256 of a GraphQL document, as used by automatic persisted queries."""
+    return hashlib.sha256(query.encode("utf-8")).hexdigest()
+
+
+def get_search_query(operation: str, params: Optional[dict] = None, fields: Optional[list] = None) -> GraphQLQuery:
+    """
+    Convert a query dictionary to a GraphQL query string. `fields` is the
+    projection: only those fields are selected, so only they are sent back.
+    """
+    query = compile_search_query(operation, tuple(fields) if fields else ())
+    return GraphQLQuery(query=query, variables=dict(obj=params))
+
+
+def get_mutation_query(operation: str, params: Optional[dict] = None) -> GraphQLQuery:
+    """Convert a mutation dictionary to a GraphQL mutation string."""
+    return GraphQLQuery(query=compile_mutation_query(operation), variables=dict(obj=params))
 
 
 cfg = Config(
-    url=os.environ.get("EPR_URL", "http://localhost:8042"), token=os.environ.get("EPR_TOKEN", "changeme"), debug=debug
+    url=os.environ.get("EPR_URL", "http://localhost:8042"),
+    token=os.environ.get("EPR_TOKEN", "changeme"),
+    debug=debug,
+    timeout=float(os.environ.get("EPR_TIMEOUT", 10.0)),
+    connect_timeout=float(os.environ.get("EPR_CONNECT_TIMEOUT", 5.0)),
+    max_connections=int(os.environ.get("EPR_MAX_CONNECTIONS", 20)),
+    max_keepalive=int(os.environ.get("EPR_MAX_KEEPALIVE", 10)),
+    keepalive_expiry=float(os.environ.get("EPR_KEEPALIVE_EXPIRY", 30.0)),
+    http2=os.environ.get("EPR_HTTP2", "").lower() in ("1", "true", "yes"),
+    cache=os.environ.get("EPR_CACHE", "true").lower() not in ("0", "false", "no"),
+    cache_max_entries=int(os.environ.get("EPR_CACHE_MAX_ENTRIES", 10000)),
+    cache_max_bytes=int(os.environ.get("EPR_CACHE_MAX_BYTES", 64 * 1024 * 1024)),
+    cache_ttl_receivers=float(os.environ.get("EPR_CACHE_TTL_RECEIVERS", 60.0)),
+    cache_ttl_groups=float(os.environ.get("EPR_CACHE_TTL_GROUPS", 60.0)),
+    cache_dir=os.environ.get("EPR_CACHE_DIR") or None,
+    batch_concurrency=int(os.environ.get("EPR_BATCH_CONCURRENCY", 10)),
+    search_max_limit=int(os.environ.get("EPR_SEARCH_MAX_LIMIT", 1000)),
+    search_stream=os.environ.get("EPR_SEARCH_STREAM", "true").lower() not in ("0", "false", "no"),
+    persisted_queries=os.environ.get("EPR_PERSISTED_QUERIES", "true").lower() not in ("0", "false", "no"),
+    metrics=metrics_enabled,
+    metrics_file=os.environ.get("EPR_METRICS_FILE") or None,
+    metrics_interval=float(os.environ.get("EPR_METRICS_INTERVAL", 15.0)),
+    replica=os.environ.get("EPR_REPLICA", "").lower() in ("1", "true", "yes"),
+    replica_db=os.path.expanduser(os.environ.get("EPR_REPLICA_DB", "~/.cache/epr-workshop/replica.db")),
+    replica_max_staleness=float(os.environ.get("EPR_REPLICA_MAX_STALENESS", 5.0)),
+    lineage_max_events=int(os.environ.get("EPR_LINEAGE_MAX_EVENTS", 100000)),
+    brokers=os.environ.get("EPR_BROKERS", "localhost:9092"),
+    topic=os.environ.get("EPR_TOPIC", "epr.dev.events"),
 )
 
+class ResponseCache:
+    """
+    LRU cache of fetch_* responses keyed by (kind, id), bounded by entry count
+    and total bytes, with a TTL per kind (None never expires). With a
+    directory, entries are also kept on disk so a restarted server starts warm.
+    """
+
+    def __init__(
+        self,
+        ttls: Dict[str, Optional[float]],
+        max_entries: int = 10000,
+        max_bytes: int = 64 * 1024 * 1024,
+        directory: Optional[str] = None,
+    ):
+        self.ttls = ttls
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self.entries: "OrderedDict[Tuple[str, str], Tuple[float, str]]" = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _expired(self, kind: str, stored: float) -> bool:
+        ttl = self.ttls.get(kind)
+        return ttl is not None and time.time() - stored > ttl
+
+    def _path(self, kind: str, id: str) -> str:
+        return os.path.join(self.directory, kind, quote(id, safe="") + ".json")
+
+    def _store(self, key: Tuple[str, str], stored: float, text: str) -> None:
+        self._drop(key)
+        self.entries[key] = (stored, text)
+        self.bytes += len(text)
+        while self.entries and (len(self.entries) > self.max_entries or self.bytes > self.max_bytes):
+            _, (_, evicted) = self.entries.popitem(last=False)
+            self.bytes -= len(evicted)
+            self.evictions += 1
+
+    def _drop(self, key: Tuple[str, str]) -> None:
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= len(entry[1])
+
+    def _load(self, kind: str, id: str) -> Optional[Tuple[float, str]]:
+        if self.directory is None:
+            return None
+        try:
+            with open(self._path(kind, id)) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if self._expired(kind, entry["stored"]):
+            return None
+        return entry["stored"], entry["text"]
+
+    def _save(self, kind: str, id: str, stored: float, text: str) -> None:
+        path = self._path(kind, id)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(f"{path}.tmp", "w") as f:
+                json.dump({"stored": stored, "text": text}, f)
+            os.replace(f"{path}.tmp", path)
+        except OSError as e:
+            logger.warning(f"Could not write cache entry {path}: {e}")
+
+    def get(self, kind: str, id: str) -> Optional[str]:
+        key = (kind, id)
+        entry = self.entries.get(key)
+        if entry is not None and self._expired(kind, entry[0]):
+            self._drop(key)
+            entry = None
+        if entry is None:
+            entry = self._load(kind, id)
+            if entry is not None:
+                self.disk_hits += 1
+                self._store(key, *entry)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, kind: str, id: str, text: str) -> None:
+        stored = time.time()
+        self._store((kind, id), stored, text)
+        if self.directory is not None:
+            self._save(kind, id, stored, text)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "bytes": self.bytes,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class ToolMetrics:
+    """Counters and a latency histogram for one MCP tool."""
+
+    __slots__ = (
+        "calls",
+        "errors",
+        "seconds",
+        "buckets",
+        "response_bytes",
+        "upstream_requests",
+        "upstream_errors",
+        "upstream_seconds",
+        "upstream_bytes",
+    )
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.seconds = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.response_bytes = 0
+        self.upstream_requests = 0
+        self.upstream_errors = 0
+        self.upstream_seconds = 0.0
+        self.upstream_bytes = 0
+
+    def observe(self, seconds: float, error: bool, response_bytes: int) -> None:
+        self.calls += 1
+        self.errors += error
+        self.seconds += seconds
+        self.buckets[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.response_bytes += response_bytes
+
+    def observe_upstream(self, seconds: float, status: int, nbytes: int) -> None:
+        self.upstream_requests += 1
+        self.upstream_errors += status >= 400
+        self.upstream_seconds += seconds
+        self.upstream_bytes += nbytes
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "seconds": round(self.seconds, 6),
+            "mean_ms": round(self.seconds / self.calls * 1000, 3) if self.calls else 0.0,
+            "latency_buckets": {
+                (f"le_{b}" if i < len(LATENCY_BUCKETS) else "le_inf"): n
+                for i, (b, n) in enumerate(zip(LATENCY_BUCKETS + (None,), self.buckets))
+            },
+            "response_bytes": self.response_bytes,
+            "upstream_requests": self.upstream_requests,
+            "upstream_errors": self.upstream_errors,
+            "upstream_seconds": round(self.upstream_seconds, 6),
+            "upstream_bytes": self.upstream_bytes,
+        }
+
+
+class Metrics:
+    """Per-tool metrics, readable as JSON or Prometheus text format."""
+
+    def __init__(self):
+        self.tools: Dict[str, ToolMetrics] = {}
+
+    def tool(self, name: str) -> ToolMetrics:
+        if name not in self.tools:
+            self.tools[name] = ToolMetrics()
+        return self.tools[name]
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {name: stats.as_dict() for name, stats in sorted(self.tools.items())}
+
+    def prometheus(self) -> str:
+        """Prometheus text format, each family's samples together under its own HELP and TYPE lines."""
+        tools = sorted(self.tools.items())
+        counters = (
+            ("epr_mcp_tool_calls_total", "Tool calls", lambda s: s.calls),
+            ("epr_mcp_tool_errors_total", "Tool calls that failed", lambda s: s.errors),
+            ("epr_mcp_tool_response_bytes_total", "Bytes returned by tools", lambda s: s.response_bytes),
+            ("epr_mcp_upstream_requests_total", "Requests sent to EPR", lambda s: s.upstream_requests),
+            ("epr_mcp_upstream_errors_total", "EPR requests that failed", lambda s: s.upstream_errors),
+            ("epr_mcp_upstream_seconds_total", "Seconds spent waiting on EPR", lambda s: f"{s.upstream_seconds:.6f}"),
+            ("epr_mcp_upstream_bytes_total", "Bytes received from EPR", lambda s: s.upstream_bytes),
+        )
+        lines: List[str] = []
+        for family, description, value in counters:
+            lines += [f"# HELP {family} {description}", f"# TYPE {family} counter"]
+            lines += [f'{family}{{tool="{name}"}} {value(stats)}' for name, stats in tools]
+        family = "epr_mcp_tool_duration_seconds"
+        lines += [f"# HELP {family} Tool call latency", f"# TYPE {family} histogram"]
+        for name, stats in tools:
+            label = f'tool="{name}"'
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS, stats.buckets):
+                cumulative += count
+                lines.append(f'{family}_bucket{{{label},le="{bound}"}} {cumulative}')
+            lines.append(f'{family}_bucket{{{label},le="+Inf"}} {stats.calls}')
+            lines.append(f"{family}_sum{{{label}}} {stats.seconds:.6f}")
+            lines.append(f"{family}_count{{{label}}} {stats.calls}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str) -> None:
+        """Write the Prometheus text format atomically, e.g. for node_exporter's textfile collector."""
+        with open(f"{path}.tmp", "w") as f:
+            f.write(self.prometheus())
+        os.replace(f"{path}.tmp", path)
+
+
+metrics = Metrics()
+
+
+class ToolCall:
+    """One running tool call: the metrics it is charged to and whether EPR answered it with an error status."""
+
+    __slots__ = ("stats", "upstream_failed")
+
+    def __init__(self, stats: ToolMetrics):
+        self.stats = stats
+        self.upstream_failed = False
+
+
+# the tool call currently running, so upstream requests are charged to it
+current_tool: "contextvars.ContextVar[Optional[ToolCall]]" = contextvars.ContextVar("current_tool", default=None)
+
+ERROR_BODY_RE = re.compile(r'^\s*\{\s*"errors?"\s*:')
+
+
+def failed(result: Any) -> bool:
+    """
+    Whether a tool result reports a failure: no result (the tool raised), a
+    "Failed to ..." message, or an {"error": ...} / {"errors": [...]} body.
+    Only results that start like an error body are parsed.
+    """
+    if result is None:
+        return True
+    if isinstance(result, dict):
+        return bool(result.get("error") or result.get("errors"))
+    if not isinstance(result, str):
+        return False
+    if result.startswith("Failed to"):
+        return True
+    if ERROR_BODY_RE.match(result):
+        try:
+            body = json.loads(result)
+        except ValueError:
+            return False
+        return isinstance(body, dict) and bool(body.get("error") or body.get("errors"))
+    return False
+
+
+def instrument(fn: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+    """
+    Record calls, errors, latency and response size of an MCP tool. A call
+    is an error when failed() says so for its result or when an EPR request
+    it made came back with status >= 400. With EPR_METRICS=false the tool is
+    returned unwrapped and costs nothing.
+    """
+    if not cfg.metrics:
+        return fn
+    stats = metrics.tool(fn.__name__)
+
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        call = ToolCall(stats)
+        token = current_tool.set(call)
+        start = time.perf_counter()
+        result = None
+        try:
+            result = await fn(*args, **kwargs)
+            return result
+        finally:
+            size = len(result) if isinstance(result, str) else 0
+            stats.observe(time.perf_counter() - start, call.upstream_failed or failed(result), size)
+            current_tool.reset(token)
+
+    return wrapper
+
+
+def record_upstream(started: float, response: "httpx.Response") -> None:
+    """Charge an EPR request to the tool that made it."""
+    call = current_tool.get()
+    if call is not None:
+        call.stats.observe_upstream(time.perf_counter() - started, response.status_code, response.num_bytes_downloaded)
+        call.upstream_failed |= response.status_code >= 400
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent identical upstream calls: the first caller for a key
+    starts the request, callers arriving while it is in flight await the same
+    task instead of sending their own.
+    """
+
+    def __init__(self):
+        self.inflight: Dict[Any, "asyncio.Future[Any]"] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def do(self, key: Any, fn: Callable[[], Awaitable[Any]]) -> Any:
+        self.calls += 1
+        task = self.inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self.inflight[key] = task
+            task.add_done_callback(lambda _: self.inflight.pop(key, None))
+        else:
+            self.coalesced += 1
+        # shield: a caller being cancelled must not cancel the request for the others
+        return await asyncio.shield(task)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "upstream_requests": self.calls - self.coalesced,
+            "upstream_requests_saved": self.coalesced,
+            "in_flight": len(self.inflight),
+        }
+
+
+single_flight = SingleFlight()
+
+
+class PersistedQueries:
+    """
+    Automatic persisted queries (APQ). The first request for a document
+    sends its text together with its sha256 so the server can register it.
+    Later requests send only the hash and the variables. If the server has
+    forgotten the hash it is sent in full again; if the server does not
+    support APQ at all, full text is used from then on.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.supported = True
+        self.registered: set = set()
+        self.hash_only = 0
+        self.full_text = 0
+        self.fallbacks = 0
+
+    def body(self, query: GraphQLQuery) -> Tuple[Dict[str, Any], bool]:
+        """Return the request body for a query and whether it carries only the hash."""
+        if not (self.enabled and self.supported):
+            self.full_text += 1
+            return query.as_dict_query(), False
+        extensions = {"persistedQuery": {"version": 1, "sha256Hash": query_hash(query.query)}}
+        if query.query in self.registered:
+            self.hash_only += 1
+            return {"variables": query.variables, "extensions": extensions}, True
+        self.full_text += 1
+        return dict(query.as_dict_query(), extensions=extensions), False
+
+    def accepted(self, query: GraphQLQuery) -> None:
+        if self.enabled and self.supported:
+            self.registered.add(query.query)
+
+    def rejected(self, query: GraphQLQuery, error: str) -> None:
+        self.fallbacks += 1
+        self.registered.discard(query.query)
+        if "PersistedQueryNotFound" not in error and "PERSISTED_QUERY_NOT_FOUND" not in error:
+            logger.info("EPR does not support persisted queries; sending full query text")
+            self.supported = False
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "supported": self.supported,
+            "registered": len(self.registered),
+            "hash_only": self.hash_only,
+            "full_text": self.full_text,
+            "fallbacks": self.fallbacks,
+        }
+
+
+persisted_queries = PersistedQueries(cfg.persisted_queries)
+
+# Events are immutable once created, so they never expire; receivers and
+# groups get a short TTL. Only successful fetches by id are cached, and a
+# create adds a record under a new id, so creating leaves every entry valid.
+response_cache: Optional[ResponseCache] = None
+if cfg.cache:
+    response_cache = ResponseCache(
+        ttls={"events": None, "receivers": cfg.cache_ttl_receivers, "groups": cfg.cache_ttl_groups},
+        max_entries=cfg.cache_max_entries,
+        max_bytes=cfg.cache_max_bytes,
+        directory=cfg.cache_dir,
+    )
+
+def get_httpx():
+    import httpx
+
+    return httpx
+
+
+# One client for the lifetime of the server, so tool calls reuse pooled
+# keep-alive connections instead of paying a TCP/TLS handshake each time.
+http_client: Optional["httpx.AsyncClient"] = None
+
+
+def get_client() -> "httpx.AsyncClient":
+    """Return the shared EPR client, creating it on first use."""
+    global http_client
+    if http_client is None or http_client.is_closed:
+        httpx = get_httpx()
+        limits = httpx.Limits(
+            max_connections=cfg.max_connections,
+            max_keepalive_connections=cfg.max_keepalive,
+            keepalive_expiry=cfg.keepalive_expiry,
+        )
+        timeout = httpx.Timeout(cfg.timeout, connect=cfg.connect_timeout)
+        try:
+            http_client = httpx.AsyncClient(limits=limits, timeout=timeout, http2=cfg.http2)
+        except ImportError:
+            logger.warning("EPR_HTTP2 needs the h2 package (pip install httpx[http2]); using HTTP/1.1")
+            http_client = httpx.AsyncClient(limits=limits, timeout=timeout)
+    return http_client
 
-mcp = FastMCP("epr-workshop-mcp")
 
+# Local SQLite copy of the event topic, answering search_events when fresh.
+replica: Optional["EventReplica"] = None
 
-@mcp.tool(title="Fetch Event", description="Fetch an event from EPR")
+
+async def close_client() -> None:
+    """Close the shared EPR client and its pooled connections."""
+    global http_client
+    if http_client is not None:
+        await http_client.aclose()
+        http_client = None
+
+
+@asynccontextmanager
+async def lifespan(server: "FastMCP") -> AsyncIterator[None]:
+    """
+    Close the shared EPR client on shutdown; it is opened by the first tool
+    call. With EPR_METRICS_FILE set, metrics are also written periodically.
+    With EPR_REPLICA set, the local event replica is started and stopped.
+    """
+    global replica
+    writer = None
+    if cfg.metrics and cfg.metrics_file:
+        writer = asyncio.ensure_future(write_metrics_periodically(cfg.metrics_file, cfg.metrics_interval))
+    if cfg.replica:
+        from replica import EventReplica
+
+        replica = EventReplica(
+            cfg.replica_db, brokers=cfg.brokers, topic=cfg.topic, max_staleness=cfg.replica_max_staleness
+        )
+        replica.start()
+    try:
+        yield
+    finally:
+        if writer is not None:
+            writer.cancel()
+            metrics.write_prometheus(cfg.metrics_file)
+        if replica is not None:
+            # joins the consumer thread, so keep it off the event loop
+            await asyncio.to_thread(replica.stop)
+            replica = None
+        await close_client()
+
+
+async def write_metrics_periodically(path: str, interval: float) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            metrics.write_prometheus(path)
+        except OSError as e:
+            logger.warning(f"Could not write metrics to {path}: {e}")
+
+
+TOOLS: List[Tuple[Callable[..., Awaitable[Any]], Dict[str, Any]]] = []
+
+
+def tool(**kwargs: Any) -> Callable[[Callable[..., Awaitable[Any]]], Callable[..., Awaitable[Any]]]:
+    """
+    Register an MCP tool. Like @mcp.tool(), but the tools are only added to
+    a FastMCP server, and the MCP SDK only imported, in create_server().
+    """
+
+    def decorator(fn: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+        TOOLS.append((fn, kwargs))
+        return fn
+
+    return decorator
+
+
+def create_server() -> "FastMCP":
+    """Build the FastMCP server with every registered tool."""
+    from mcp.server.fastmcp import FastMCP
+
+    # `mcp dev` and `mcp run` build the server without calling main()
+    configure_logging()
+    server = FastMCP("epr-workshop-mcp", lifespan=lifespan)
+    for fn, kwargs in TOOLS:
+        server.add_tool(fn, **kwargs)
+    return server
+
+
+_server: Optional["FastMCP"] = None
+
+
+def __getattr__(name: str) -> Any:
+    # `mcp dev main.py` and `mcp run main.py` look for a module-level `mcp`
+    global _server
+    if name == "mcp":
+        if _server is None:
+            _server = create_server()
+        return _server
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+async def fetch_cached(kind: str, id: str) -> Tuple[int, str]:
+    """
+    GET /api/v1/{kind}/{id}, answering from the response cache when possible.
+    Returns the status code and the response text.
+    """
+    if response_cache is not None:
+        text = response_cache.get(kind, id)
+        if text is not None:
+            return 200, text
+
+    async def fetch() -> Tuple[int, str]:
+        client = get_client()
+        started = time.perf_counter()
+        response = await client.get(f"{cfg.url}/api/v1/{kind}/{id}")
+        record_upstream(started, response)
+        if response.status_code == 200 and response_cache is not None:
+            response_cache.put(kind, id, response.text)
+        return response.status_code, response.text
+
+    return await single_flight.do(("fetch", kind, id), fetch)
+
+
+async def fetch_records(kind: str, ids: List[str]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Fetch many records of one kind concurrently, at most
+    cfg.batch_concurrency at a time. Returns ({id: record}, {id: error}).
+    """
+    semaphore = asyncio.Semaphore(max(1, cfg.batch_concurrency))
+
+    async def fetch_one(id: str) -> Tuple[str, Optional[Dict[str, Any]], Optional[Any]]:
+        async with semaphore:
+            try:
+                status, text = await fetch_cached(kind, id)
+            except get_httpx().HTTPError as e:
+                return id, None, f"{type(e).__name__}: {e}"
+        try:
+            body = json.loads(text)
+        except ValueError:
+            return id, None, text
+        rows = body.get("data") if isinstance(body, dict) else None
+        if status != 200 or not rows:
+            errors = body.get("errors") if isinstance(body, dict) else None
+            return id, None, errors or f"{kind} {id} not found (HTTP {status})"
+        return id, rows[0] if isinstance(rows, list) else rows, None
+
+    data: Dict[str, Any] = {}
+    errors: Dict[str, Any] = {}
+    # duplicates are fetched once; results keep the order ids were given in
+    for id, row, error in await asyncio.gather(*(fetch_one(id) for id in dict.fromkeys(ids))):
+        if error is None:
+            data[id] = row
+        else:
+            errors[id] = error
+    return data, errors
+
+
+async def fetch_many(kind: str, ids: List[str]) -> str:
+    """Fetch many records of one kind into one JSON document: {"data": {...}, "errors": {...}}."""
+    data, errors = await fetch_records(kind, ids)
+    return json.dumps({"data": data, "errors": errors})
+
+
+@tool(title="Fetch Event", description="Fetch an event from EPR")
+@instrument
 async def fetch_event(id: str) -> str:
     """Fetch an event from the EPR"""
-    async with httpx.AsyncClient() as client:
-        response = await client.get(f"{cfg.url}/api/v1/events/{id}")
-        return response.text
+    _, text = await fetch_cached("events", id)
+    return text
 
 
-@mcp.tool(title="Fetch Event Receiver", description="Fetch an event receiver from EPR")
+@tool(title="Fetch Event Receiver", description="Fetch an event receiver from EPR")
+@instrument
 async def fetch_receiver(id: str) -> str:
     """Fetch an event receiver from the EPR"""
-    async with httpx.AsyncClient() as client:
-        response = await client.get(f"{cfg.url}/api/v1/receivers/{id}")
-        return response.text
+    _, text = await fetch_cached("receivers", id)
+    return text
 
 
-@mcp.tool(title="Fetch Event Receiver Group", description="Fetch an event receiver group from EPR")
+@tool(title="Fetch Event Receiver Group", description="Fetch an event receiver group from EPR")
+@instrument
 async def fetch_group(id: str) -> str:
     """Fetch an event receiver group from the EPR"""
-    async with httpx.AsyncClient() as client:
-        response = await client.get(f"{cfg.url}/api/v1/groups/{id}")
-        return response.text
+    _, text = await fetch_cached("groups", id)
+    return text
 
 
-@mcp.tool(title="Search Events", description="Search for events in EPR")
-async def search_events(data: dict) -> str:
-    """Search for events in the EPR"""
-    fields = [
-        "id",
-        "name",
-        "version",
-        "release",
-        "platform_id",
-        "package",
-        "description",
-        "success",
-        "event_receiver_id",
-    ]
-    query = get_search_query(operation="events", params=data, fields=fields)
-    async with httpx.AsyncClient() as client:
-        headers = {"Content-Type": "application/json"}
-        response = await client.post(f"{cfg.url}/api/v1/graphql/query", json=query.as_dict_query(), headers=headers)
-        if response.status_code == 200:
-            return response.text
-        else:
-            return f"Failed to search events: {response.text}"
-
-
-@mcp.tool(title="Search Event Receivers", description="Search for event receivers in EPR")
-async def search_receivers(data: dict) -> str:
-    """Search for event receivers in the EPR"""
-    fields = ["id", "name", "type", "version", "description"]
-    query = get_search_query(operation="event_receivers", params=data, fields=fields)
-    async with httpx.AsyncClient() as client:
-        headers = {"Content-Type": "application/json"}
-        response = await client.post(f"{cfg.url}/api/v1/graphql/query", json=query.as_dict_query(), headers=headers)
-        if response.status_code == 200:
-            return response.text
-        else:
-            return f"Failed to search event receivers: {response.text}"
-
-
-@mcp.tool(title="Search Event Receiver Groups", description="Search for event receiver groups in EPR")
-async def search_groups(data: dict) -> str:
-    """Search for event receiver groups in the EPR"""
-    fields = ["id", "name", "type", "version", "description"]
-    query = get_search_query(operation="event_receiver_groups", params=data, fields=fields)
-    async with httpx.AsyncClient() as client:
-        headers = {"Content-Type": "application/json"}
-        response = await client.post(f"{cfg.url}/api/v1/graphql/query", json=query.as_dict_query(), headers=headers)
-        if response.status_code == 200:
-            return response.text
-        else:
-            return f"Failed to search event receiver groups: {response.text}"
+async def iter_json_array(chunks: AsyncIterator[str], key: str) -> AsyncIterator[Any]:
+    """
+    Yield the elements of the array stored under `key` in a streamed JSON
+    document, decoding one element at a time so only the element being read
+    is buffered. Raises ValueError if the document has no such array.
+    """
+    decoder = json.JSONDecoder()
+    marker = f'"{key}"'
+    buffer = ""
+    in_array = False
+    async for chunk in chunks:
+        buffer += chunk
+        if not in_array:
+            start = buffer.find(marker)
+            bracket = buffer.find("[", start + len(marker)) if start >= 0 else -1
+            if bracket < 0:
+                continue
+            buffer = buffer[bracket + 1 :]
+            in_array = True
+        pos = 0
+        while True:
+            while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+                pos += 1
+            if pos < len(buffer) and buffer[pos] == "]":
+                return
+            try:
+                element, pos = decoder.raw_decode(buffer, pos)
+            except ValueError:
+                # the element is incomplete; wait for the next chunk
+                break
+            yield element
+        buffer = buffer[pos:]
+    if not in_array:
+        raise ValueError(buffer[:1000] or "empty response")
+
+
+def parse_cursor(cursor: Optional[str]) -> int:
+    """Decode a next_cursor into a record offset, rejecting anything search_page did not hand out."""
+    if not cursor:
+        return 0
+    if not (cursor.isascii() and cursor.isdigit()):
+        raise ValueError(f"invalid cursor {cursor!r}: expected a next_cursor from a previous page")
+    return int(cursor)
+
+
+async def search_page(
+    operation: str,
+    data: dict,
+    fields: Optional[List[str]] = None,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Run a search and return one page of it: {"data": {operation: [...]},
+    "next_cursor": ...}. EPR has no server-side paging, so the cursor is the
+    offset of the next record. In streaming mode the response is decoded
+    incrementally and the download stops once the page is full, so memory
+    and output stay bounded by `limit` however many records match.
+    Concurrent identical searches share one upstream request. Event
+    searches are answered by the local replica when it is enabled and fresh.
+    """
+    query = get_search_query(operation=operation, params=data, fields=fields or SEARCH_FIELDS[operation])
+    offset = parse_cursor(cursor)
+    limit = max(1, min(limit, cfg.search_max_limit))
+    if operation == "events" and replica is not None:
+        found = replica.search(data, fields or SEARCH_FIELDS[operation], offset, limit)
+        if found is not None:
+            page, more = found
+            return {"data": {operation: page}, "next_cursor": str(offset + limit) if more else None}
+    key = ("search", json.dumps(query.as_dict_query(), sort_keys=True), offset, limit)
+    return await single_flight.do(key, lambda: search_upstream(operation, query, offset, limit))
+
+
+async def search_upstream(operation: str, query: GraphQLQuery, offset: int, limit: int) -> Dict[str, Any]:
+    """
+    Send a search to EPR, as a persisted query when possible, and cut the
+    page [offset, offset + limit) out of the response.
+    """
+    body, hash_only = persisted_queries.body(query)
+    try:
+        result = await post_search(operation, body, offset, limit)
+    except ValueError as e:
+        if not hash_only:
+            raise
+        persisted_queries.rejected(query, str(e))
+        body, _ = persisted_queries.body(query)
+        result = await post_search(operation, body, offset, limit)
+    persisted_queries.accepted(query)
+    return result
+
 
+async def post_search(operation: str, body: Dict[str, Any], offset: int, limit: int) -> Dict[str, Any]:
+    page: List[Any] = []
+    more = False
+    client = get_client()
+    headers = {"Content-Type": "application/json"}
+    url = f"{cfg.url}/api/v1/graphql/query"
+    started = time.perf_counter()
+    if cfg.search_stream:
+        async with client.stream("POST", url, json=body, headers=headers) as response:
+            if response.status_code != 200:
+                text = (await response.aread()).decode("utf-8", "replace")
+                record_upstream(started, response)
+                raise ValueError(text)
+            rows = iter_json_array(response.aiter_text(), operation)
+            try:
+                idx = 0
+                async for row in rows:
+                    if idx >= offset:
+                        if len(page) == limit:
+                            more = True
+                            break
+                        page.append(row)
+                    idx += 1
+            finally:
+                await rows.aclose()
+                record_upstream(started, response)
+    else:
+        response = await client.post(url, json=body, headers=headers)
+        record_upstream(started, response)
+        if response.status_code != 200:
+            raise ValueError(response.text)
+        found = (response.json().get("data") or {}).get(operation)
+        if found is None:
+            raise ValueError(response.text)
+        page = found[offset : offset + limit]
+        more = len(found) > offset + limit
+    return {"data": {operation: page}, "next_cursor": str(offset + limit) if more else None}
 
-@mcp.tool(title="Create Event", description="Create a new event in EPR")
+
+def event_links(event: Dict[str, Any]) -> Dict[str, Any]:
+    """Pull the lineage keys out of an EPR event record and its CDEvents payload."""
+    payload = event.get("payload") or {}
+    if isinstance(payload, str):
+        try:
+            payload = json.loads(payload)
+        except ValueError:
+            payload = {}
+    context = payload.get("context") or {} if isinstance(payload, dict) else {}
+    subject = payload.get("subject") or {} if isinstance(payload, dict) else {}
+    content = subject.get("content") or {} if isinstance(subject, dict) else {}
+    return {
+        "id": event.get("id"),
+        "name": event.get("name"),
+        "version": event.get("version"),
+        "type": context.get("type"),
+        "timestamp": context.get("timestamp") or event.get("created_at"),
+        "chain_id": context.get("chainId"),
+        "artifact_id": content.get("artifactId") if isinstance(content, dict) else None,
+        "subject_id": subject.get("id") if isinstance(subject, dict) else None,
+        "success": event.get("success"),
+        "event_receiver_id": event.get("event_receiver_id"),
+    }
+
+
+class LineageIndex:
+    """
+    In-memory adjacency index over events seen by trace_chain: events by id,
+    chainId and artifactId. Events are immutable, so nodes are kept across
+    calls; a (name, version) scope is searched again only after `ttl`. At
+    most `max_events` nodes are kept: the least recently traced are evicted,
+    and the scopes they came from are searched again next time.
+    """
+
+    def __init__(self, ttl: float = 60.0, max_events: int = 100000):
+        self.ttl = ttl
+        self.max_events = max(1, max_events)
+        self.events: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.by_chain: Dict[str, set] = {}
+        self.by_artifact: Dict[str, set] = {}
+        self.scopes: "OrderedDict[Tuple[Optional[str], Optional[str]], float]" = OrderedDict()
+        self.groups: Optional[List[Dict[str, Any]]] = None
+        self.groups_at = 0.0
+        self.evicted = 0
+
+    def add(self, event: Dict[str, Any]) -> Dict[str, Any]:
+        if event.get("id") in self.events:
+            return self.get(event["id"])
+        links = event_links(event)
+        self.events[links["id"]] = links
+        if links["chain_id"]:
+            self.by_chain.setdefault(links["chain_id"], set()).add(links["id"])
+        if links["artifact_id"]:
+            self.by_artifact.setdefault(links["artifact_id"], set()).add(links["id"])
+        while len(self.events) > self.max_events:
+            self._evict()
+        return links
+
+    def get(self, id: str) -> Optional[Dict[str, Any]]:
+        links = self.events.get(id)
+        if links is not None:
+            self.events.move_to_end(id)
+        return links
+
+    def _evict(self) -> None:
+        _, links = self.events.popitem(last=False)
+        self.evicted += 1
+        for index, key in ((self.by_chain, links["chain_id"]), (self.by_artifact, links["artifact_id"])):
+            ids = index.get(key)
+            if ids is not None:
+                ids.discard(links["id"])
+                if not ids:
+                    del index[key]
+        # the scope no longer has all its events indexed
+        self.scopes.pop((links["name"], links["version"]), None)
+        self.scopes.pop((links["name"], None), None)
+
+    def searched(self, scope: Tuple[Optional[str], Optional[str]]) -> None:
+        self.scopes[scope] = time.time()
+        self.scopes.move_to_end(scope)
+        while len(self.scopes) > self.max_events:
+            self.scopes.popitem(last=False)
+
+    def related(self, chains: set, artifacts: set) -> set:
+        ids: set = set()
+        for chain in chains:
+            ids |= self.by_chain.get(chain, set())
+        for artifact in artifacts:
+            ids |= self.by_artifact.get(artifact, set())
+        return ids
+
+    def stale(self, scope: Tuple[Optional[str], Optional[str]]) -> bool:
+        return time.time() - self.scopes.get(scope, 0.0) > self.ttl
+
+
+lineage = LineageIndex(max_events=cfg.lineage_max_events)
+
+
+async def search_all(operation: str, data: dict, fields: List[str], max_records: int) -> List[Dict[str, Any]]:
+    """Page through a search until it is exhausted or max_records were read."""
+    rows: List[Dict[str, Any]] = []
+    cursor = None
+    while len(rows) < max_records:
+        page = await search_page(operation, data, fields=fields, limit=cfg.search_max_limit, cursor=cursor)
+        rows.extend(page["data"][operation])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    return rows[:max_records]
+
+
+async def trace(
+    id: Optional[str] = None,
+    chain_id: Optional[str] = None,
+    artifact_id: Optional[str] = None,
+    name: Optional[str] = None,
+    max_events: int = 1000,
+) -> Dict[str, Any]:
+    """
+    Breadth-first lineage expansion. Each round fetches the unknown event
+    ids in one concurrent batch, searches every new (name, version) scope
+    once, with payloads, and follows shared chainId and artifactId links
+    through the index until nothing new turns up. Chain and artifact traces
+    need the service name to search from when no event id is given.
+    """
+    if not (id or chain_id or artifact_id):
+        raise ValueError("pass id, chain_id or artifact_id")
+    if not (id or name):
+        raise ValueError("pass the service name with chain_id or artifact_id, or an event id to start from")
+    chains = {chain_id} if chain_id else set()
+    artifacts = {artifact_id} if artifact_id else set()
+    pending = {id} if id else set()
+    scopes = {(name, None)} if name else set()
+    found: Dict[str, Dict[str, Any]] = {}
+    fetched = searches = 0
+    fields = SEARCH_FIELDS["events"] + ["payload"]
+
+    while (pending or scopes) and len(found) < max_events:
+        missing = [i for i in pending if i not in lineage.events]
+        if missing:
+            records, _ = await fetch_records("events", missing)
+            fetched += len(records)
+            for record in records.values():
+                lineage.add(record)
+        for i in pending:
+            links = lineage.get(i)
+            if links is None:
+                continue
+            found[i] = links
+            chains.add(links["chain_id"])
+            artifacts.add(links["artifact_id"])
+            scopes.add((links["name"], links["version"]))
+        chains.discard(None)
+        artifacts.discard(None)
+        for scope in scopes:
+            if lineage.stale(scope):
+                criteria = {k: v for k, v in (("name", scope[0]), ("version", scope[1])) if v is not None}
+                for record in await search_all("events", criteria, fields, max_events):
+                    lineage.add(record)
+                lineage.searched(scope)
+                searches += 1
+        scopes = set()
+        pending = lineage.related(chains, artifacts) - set(found)
+
+    events = sorted(found.values(), key=lambda e: (e["timestamp"] or "", e["id"]))[:max_events]
+    receivers = {e["event_receiver_id"] for e in events if e["event_receiver_id"]}
+    if lineage.groups is None or time.time() - lineage.groups_at > lineage.ttl:
+        lineage.groups = await search_all(
+            "event_receiver_groups", {}, ["id", "name", "type", "version", "event_receiver_ids"], max_events
+        )
+        lineage.groups_at = time.time()
+    groups = {}
+    for group in lineage.groups:
+        members = receivers & set(group.get("event_receiver_ids") or [])
+        if members:
+            groups[group["id"]] = {"name": group.get("name"), "event_receiver_ids": sorted(members)}
+    return {
+        "chains": sorted(chains),
+        "artifacts": sorted(artifacts),
+        "events": events,
+        "groups": groups,
+        "stats": {
+            "fetched": fetched,
+            "searches": searches,
+            "indexed_events": len(lineage.events),
+            "evicted_events": lineage.evicted,
+        },
+    }
+
+
+@tool(
+    title="Trace Chain",
+    description="Reconstruct the ordered provenance lineage of an event, artifact (purl) or CDEvents chain in one "
+    "call. Pass one of id, artifact_id or chain_id; with artifact_id or chain_id also pass the service name.",
+)
+@instrument
+async def trace_chain(
+    id: Optional[str] = None,
+    chain_id: Optional[str] = None,
+    artifact_id: Optional[str] = None,
+    name: Optional[str] = None,
+    max_events: int = 1000,
+) -> str:
+    """Trace the lineage of an event, artifact or chain in the EPR"""
+    try:
+        return json.dumps(await trace(id, chain_id, artifact_id, name, max_events))
+    except (ValueError, get_httpx().HTTPError) as e:
+        return f"Failed to trace chain: {e}"
+
+
+@tool(title="Fetch Events", description="Fetch many events from EPR in one call")
+@instrument
+async def fetch_events(ids: List[str]) -> str:
+    """Fetch several events from the EPR, reporting failures per id"""
+    return await fetch_many("events", ids)
+
+
+@tool(title="Fetch Event Receivers", description="Fetch many event receivers from EPR in one call")
+@instrument
+async def fetch_receivers(ids: List[str]) -> str:
+    """Fetch several event receivers from the EPR, reporting failures per id"""
+    return await fetch_many("receivers", ids)
+
+
+@tool(title="Fetch Event Receiver Groups", description="Fetch many event receiver groups from EPR in one call")
+@instrument
+async def fetch_groups(ids: List[str]) -> str:
+    """Fetch several event receiver groups from the EPR, reporting failures per id"""
+    return await fetch_many("groups", ids)
+
+
+@tool(
+    title="Search Events",
+    description=f"Search for events in EPR. {PAGING_HELP}",
+)
+@instrument
+async def search_events(
+    data: dict, fields: Optional[List[str]] = None, limit: int = 100, cursor: Optional[str] = None
+) -> str:
+    """Search for events in the EPR, one page at a time"""
+    try:
+        return json.dumps(await search_page("events", data, fields=fields, limit=limit, cursor=cursor))
+    except (ValueError, get_httpx().HTTPError) as e:
+        return f"Failed to search events: {e}"
+
+
+@tool(
+    title="Search Event Receivers",
+    description=f"Search for event receivers in EPR. {PAGING_HELP}",
+)
+@instrument
+async def search_receivers(
+    data: dict, fields: Optional[List[str]] = None, limit: int = 100, cursor: Optional[str] = None
+) -> str:
+    """Search for event receivers in the EPR, one page at a time"""
+    try:
+        return json.dumps(await search_page("event_receivers", data, fields=fields, limit=limit, cursor=cursor))
+    except (ValueError, get_httpx().HTTPError) as e:
+        return f"Failed to search event receivers: {e}"
+
+
+@tool(
+    title="Search Event Receiver Groups",
+    description=f"Search for event receiver groups in EPR. {PAGING_HELP}",
+)
+@instrument
+async def search_groups(
+    data: dict, fields: Optional[List[str]] = None, limit: int = 100, cursor: Optional[str] = None
+) -> str:
+    """Search for event receiver groups in the EPR, one page at a time"""
+    try:
+        return json.dumps(await search_page("event_receiver_groups", data, fields=fields, limit=limit, cursor=cursor))
+    except (ValueError, get_httpx().HTTPError) as e:
+        return f"Failed to search event receiver groups: {e}"
+
+
+@tool(title="Create Event", description="Create a new event in EPR")
+@instrument
 async def create_event(event_data: dict) -> str:
     """Create a new event in the EPR"""
-    async with httpx.AsyncClient() as client:
-        response = await client.post(f"{cfg.url}/api/v1/events", json=event_data)
-        if response.status_code == 201:
-            return "Event created successfully"
-        else:
-            return f"Failed to create event: {response.text}"
+    client = get_client()
+    started = time.perf_counter()
+    response = await client.post(f"{cfg.url}/api/v1/events", json=event_data)
+    record_upstream(started, response)
+    if response.status_code == 201:
+        return "Event created successfully"
+    else:
+        return f"Failed to create event: {response.text}"
 
 
-@mcp.tool(title="Create Event Receiver", description="Create a new event receiver in EPR")
+@tool(title="Create Event Receiver", description="Create a new event receiver in EPR")
+@instrument
 async def create_receiver(receiver_data: dict) -> str:
     """Create a new event receiver in the EPR"""
-    async with httpx.AsyncClient() as client:
-        response = await client.post(f"{cfg.url}/api/v1/receivers", json=receiver_data)
-        if response.status_code == 201:
-            return "Event receiver created successfully"
-        else:
-            return f"Failed to create event receiver: {response.text}"
+    client = get_client()
+    started = time.perf_counter()
+    response = await client.post(f"{cfg.url}/api/v1/receivers", json=receiver_data)
+    record_upstream(started, response)
+    if response.status_code == 201:
+        return "Event receiver created successfully"
+    else:
+        return f"Failed to create event receiver: {response.text}"
 
 
-@mcp.tool(title="Create Event Receiver Group", description="Create a new event receiver group in EPR")
+@tool(title="Create Event Receiver Group", description="Create a new event receiver group in EPR")
+@instrument
 async def create_group(group_data: dict) -> str:
     """Create a new event receiver group in the EPR"""
-    async with httpx.AsyncClient() as client:
-        response = await client.post(f"{cfg.url}/api/v1/groups", json=group_data)
-        if response.status_code == 201:
-            return "Event receiver group created successfully"
-        else:
-            return f"Failed to create event receiver group: {response.text}"
+    client = get_client()
+    started = time.perf_counter()
+    response = await client.post(f"{cfg.url}/api/v1/groups", json=group_data)
+    record_upstream(started, response)
+    if response.status_code == 201:
+        return "Event receiver group created successfully"
+    else:
+        return f"Failed to create event receiver group: {response.text}"
+
+
+@tool(title="Cache Stats", description="Show hit/miss counters of the MCP response cache")
+@instrument
+async def cache_stats() -> str:
+    """Report the response cache and request coalescing counters"""
+    stats = dict(response_cache.stats(), enabled=True) if response_cache is not None else {"enabled": False}
+    stats["single_flight"] = single_flight.stats()
+    return json.dumps(stats)
+
+
+@tool(title="Get Metrics", description="Show per-tool call counts, errors, latency and upstream time")
+async def get_metrics() -> str:
+    """Report per-tool metrics plus the cache and coalescing counters"""
+    return json.dumps(
+        {
+            "enabled": cfg.metrics,
+            "tools": metrics.snapshot(),
+            "cache": response_cache.stats() if response_cache is not None else None,
+            "single_flight": single_flight.stats(),
+            "persisted_queries": persisted_queries.stats(),
+            "replica": replica.stats() if replica is not None else None,
+        }
+    )
+
+
+def main() -> None:
+    """Run the MCP"""
+    configure_logging()
+    logger.info("MCP is running with the following configuration:")
+    logger.info(f"URL: {cfg.url}")
+    logger.info(f"Token: {cfg.token}")
+    create_server().run(transport="stdio")
 
 
-"""Run the MCP"""
-logger.info("MCP is running with the following configuration:")
-logger.info(f"URL: {cfg.url}")
-logger.info(f"Token: {cfg.token}")
-mcp.run(transport="stdio")
+if __name__ == "__main__":
+    main()
 
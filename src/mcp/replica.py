@@ -0,0 +1,274 @@
+# -*- coding: utf-8 -*-
+# SPDX-FileCopyrightText: © 2025 Brett Smith <xbcsmith@gmail.com>
+# SPDX-License-Identifier: Apache-2.0
+"""
+Local read replica of EPR events for the MCP search tools.
+
+A background thread consumes the event topic (epr.dev.events, the same one
+consumer.py reads) into an embedded SQLite database indexed on the fields
+agents search by, so search_events can be answered locally. Consumed
+offsets are stored with the rows, so a restarted server resumes where it
+stopped. Needs the kafka-python-ng package.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+COLUMNS = (
+    "id",
+    "name",
+    "version",
+    "release",
+    "platform_id",
+    "package",
+    "description",
+    "success",
+    "event_receiver_id",
+    "created_at",
+    "payload",
+)
+INDEXED = ("name", "version", "package", "release", "event_receiver_id", "success")
+
+SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS events (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        id TEXT NOT NULL UNIQUE,
+        name TEXT,
+        version TEXT,
+        release TEXT,
+        platform_id TEXT,
+        package TEXT,
+        description TEXT,
+        success INTEGER,
+        event_receiver_id TEXT,
+        created_at TEXT,
+        payload TEXT
+    )""",
+    """CREATE TABLE IF NOT EXISTS offsets (
+        topic TEXT,
+        partition INTEGER,
+        offset INTEGER,
+        PRIMARY KEY (topic, partition)
+    )""",
+] + [f"CREATE INDEX IF NOT EXISTS events_{column} ON events ({column})" for column in INDEXED]
+
+
+def events_from_message(value: bytes) -> Optional[List[Dict[str, Any]]]:
+    """
+    Extract the event records from a topic message. EPR publishes
+    {"data": {"events": [{...}, ...], ...}, ...}; a single {"data": {"event":
+    {...}}} envelope or a bare event record is accepted too. Returns None when
+    the message is none of these.
+    """
+    try:
+        message = json.loads(value)
+    except (TypeError, ValueError):
+        return None
+    if not isinstance(message, dict):
+        return None
+    data = message.get("data")
+    if isinstance(data, dict):
+        if isinstance(data.get("events"), list):
+            events = data["events"]
+            if all(isinstance(event, dict) and "id" in event for event in events):
+                return events
+            return None
+        if isinstance(data.get("event"), dict):
+            return [data["event"]]
+    if "id" in message and "event_receiver_id" in message:
+        return [message]
+    return None
+
+
+class EventReplica:
+    """
+    SQLite replica of the event topic. search() answers from it while it is
+    fresh, meaning it reached the end of the topic within `max_staleness`
+    seconds. Otherwise it returns None and the caller asks the server.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        brokers: str = "localhost:9092",
+        topic: str = "epr.dev.events",
+        max_staleness: float = 5.0,
+    ):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.brokers = brokers
+        self.topic = topic
+        self.max_staleness = max_staleness
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        if path != ":memory:":
+            self.db.execute("PRAGMA journal_mode=WAL")
+        for statement in SCHEMA:
+            self.db.execute(statement)
+        self.db.commit()
+        # the consumer thread writes while the event loop reads
+        self.lock = threading.Lock()
+        self.synced_at = 0.0
+        self.consumed = 0
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.unsupported = 0
+        self.unparsed = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def offsets(self) -> Dict[int, int]:
+        with self.lock:
+            rows = self.db.execute("SELECT partition, offset FROM offsets WHERE topic = ?", (self.topic,)).fetchall()
+        return dict(rows)
+
+    def apply(self, records: List[Any]) -> None:
+        """
+        Store a batch of consumed topic records and their offsets in one
+        transaction. A message that does not parse is logged with its position
+        and counted in stats(), then skipped: retrying it after a restart would
+        fail the same way and keep the replica from catching up.
+        """
+        rows = []
+        offsets: Dict[int, int] = {}
+        for record in records:
+            offsets[record.partition] = max(record.offset, offsets.get(record.partition, -1))
+            events = events_from_message(record.value)
+            if events is None:
+                self.unparsed += 1
+                logger.warning(
+                    f"Replica skipped a message it could not parse at {self.topic}[{record.partition}]@{record.offset}"
+                )
+                continue
+            for event in events:
+                row = [event.get(column) for column in COLUMNS]
+                success = event.get("success")
+                row[COLUMNS.index("success")] = None if success is None else int(bool(success))
+                payload = event.get("payload")
+                row[COLUMNS.index("payload")] = None if payload is None else json.dumps(payload)
+                rows.append(row)
+        placeholders = ", ".join("?" for _ in COLUMNS)
+        with self.lock, self.db:
+            # events are immutable, so a redelivered event is simply ignored
+            self.db.executemany(
+                f"INSERT INTO events ({', '.join(COLUMNS)}) VALUES ({placeholders}) ON CONFLICT(id) DO NOTHING",
+                rows,
+            )
+            self.db.executemany(
+                "INSERT INTO offsets (topic, partition, offset) VALUES (?, ?, ?) "
+                "ON CONFLICT(topic, partition) DO UPDATE SET offset = MAX(offset, excluded.offset)",
+                [(self.topic, partition, offset) for partition, offset in offsets.items()],
+            )
+        self.consumed += len(rows)
+
+    def fresh(self) -> bool:
+        return time.time() - self.synced_at <= self.max_staleness
+
+    def search(
+        self, criteria: Optional[Dict[str, Any]], fields: List[str], offset: int, limit: int
+    ) -> Optional[Tuple[List[Dict[str, Any]], bool]]:
+        """
+        Return (page, more) for an events search, or None when the replica
+        cannot answer: it is stale, the search uses fields it does not
+        store, or nothing matched (the events may not have arrived yet).
+        """
+        criteria = {k: v for k, v in (criteria or {}).items() if v is not None}
+        if not self.fresh():
+            self.stale += 1
+            return None
+        if any(k not in COLUMNS or isinstance(v, (dict, list)) for k, v in criteria.items()) or any(
+            f not in COLUMNS for f in fields
+        ):
+            self.unsupported += 1
+            return None
+        where = " AND ".join(f"{k} = ?" for k in criteria) or "1"
+        values = [int(v) if isinstance(v, bool) else v for v in criteria.values()]
+        sql = f"SELECT {', '.join(fields)} FROM events WHERE {where} ORDER BY seq LIMIT ? OFFSET ?"
+        with self.lock:
+            rows = self.db.execute(sql, values + [limit + 1, offset]).fetchall()
+        if not rows and offset == 0:
+            self.misses += 1
+            return None
+        self.hits += 1
+        page = []
+        for row in rows[:limit]:
+            record = dict(zip(fields, row))
+            if record.get("success") is not None:
+                record["success"] = bool(record["success"])
+            if record.get("payload") is not None:
+                record["payload"] = json.loads(record["payload"])
+            page.append(record)
+        return page, len(rows) > limit
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="epr-replica", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the consumer thread and close the database; this blocks, so call it off the event loop."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        with self.lock:
+            self.db.close()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self._consume()
+            except Exception as e:
+                logger.warning(f"Replica consumer for {self.topic} on {self.brokers} failed, retrying: {e}")
+                self._stop.wait(5.0)
+
+    def _consume(self) -> None:
+        from kafka import KafkaConsumer, TopicPartition
+
+        consumer = KafkaConsumer(
+            bootstrap_servers=[broker.strip() for broker in self.brokers.split(",") if broker.strip()],
+            group_id=None,
+            enable_auto_commit=False,
+        )
+        try:
+            partitions = consumer.partitions_for_topic(self.topic) or set()
+            assigned = [TopicPartition(self.topic, p) for p in sorted(partitions)]
+            consumer.assign(assigned)
+            stored = self.offsets()
+            for tp in assigned:
+                if tp.partition in stored:
+                    consumer.seek(tp, stored[tp.partition] + 1)
+                else:
+                    consumer.seek_to_beginning(tp)
+            max_records = 1000
+            while not self._stop.is_set():
+                batches = consumer.poll(timeout_ms=500, max_records=max_records)
+                records = [record for batch in batches.values() for record in batch]
+                if records:
+                    self.apply(records)
+                if len(records) < max_records:
+                    # a short batch means we are at the end of the topic
+                    self.synced_at = time.time()
+        finally:
+            consumer.close()
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            (rows,) = self.db.execute("SELECT COUNT(*) FROM events").fetchone()
+        return {
+            "events": rows,
+            "consumed": self.consumed,
+            "fresh": self.fresh(),
+            "seconds_since_sync": round(time.time() - self.synced_at, 3) if self.synced_at else None,
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale": self.stale,
+            "unsupported": self.unsupported,
+            "unparsed": self.unparsed,
+        }
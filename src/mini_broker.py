@@ -4,21 +4,46 @@ import asyncio
 import uuid
 from datetime import datetime
 
+from event_dispatch import Subscription, drain, fan_out
+from event_routing import SubscriptionIndex
+
 
 class InMemoryBroker:
-    def __init__(self):
-        self.subscribers = {}  # event_type -> [callbacks]
+    def __init__(self, dispatch="inline", queue_size=1000, overflow="block"):
+        # inline: publish awaits each callback; queued: per-subscriber queue and worker (event_dispatch.py)
+        self.dispatch = dispatch
+        self.queue_size = queue_size
+        self.overflow = overflow
+        self.subscribers = SubscriptionIndex()  # event type or pattern -> subscriptions
+        self.subscriptions = []
 
-    async def publish(self, event: dict):
+    async def publish(self, event: dict, wait=False):
         print("PUBLISH:", event.get("type"), event.get("subject"))
-        # notify matching subscribers and wildcard "*"
-        for etype, callbacks in list(self.subscribers.items()):
-            if etype == "*" or etype == event.get("type"):
-                for cb in callbacks:
-                    await cb(event)
-
-    async def subscribe(self, event_type: str, callback):
-        self.subscribers.setdefault(event_type, []).append(callback)
+        # notify exact, pattern ("dev.cdevents.artifact.*") and wildcard "*" subscribers
+        subscriptions = self.subscribers.match(event.get("type") or "")
+        if self.dispatch == "inline":
+            for sub in subscriptions:
+                await sub.callback(event)
+            return None
+        delivery = await fan_out(subscriptions, event)
+        if wait:
+            await delivery
+        return delivery
+
+    async def subscribe(self, event_type: str, callback, overflow=None):
+        sub = Subscription(event_type, callback, self.queue_size, overflow or self.overflow)
+        self.subscriptions.append(sub)
+        self.subscribers.add(event_type, sub)
+
+    async def drain(self):
+        await drain(self.subscriptions)
+
+    async def close(self):
+        for sub in self.subscriptions:
+            await sub.stop()
+
+    def stats(self):
+        return [sub.stats() for sub in self.subscriptions]
 
 
 async def printer(event: dict):
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+# replay_epr_events.py
+"""
+Replay a recorded event dump against EPR at a controlled rate.
+
+The source is either the epr_reports/ directory written by
+`generate_epr_events.py --write-to-disk` or an NDJSON dump (optionally
+compressed). Events are paced with a token bucket (--rate) and/or replayed
+with their original context.timestamp spacing scaled by --speed.
+"""
+
+import argparse
+import asyncio
+import glob
+import json
+import os
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+import httpx
+
+from event_dump import iter_ndjson
+from generate_epr_events import (
+    apost,
+    apost_event_receivers,
+    generate_event_receivers,
+    logger,
+    make_async_client,
+)
+
+
+class TokenBucket:
+    """
+    Token bucket pacer: tokens refill at `rate` per second up to `burst`, and
+    every acquire() takes one, sleeping until it is available.
+    """
+
+    def __init__(self, rate: float, burst: float = 1.0):
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+
+    async def acquire(self) -> None:
+        while True:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1.0:
+                self.tokens -= 1.0
+                return
+            await asyncio.sleep((1.0 - self.tokens) / self.rate)
+
+
+def parse_timestamp(ts: str) -> float:
+    """Convert a CDEvents ISO-8601 timestamp to epoch seconds."""
+    return datetime.fromisoformat(ts.replace("Z", "+00:00")).timestamp()
+
+
+def iter_dump(source: str) -> Iterator[Dict[str, Any]]:
+    """Yield events from an epr_reports/ directory or an NDJSON dump, in recorded order."""
+    if not os.path.isdir(source):
+        yield from iter_ndjson(source)
+        return
+    # a single dump (events.ndjson) or the shards of a --workers dataset (events-0000-of-0004.ndjson)
+    ndjson = sorted(glob.glob(os.path.join(source, "events*.ndjson*")))
+    if ndjson:
+        for path in ndjson:
+            yield from iter_ndjson(path)
+        return
+    # event_{idx:03d}_... grows past three digits, so order by the parsed index
+    files = glob.glob(os.path.join(source, "events", "event_*.json"))
+    for filename in sorted(files, key=lambda f: int(os.path.basename(f).split("_")[1])):
+        with open(filename) as f:
+            yield json.load(f)
+
+
+class ReplayResults:
+    """Running totals of a replay, so results are counted as they arrive instead of kept."""
+
+    def __init__(self):
+        self.posted = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.statuses: Counter = Counter()
+
+    def record(self, status: Optional[int]) -> None:
+        self.posted += 1
+        self.statuses[status if status is not None else "ERROR"] += 1
+        if status and 200 <= status < 300:
+            self.succeeded += 1
+        else:
+            self.failed += 1
+
+
+def load_event_receivers(source: str) -> List[Dict[str, Any]]:
+    """Event receivers recorded next to the dump, or the generator defaults."""
+    files = sorted(glob.glob(os.path.join(source, "event_receivers", "*.json"))) if os.path.isdir(source) else []
+    if not files:
+        return generate_event_receivers()
+    receivers = []
+    for filename in files:
+        with open(filename) as f:
+            receivers.append(json.load(f))
+    return receivers
+
+
+async def replay(
+    events: Iterator[Dict[str, Any]],
+    url: str = "http://localhost:8042",
+    timeout: float = 10.0,
+    concurrency: int = 10,
+    rate: Optional[float] = None,
+    burst: float = 1.0,
+    speed: Optional[float] = None,
+    receiver_ids: Optional[Dict[str, str]] = None,
+    transport: Optional[httpx.AsyncBaseTransport] = None,
+) -> Tuple[ReplayResults, float]:
+    """
+    Post events to /api/v1/events, pacing dispatch with a token bucket when
+    `rate` is set and by the original timestamp gaps divided by `speed` when
+    `speed` is set. At most `concurrency` events are in flight and only
+    their tasks are kept, so memory does not grow with the dump. Returns the
+    result totals and the elapsed dispatch time.
+    """
+    headers = {"Content-Type": "application/json"}
+    endpoint = f"{url}/api/v1/events"
+    bucket = TokenBucket(rate, burst) if rate else None
+    in_flight = asyncio.Semaphore(max(1, concurrency))
+    results = ReplayResults()
+    pending: Set[asyncio.Task] = set()
+
+    async def send(client: httpx.AsyncClient, ev: Dict[str, Any]) -> None:
+        try:
+            resp = await apost(client, endpoint, data=ev, headers=headers)
+            results.record(resp.status_code)
+        except Exception as e:
+            logger.error(f"Failed to replay event {ev.get('description', '<no_description>')}: {e}")
+            results.record(None)
+        finally:
+            in_flight.release()
+
+    async with make_async_client(timeout=timeout, concurrency=concurrency, transport=transport) as client:
+        start = time.monotonic()
+        first_ts = None
+        for ev in events:
+            if receiver_ids:
+                event_type = ev.get("payload", {}).get("context", {}).get("type")
+                ev["event_receiver_id"] = receiver_ids.get(event_type, ev.get("event_receiver_id"))
+            if speed:
+                ts = parse_timestamp(ev["payload"]["context"]["timestamp"])
+                first_ts = ts if first_ts is None else first_ts
+                delay = start + (ts - first_ts) / speed - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            if bucket is not None:
+                await bucket.acquire()
+            await in_flight.acquire()
+            task = asyncio.create_task(send(client, ev))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+        elapsed = time.monotonic() - start
+        await asyncio.gather(*pending)
+    return results, elapsed
+
+
+def main() -> None:
+    """
+    Replay a recorded dump against EPR and report achieved versus target rate.
+    """
+    parser = argparse.ArgumentParser(description="Replay recorded EPR events at a fixed or scaled rate.")
+    parser.add_argument(
+        "source",
+        nargs="?",
+        default="epr_reports",
+        help="epr_reports/ directory or NDJSON dump (.ndjson, .ndjson.gz, .ndjson.zst)",
+    )
+    parser.add_argument("--url", "-u", default="http://localhost:8042", help="EPR URL")
+    parser.add_argument("--timeout", "-t", type=float, default=10.0, help="Request timeout in seconds")
+    parser.add_argument("--concurrency", "-c", type=int, default=10, help="Maximum requests in flight")
+    parser.add_argument("--rate", "-r", type=float, default=None, help="Target events per second")
+    parser.add_argument("--burst", type=float, default=1.0, help="Token bucket size for --rate")
+    parser.add_argument(
+        "--speed",
+        type=float,
+        default=None,
+        help="Replay with the recorded context.timestamp spacing divided by this multiplier",
+    )
+    parser.add_argument(
+        "--create-receivers",
+        action="store_true",
+        help="Create the recorded event receivers first and rewrite event_receiver_id by event type",
+    )
+    parser.add_argument(
+        "--standin",
+        action="store_true",
+        help="Replay against an in-process EPR stand-in (epr_standin.py) instead of the network",
+    )
+    args = parser.parse_args()
+
+    if not args.rate and not args.speed:
+        parser.error("one of --rate or --speed is required")
+
+    transport = None
+    if args.standin:
+        from epr_standin import EPRStandIn
+
+        transport = httpx.ASGITransport(app=EPRStandIn())
+
+    receiver_ids: Dict[str, str] = {}
+    if args.create_receivers or args.standin:
+        evr_results = asyncio.run(
+            apost_event_receivers(
+                load_event_receivers(args.source),
+                url=args.url,
+                timeout=args.timeout,
+                concurrency=args.concurrency,
+                transport=transport,
+            )
+        )
+        receiver_ids = {t: r["data"] for t, r in evr_results.items() if r.get("status")}
+        print(f"Created {len(receiver_ids)}/{len(evr_results)} event receivers")
+
+    results, elapsed = asyncio.run(
+        replay(
+            iter_dump(args.source),
+            url=args.url,
+            timeout=args.timeout,
+            concurrency=args.concurrency,
+            rate=args.rate,
+            burst=args.burst,
+            speed=args.speed,
+            receiver_ids=receiver_ids,
+            transport=transport,
+        )
+    )
+    print(f"Posted {results.succeeded}/{results.posted} events successfully")
+    if results.failed:
+        statuses = ", ".join(f"{status}: {count}" for status, count in sorted(results.statuses.items(), key=str))
+        print(f"Responses by status: {statuses}")
+    achieved = results.posted / elapsed if elapsed else 0.0
+    target = f"{args.rate:.1f}/s" if args.rate else "unbounded"
+    if args.speed:
+        target += f" at {args.speed}x recorded speed"
+    print(f"Achieved rate {achieved:.1f}/s over {elapsed:.2f}s (target {target})")
+
+
+if __name__ == "__main__":
+    main()